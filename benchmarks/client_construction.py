@@ -0,0 +1,115 @@
+"""
+Cost of building HTTP clients and of new TLS connections, with a fresh
+SSLContext per client (the httpx default) vs the shared flymyai.core.tls one.
+
+Construction: httpx clients and FlyMyAI client rebuilds (_reconnect_client).
+Handshakes: a new client and connection per request against a local
+TLS server, with a full handshake every time vs a resumed TLS session. Usage:
+
+    python benchmarks/client_construction.py --rounds 200
+"""
+
+import argparse
+import http.server
+import logging
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+from flymyai import client as sync_client
+from flymyai.core.tls import _ResumingSSLContext, ssl_context
+
+
+def per_call_ms(fn, rounds: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - started) / rounds * 1000
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # one write per response, no delayed-ACK stalls
+    wbufsize = -1
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+def start_tls_server(directory: Path):
+    cert, key = directory / "cert.pem", directory / "key.pem"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1"]
+        + ["-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost"]
+        + ["-keyout", str(key), "-out", str(cert)],
+        check=True,
+        capture_output=True,
+    )
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return cert, server.server_address[1]
+
+
+def construction(rounds: int):
+    def fresh():
+        httpx.Client(http2=True).close()
+
+    def shared():
+        httpx.Client(http2=True, verify=ssl_context(http2=True)).close()
+
+    client = sync_client("fly-123", "owner/model")
+    print(f"{'httpx.Client, fresh context':>36}: {per_call_ms(fresh, rounds):7.2f} ms")
+    print(
+        f"{'httpx.Client, shared context':>36}: {per_call_ms(shared, rounds):7.2f} ms"
+    )
+    print(
+        f"{'FlyMyAI reconnect, shared context':>36}:"
+        f" {per_call_ms(client._reconnect_client, rounds):7.2f} ms"
+    )
+    client.close()
+
+
+def handshakes(rounds: int):
+    with tempfile.TemporaryDirectory() as directory:
+        cert, port = start_tls_server(Path(directory))
+        url = f"https://localhost:{port}/"
+
+        plain = ssl.create_default_context(cafile=cert)
+        resuming = _ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        resuming.load_verify_locations(cafile=cert)
+        rows = [
+            ("fresh context", lambda: ssl.create_default_context(cafile=cert)),
+            ("shared context, full handshake", lambda: plain),
+            ("shared context, resumed session", lambda: resuming),
+        ]
+        for label, context in rows:
+
+            def request():
+                with httpx.Client(verify=context()) as client:
+                    client.get(url)
+
+            print(f"{label:>36}: {per_call_ms(request, rounds):7.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    logging.getLogger("flymyai").setLevel(logging.ERROR)
+    construction(args.rounds)
+    handshakes(args.rounds)
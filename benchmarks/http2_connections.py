@@ -0,0 +1,141 @@
+"""
+Throughput of a single HTTP/2 connection vs AsyncMultiConnectionTransport.
+
+The stand-in is a local h2c (HTTP/2 over cleartext TCP) server that serves
+the streams of one connection one at a time, like a load balancer pinning
+a connection to a single core. Usage:
+
+    python benchmarks/http2_connections.py --requests 2000 --connections 1 2 4 8
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import time
+from typing import Tuple
+
+import h2.config
+import h2.connection
+import h2.events
+import httpx
+
+from flymyai.core.transports import AsyncMultiConnectionTransport
+
+_BODY = b'{"status": 200, "output_data": {"output": ["token"]}}'
+
+
+class _StandInConnection(asyncio.Protocol):
+    def __init__(self, service_time: float):
+        self.service_time = service_time
+        self.h2 = h2.connection.H2Connection(
+            h2.config.H2Configuration(client_side=False)
+        )
+        self.pending = asyncio.Queue()
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.h2.initiate_connection()
+        self.transport.write(self.h2.data_to_send())
+        self.worker = asyncio.ensure_future(self._serve())
+
+    def connection_lost(self, exc):
+        self.worker.cancel()
+
+    def data_received(self, data: bytes):
+        for event in self.h2.receive_data(data):
+            if isinstance(event, h2.events.StreamEnded):
+                self.pending.put_nowait(event.stream_id)
+            elif isinstance(event, h2.events.DataReceived):
+                self.h2.acknowledge_received_data(
+                    event.flow_controlled_length, event.stream_id
+                )
+        self.transport.write(self.h2.data_to_send())
+
+    async def _serve(self):
+        while True:
+            stream_id = await self.pending.get()
+            await asyncio.sleep(self.service_time)
+            self.h2.send_headers(
+                stream_id,
+                [
+                    (":status", "200"),
+                    ("content-type", "application/json"),
+                    ("content-length", str(len(_BODY))),
+                ],
+            )
+            self.h2.send_data(stream_id, _BODY, end_stream=True)
+            self.transport.write(self.h2.data_to_send())
+
+
+def _serve_stand_in(service_time: float, port_sender):
+    async def serve():
+        server = await asyncio.get_running_loop().create_server(
+            lambda: _StandInConnection(service_time), "127.0.0.1", 0
+        )
+        port_sender.send(server.sockets[0].getsockname()[1])
+        await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+def start_stand_in(service_time: float) -> Tuple[multiprocessing.Process, int]:
+    """
+    Run the h2c stand-in in a separate process, so it does not share
+    the CPU of the client being measured
+    """
+    port_receiver, port_sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(
+        target=_serve_stand_in, args=(service_time, port_sender), daemon=True
+    )
+    process.start()
+    return process, port_receiver.recv()
+
+
+async def run(client: httpx.AsyncClient, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            response = await client.get("/predict")
+            response.raise_for_status()
+
+    await client.get("/predict")  # connect before measuring
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return requests / (time.perf_counter() - started)
+
+
+async def main(args):
+    process, port = start_stand_in(args.service_time)
+    base_url = f"http://127.0.0.1:{port}"
+    for connections in args.connections:
+        if connections == 1:
+            client = httpx.AsyncClient(base_url=base_url, http1=False, http2=True)
+            label = "httpx default pool"
+        else:
+            transport = AsyncMultiConnectionTransport(
+                connections=connections,
+                max_streams_per_connection=args.max_streams,
+                http1=False,
+            )
+            client = httpx.AsyncClient(base_url=base_url, transport=transport)
+            label = f"{connections} connections"
+        async with client:
+            rps = await run(client, args.requests, args.concurrency)
+        print(f"{label:>20}: {rps:8.0f} requests/s")
+    process.terminate()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--connections", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--max-streams", type=int, default=100)
+    parser.add_argument(
+        "--service-time",
+        type=float,
+        default=0.005,
+        help="seconds the stand-in spends on every stream of a connection",
+    )
+    asyncio.run(main(parser.parse_args()))
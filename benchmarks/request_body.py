@@ -0,0 +1,74 @@
+"""
+Bytes on the wire and encode time per request of text-only payloads:
+form fields (FMA_JSON_BODY=0, the previous encoding) vs a JSON body.
+Usage:
+
+    python benchmarks/request_body.py --rounds 20000
+"""
+
+import argparse
+import time
+
+import httpx
+
+from flymyai.multipart import MultipartPayload
+from flymyai.multipart import payload as payload_module
+
+PAYLOADS = {
+    "prompt": {"prompt": "a photo of a cat wearing a tiny hat, studio light"},
+    "parameters": {
+        "prompt": "a photo of a cat wearing a tiny hat, studio light",
+        "negative_prompt": "blurry, low quality",
+        "width": 1024,
+        "height": 1024,
+        "steps": 30,
+        "guidance": 7.5,
+        "seed": 42,
+    },
+    "chat": {
+        "messages": [
+            {"role": "user", "content": "Describe a cat " * 20},
+            {"role": "assistant", "content": "A cat is " * 40},
+        ] * 4
+    },
+}
+
+
+def encode(payload: dict) -> httpx.Request:
+    request = httpx.Request(
+        "POST",
+        "https://api.flymy.ai/api/v1/owner/model/predict",
+        **MultipartPayload(payload).serialize({"x-api-key": "fly-123"}),
+    )
+    request.read()
+    return request
+
+
+def measure(payload: dict, rounds: int):
+    request = encode(payload)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        encode(payload)
+    elapsed = (time.perf_counter() - started) / rounds * 1e6
+    return len(request.content), request.headers["Content-Type"], elapsed
+
+
+def main(args):
+    for name, payload in PAYLOADS.items():
+        for json_body in (False, True):
+            payload_module._JSON_BODY = json_body
+            try:
+                size, content_type, elapsed = measure(payload, args.rounds)
+            except TypeError as e:
+                print(f"{name:>10}: {'form':>5} cannot encode ({e})")
+                continue
+            print(
+                f"{name:>10}: {'json' if json_body else 'form':>5} {size:6d} bytes"
+                f" {elapsed:6.1f} us  {content_type}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=20000)
+    main(parser.parse_args())
@@ -0,0 +1,39 @@
+"""
+Per-call overhead of resolving the route of a model: amend_client_info()
+plus the request paths and headers every predict reads. Usage:
+
+    python benchmarks/route_overhead.py --calls 100000 --models 50
+"""
+
+import argparse
+import time
+
+from flymyai import client as sync_client
+
+
+def main(args):
+    client = sync_client("fly-123")
+    models = [f"owner/model-{index}" for index in range(args.models)]
+
+    def call(model: str):
+        client_info = client.amend_client_info(model)
+        client_info.prediction_path
+        client_info.prediction_stream_path
+        client_info.prediction_cancel_path
+        client_info.authorization_headers
+
+    for model in models:
+        call(model)
+    started = time.perf_counter()
+    for index in range(args.calls):
+        call(models[index % len(models)])
+    elapsed = time.perf_counter() - started
+    print(f"{elapsed / args.calls * 1e6:.2f} us per call ({args.models} models)")
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=100000)
+    parser.add_argument("--models", type=int, default=50)
+    main(parser.parse_args())
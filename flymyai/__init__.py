@@ -1,25 +1,56 @@
-import httpx
-
-from flymyai.core.client import FlyMyAI, AsyncFlyMyAI, FlyMyAIM1, AsyncFlymyAIM1
-from flymyai.core.exceptions import FlyMyAIPredictException, FlyMyAIExceptionGroup
-from flymyai.agents import (
-    AgentClient,
-    AsyncAgentClient,
-    FlyMyAIAgentError,
-    SchemaSuggestion,
-    SuggestSchemaError,
-    VariablesValidationError,
-)
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import httpx
+
+    from flymyai.core.client import (
+        FlyMyAI,
+        AsyncFlyMyAI,
+        EngineFlyMyAI,
+        FlyMyAIM1,
+        AsyncFlymyAIM1,
+    )
+    from flymyai.core.exceptions import (
+        FlyMyAIPredictException,
+        FlyMyAIExceptionGroup,
+    )
+    from flymyai.core.clients.default_clients import aclose_default_clients
+    from flymyai.core.journal import TaskJournal
+    from flymyai.utils.deadline import Deadline
+    from flymyai.multipart.images import ImageOptions
+    from flymyai.agents import (
+        AgentClient,
+        AsyncAgentClient,
+        FlyMyAIAgentError,
+        SchemaSuggestion,
+        SuggestSchemaError,
+        VariablesValidationError,
+    )
+
+    client = FlyMyAI
+    async_client = AsyncFlyMyAI
+    engine_client = EngineFlyMyAI
+    run = client.run_predict
+    async_run = async_client.arun_predict
+
+    m1_client = FlyMyAIM1
+    async_m1_client = AsyncFlymyAIM1
 
 __all__ = [
     # Prediction clients
     "run",
     "httpx",
     "async_run",
+    "aclose_default_clients",
     "FlyMyAI",
     "AsyncFlyMyAI",
+    "EngineFlyMyAI",
     "FlyMyAIExceptionGroup",
     "FlyMyAIPredictException",
+    "TaskJournal",
+    "Deadline",
+    "ImageOptions",
     # Agent clients
     "AgentClient",
     "AsyncAgentClient",
@@ -29,11 +60,52 @@ __all__ = [
     "SchemaSuggestion",
 ]
 
+# Public names are imported on first access (PEP 562), so that `import flymyai`
+# does not pay for httpx, pydantic and every client up front.
+# name -> (module, attribute path in the module)
+_LAZY_ATTRIBUTES = {
+    "httpx": ("httpx", None),
+    "FlyMyAI": ("flymyai.core.client", "FlyMyAI"),
+    "AsyncFlyMyAI": ("flymyai.core.client", "AsyncFlyMyAI"),
+    "EngineFlyMyAI": ("flymyai.core.client", "EngineFlyMyAI"),
+    "FlyMyAIM1": ("flymyai.core.client", "FlyMyAIM1"),
+    "AsyncFlymyAIM1": ("flymyai.core.client", "AsyncFlymyAIM1"),
+    "FlyMyAIPredictException": ("flymyai.core.exceptions", "FlyMyAIPredictException"),
+    "FlyMyAIExceptionGroup": ("flymyai.core.exceptions", "FlyMyAIExceptionGroup"),
+    "aclose_default_clients": (
+        "flymyai.core.clients.default_clients",
+        "aclose_default_clients",
+    ),
+    "TaskJournal": ("flymyai.core.journal", "TaskJournal"),
+    "Deadline": ("flymyai.utils.deadline", "Deadline"),
+    "ImageOptions": ("flymyai.multipart.images", "ImageOptions"),
+    "AgentClient": ("flymyai.agents", "AgentClient"),
+    "AsyncAgentClient": ("flymyai.agents", "AsyncAgentClient"),
+    "FlyMyAIAgentError": ("flymyai.agents", "FlyMyAIAgentError"),
+    "SchemaSuggestion": ("flymyai.agents", "SchemaSuggestion"),
+    "SuggestSchemaError": ("flymyai.agents", "SuggestSchemaError"),
+    "VariablesValidationError": ("flymyai.agents", "VariablesValidationError"),
+    "client": ("flymyai.core.client", "FlyMyAI"),
+    "async_client": ("flymyai.core.client", "AsyncFlyMyAI"),
+    "engine_client": ("flymyai.core.client", "EngineFlyMyAI"),
+    "run": ("flymyai.core.client", "FlyMyAI.run_predict"),
+    "async_run": ("flymyai.core.client", "AsyncFlyMyAI.arun_predict"),
+    "m1_client": ("flymyai.core.client", "FlyMyAIM1"),
+    "async_m1_client": ("flymyai.core.client", "AsyncFlymyAIM1"),
+}
+
+
+def __getattr__(name: str):
+    try:
+        module_name, path = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = importlib.import_module(module_name)
+    for attribute in path.split(".") if path else ():
+        value = getattr(value, attribute)
+    globals()[name] = value
+    return value
 
-client = FlyMyAI
-async_client = AsyncFlyMyAI
-run = client.run_predict
-async_run = async_client.arun_predict
 
-m1_client = FlyMyAIM1
-async_m1_client = AsyncFlymyAIM1
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
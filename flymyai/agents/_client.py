@@ -5,6 +5,10 @@ from typing import Any, Dict, Optional
 
 import httpx
 
+from flymyai.core.clients import fork_safety
+from flymyai.core.exceptions import RetryTimeoutExceededException
+from flymyai.core.tls import ssl_context
+from flymyai.utils.deadline import Deadline
 from flymyai.agents._resources import (
     Agents,
     AsyncAgents,
@@ -137,6 +141,19 @@ def _raise_for_status(resp: httpx.Response) -> None:
     )
 
 
+def _bounded_timeout(timeout: float, deadline: Deadline) -> httpx.Timeout:
+    """Request timeout that never outlives the deadline of a wait helper."""
+    deadline.check()
+    return httpx.Timeout(min(timeout, deadline.remaining()))
+
+
+def _raise_if_expired(deadline: Optional[Deadline], exc: httpx.TimeoutException):
+    if deadline is not None and deadline.expired:
+        raise RetryTimeoutExceededException(
+            f"Deadline of {deadline.seconds}s exceeded"
+        ) from exc
+
+
 class SyncAgentClient:
     """Synchronous client for the FlyMyAI Agents API.
 
@@ -152,6 +169,8 @@ class SyncAgentClient:
         print(result.output)
     """
 
+    _timeout: float = _DEFAULT_TIMEOUT
+
     def __init__(
         self,
         api_key: Optional[str] = None,
@@ -169,19 +188,41 @@ class SyncAgentClient:
             base_url or os.environ.get(_AGENTS_BASE_URL_ENV) or _DEFAULT_BASE_URL
         )
         self._max_retries = max_retries
-        self._http = httpx.Client(
-            base_url=self._base_url,
-            headers={"X-API-KEY": self._api_key},
-            timeout=httpx.Timeout(timeout),
-        )
+        self._timeout = timeout
+        self._http = self._construct_http()
+        fork_safety.register(self)
 
         self.agents = Agents(self)
         self.runs = Runs(self)
         self.tools = Tools(self)
         self.compilations = Compilations(self)
 
-    def _request(self, method: str, path: str, **kwargs: Any) -> Any:
-        resp = self._http.request(method, path, **kwargs)
+    def _construct_http(self) -> httpx.Client:
+        return httpx.Client(
+            base_url=self._base_url,
+            headers={"X-API-KEY": self._api_key},
+            timeout=httpx.Timeout(self._timeout),
+            verify=ssl_context(http2=False),
+        )
+
+    def _after_fork(self) -> None:
+        """Drop the connections inherited from the parent process."""
+        self._http = fork_safety.LazyClient(self, "_http", self._construct_http)
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        deadline: Optional[Deadline] = None,
+        **kwargs: Any,
+    ) -> Any:
+        if deadline is not None:
+            kwargs["timeout"] = _bounded_timeout(self._timeout, deadline)
+        try:
+            resp = self._http.request(method, path, **kwargs)
+        except httpx.TimeoutException as e:
+            _raise_if_expired(deadline, e)
+            raise
         _raise_for_status(resp)
         if resp.status_code == 204:
             return None
@@ -211,6 +252,8 @@ class AsyncAgentClient:
             print(result.output)
     """
 
+    _timeout: float = _DEFAULT_TIMEOUT
+
     def __init__(
         self,
         api_key: Optional[str] = None,
@@ -228,19 +271,41 @@ class AsyncAgentClient:
             base_url or os.environ.get(_AGENTS_BASE_URL_ENV) or _DEFAULT_BASE_URL
         )
         self._max_retries = max_retries
-        self._http = httpx.AsyncClient(
-            base_url=self._base_url,
-            headers={"X-API-KEY": self._api_key},
-            timeout=httpx.Timeout(timeout),
-        )
+        self._timeout = timeout
+        self._http = self._construct_http()
+        fork_safety.register(self)
 
         self.agents = AsyncAgents(self)
         self.runs = AsyncRuns(self)
         self.tools = AsyncTools(self)
         self.compilations = AsyncCompilations(self)
 
-    async def _request(self, method: str, path: str, **kwargs: Any) -> Any:
-        resp = await self._http.request(method, path, **kwargs)
+    def _construct_http(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=self._base_url,
+            headers={"X-API-KEY": self._api_key},
+            timeout=httpx.Timeout(self._timeout),
+            verify=ssl_context(http2=False),
+        )
+
+    def _after_fork(self) -> None:
+        """Drop the connections inherited from the parent process."""
+        self._http = fork_safety.LazyClient(self, "_http", self._construct_http)
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        deadline: Optional[Deadline] = None,
+        **kwargs: Any,
+    ) -> Any:
+        if deadline is not None:
+            kwargs["timeout"] = _bounded_timeout(self._timeout, deadline)
+        try:
+            resp = await self._http.request(method, path, **kwargs)
+        except httpx.TimeoutException as e:
+            _raise_if_expired(deadline, e)
+            raise
         _raise_for_status(resp)
         if resp.status_code == 204:
             return None
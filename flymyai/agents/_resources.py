@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import asyncio
 import time
-from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
 
 from flymyai.agents._types import (
     Agent,
@@ -16,6 +16,7 @@ from flymyai.agents._types import (
     SchemaSuggestion,
     Tool,
 )
+from flymyai.utils.deadline import Deadline
 
 if TYPE_CHECKING:
     from flymyai.agents._client import AsyncAgentClient, SyncAgentClient
@@ -210,7 +211,7 @@ class Agents:
         self,
         run_id: int,
         *,
-        timeout: float = 300,
+        timeout: Union[float, Deadline] = 300,
         poll_interval: float = 2.0,
     ) -> Compilation:
         """Freeze a run and wait until the compilation is ready.
@@ -219,9 +220,10 @@ class Agents:
         Raises :class:`FlyMyAIAgentError` if the compilation ends in
         ``FAILED`` state.
         """
+        deadline = Deadline.of(timeout)
         comp = self.freeze(run_id)
         comp = self._c.compilations.wait(
-            comp.id, timeout=timeout, poll_interval=poll_interval
+            comp.id, timeout=deadline, poll_interval=poll_interval
         )
         if comp.status == CompilationStatus.FAILED:
             from flymyai.agents._client import FlyMyAIAgentError
@@ -259,7 +261,14 @@ class Runs:
 
     def get(self, run_id: ResourceID) -> RunDetail:
         """Get a single execution with logs."""
-        data = self._c._request("GET", f"/api/v1/agents/executions/{run_id}/")
+        return self._get(run_id)
+
+    def _get(
+        self, run_id: ResourceID, deadline: Optional[Deadline] = None
+    ) -> RunDetail:
+        data = self._c._request(
+            "GET", f"/api/v1/agents/executions/{run_id}/", deadline=deadline
+        )
         return RunDetail(**data)
 
     def cancel(self, run_id: ResourceID) -> None:
@@ -317,8 +326,9 @@ class Runs:
         self,
         run_id: ResourceID,
         *,
-        timeout: float = 300,
+        timeout: Union[float, Deadline] = 300,
         poll_interval: float = 2.0,
+        cancel_on_timeout: bool = False,
     ) -> RunDetail:
         """Poll until the run reaches a terminal status.
 
@@ -327,27 +337,35 @@ class Runs:
         run_id:
             Execution ID.
         timeout:
-            Max seconds to wait before raising ``TimeoutError``.
+            Max seconds (or a :class:`Deadline`) to wait before raising
+            ``TimeoutError``. Every poll request is bounded by what is left.
         poll_interval:
             Seconds between polls.
+        cancel_on_timeout:
+            Cancel the run on the server once ``timeout`` is over.
         """
-        deadline = time.monotonic() + timeout
-        while True:
-            result = self.get(run_id)
-            if result.status in _TERMINAL_STATUSES:
-                return result
-            if time.monotonic() >= deadline:
-                raise TimeoutError(
-                    f"Run {run_id} did not complete within {timeout}s "
-                    f"(last status: {result.status})"
-                )
-            time.sleep(poll_interval)
+        deadline = Deadline.of(timeout)
+        try:
+            while True:
+                result = self._get(run_id, deadline)
+                if result.status in _TERMINAL_STATUSES:
+                    return result
+                if deadline.expired:
+                    raise TimeoutError(
+                        f"Run {run_id} did not complete within {deadline.seconds}s "
+                        f"(last status: {result.status})"
+                    )
+                time.sleep(deadline.sleep_time(poll_interval))
+        except TimeoutError:
+            if cancel_on_timeout:
+                self.cancel(run_id)
+            raise
 
     def stream_events(
         self,
         run_id: ResourceID,
         *,
-        timeout: float = 300,
+        timeout: Union[float, Deadline] = 300,
         poll_interval: float = 1.0,
     ):
         """Yield new :class:`ExecutionLog` entries as they appear.
@@ -356,18 +374,21 @@ class Runs:
         seen yet.  Stops when the run reaches a terminal status.
         """
         seen_ids: set = set()
-        deadline = time.monotonic() + timeout
+        deadline = Deadline.of(timeout)
         while True:
-            detail = self.get(run_id)
+            try:
+                detail = self._get(run_id, deadline)
+            except TimeoutError:
+                return
             for log in detail.logs:
                 if log.id not in seen_ids:
                     seen_ids.add(log.id)
                     yield log
             if detail.status in _TERMINAL_STATUSES:
                 return
-            if time.monotonic() >= deadline:
+            if deadline.expired:
                 return
-            time.sleep(poll_interval)
+            time.sleep(deadline.sleep_time(poll_interval))
 
 
 class Tools:
@@ -442,7 +463,14 @@ class Compilations:
         return [Compilation(**item) for item in data]
 
     def get(self, compilation_id: ResourceID) -> Compilation:
-        data = self._c._request("GET", f"/api/v1/agents/compilations/{compilation_id}/")
+        return self._get(compilation_id)
+
+    def _get(
+        self, compilation_id: ResourceID, deadline: Optional[Deadline] = None
+    ) -> Compilation:
+        data = self._c._request(
+            "GET", f"/api/v1/agents/compilations/{compilation_id}/", deadline=deadline
+        )
         return Compilation(**data)
 
     def update(
@@ -540,34 +568,36 @@ class Compilations:
         compilation_id: int,
         *,
         variables: Optional[Dict[str, Any]] = None,
-        timeout: float = 300,
+        timeout: Union[float, Deadline] = 300,
         poll_interval: float = 2.0,
     ) -> RunDetail:
         """Run an instruction and block until the resulting run finishes."""
+        deadline = Deadline.of(timeout)
         run = self.run_instruction(compilation_id, variables=variables)
-        return self._c.runs.wait(run.id, timeout=timeout, poll_interval=poll_interval)
+        return self._c.runs.wait(run.id, timeout=deadline, poll_interval=poll_interval)
 
     def wait(
         self,
         compilation_id: int,
         *,
-        timeout: float = 300,
+        timeout: Union[float, Deadline] = 300,
         poll_interval: float = 2.0,
     ) -> Compilation:
         """Poll until the compilation leaves the ``compiling`` state."""
-        deadline = time.monotonic() + timeout
+        deadline = Deadline.of(timeout)
         while True:
-            comp = self.get(compilation_id)
+            comp = self._get(compilation_id, deadline)
             if (
                 comp.status != CompilationStatus.COMPILING
                 and comp.status != CompilationStatus.PENDING
             ):
                 return comp
-            if time.monotonic() >= deadline:
+            if deadline.expired:
                 raise TimeoutError(
-                    f"Compilation {compilation_id} still {comp.status} after {timeout}s"
+                    f"Compilation {compilation_id} still {comp.status} after"
+                    f" {deadline.seconds}s"
                 )
-            time.sleep(poll_interval)
+            time.sleep(deadline.sleep_time(poll_interval))
 
 
 class AsyncAgents:
@@ -672,13 +702,14 @@ class AsyncAgents:
         self,
         run_id: int,
         *,
-        timeout: float = 300,
+        timeout: Union[float, Deadline] = 300,
         poll_interval: float = 2.0,
     ) -> Compilation:
         """Async variant of :meth:`Agents.compile_from_run`."""
+        deadline = Deadline.of(timeout)
         comp = await self.freeze(run_id)
         comp = await self._c.compilations.wait(
-            comp.id, timeout=timeout, poll_interval=poll_interval
+            comp.id, timeout=deadline, poll_interval=poll_interval
         )
         if comp.status == CompilationStatus.FAILED:
             from flymyai.agents._client import FlyMyAIAgentError
@@ -711,7 +742,14 @@ class AsyncRuns:
         return [Run(**item) for item in data]
 
     async def get(self, run_id: ResourceID) -> RunDetail:
-        data = await self._c._request("GET", f"/api/v1/agents/executions/{run_id}/")
+        return await self._get(run_id)
+
+    async def _get(
+        self, run_id: ResourceID, deadline: Optional[Deadline] = None
+    ) -> RunDetail:
+        data = await self._c._request(
+            "GET", f"/api/v1/agents/executions/{run_id}/", deadline=deadline
+        )
         return RunDetail(**data)
 
     async def cancel(self, run_id: ResourceID) -> None:
@@ -753,41 +791,50 @@ class AsyncRuns:
         self,
         run_id: ResourceID,
         *,
-        timeout: float = 300,
+        timeout: Union[float, Deadline] = 300,
         poll_interval: float = 2.0,
+        cancel_on_timeout: bool = False,
     ) -> RunDetail:
-        deadline = time.monotonic() + timeout
-        while True:
-            result = await self.get(run_id)
-            if result.status in _TERMINAL_STATUSES:
-                return result
-            if time.monotonic() >= deadline:
-                raise TimeoutError(
-                    f"Run {run_id} did not complete within {timeout}s "
-                    f"(last status: {result.status})"
-                )
-            await asyncio.sleep(poll_interval)
+        deadline = Deadline.of(timeout)
+        try:
+            while True:
+                result = await self._get(run_id, deadline)
+                if result.status in _TERMINAL_STATUSES:
+                    return result
+                if deadline.expired:
+                    raise TimeoutError(
+                        f"Run {run_id} did not complete within {deadline.seconds}s "
+                        f"(last status: {result.status})"
+                    )
+                await asyncio.sleep(deadline.sleep_time(poll_interval))
+        except TimeoutError:
+            if cancel_on_timeout:
+                await self.cancel(run_id)
+            raise
 
     async def stream_events(
         self,
         run_id: ResourceID,
         *,
-        timeout: float = 300,
+        timeout: Union[float, Deadline] = 300,
         poll_interval: float = 1.0,
     ):
         seen_ids: set = set()
-        deadline = time.monotonic() + timeout
+        deadline = Deadline.of(timeout)
         while True:
-            detail = await self.get(run_id)
+            try:
+                detail = await self._get(run_id, deadline)
+            except TimeoutError:
+                return
             for log in detail.logs:
                 if log.id not in seen_ids:
                     seen_ids.add(log.id)
                     yield log
             if detail.status in _TERMINAL_STATUSES:
                 return
-            if time.monotonic() >= deadline:
+            if deadline.expired:
                 return
-            await asyncio.sleep(poll_interval)
+            await asyncio.sleep(deadline.sleep_time(poll_interval))
 
 
 class AsyncTools:
@@ -856,8 +903,13 @@ class AsyncCompilations:
         return [Compilation(**item) for item in data]
 
     async def get(self, compilation_id: ResourceID) -> Compilation:
+        return await self._get(compilation_id)
+
+    async def _get(
+        self, compilation_id: ResourceID, deadline: Optional[Deadline] = None
+    ) -> Compilation:
         data = await self._c._request(
-            "GET", f"/api/v1/agents/compilations/{compilation_id}/"
+            "GET", f"/api/v1/agents/compilations/{compilation_id}/", deadline=deadline
         )
         return Compilation(**data)
 
@@ -928,33 +980,35 @@ class AsyncCompilations:
         compilation_id: int,
         *,
         variables: Optional[Dict[str, Any]] = None,
-        timeout: float = 300,
+        timeout: Union[float, Deadline] = 300,
         poll_interval: float = 2.0,
     ) -> RunDetail:
         """Run an instruction and await the resulting run."""
+        deadline = Deadline.of(timeout)
         run = await self.run_instruction(compilation_id, variables=variables)
         return await self._c.runs.wait(
-            run.id, timeout=timeout, poll_interval=poll_interval
+            run.id, timeout=deadline, poll_interval=poll_interval
         )
 
     async def wait(
         self,
         compilation_id: int,
         *,
-        timeout: float = 300,
+        timeout: Union[float, Deadline] = 300,
         poll_interval: float = 2.0,
     ) -> Compilation:
         """Poll until the compilation leaves the ``compiling`` state."""
-        deadline = time.monotonic() + timeout
+        deadline = Deadline.of(timeout)
         while True:
-            comp = await self.get(compilation_id)
+            comp = await self._get(compilation_id, deadline)
             if (
                 comp.status != CompilationStatus.COMPILING
                 and comp.status != CompilationStatus.PENDING
             ):
                 return comp
-            if time.monotonic() >= deadline:
+            if deadline.expired:
                 raise TimeoutError(
-                    f"Compilation {compilation_id} still {comp.status} after {timeout}s"
+                    f"Compilation {compilation_id} still {comp.status} after"
+                    f" {deadline.seconds}s"
                 )
-            await asyncio.sleep(poll_interval)
+            await asyncio.sleep(deadline.sleep_time(poll_interval))
@@ -6,19 +6,28 @@ from dataclasses import dataclass
 import httpx
 
 
+_NOT_PARSED = object()
+
+
 class FlyMyAIResponse(httpx.Response):
     is_event: bool = False
+    # parsed body, when the response is built from an already parsed event
+    _json: typing.Any = _NOT_PARSED
 
     @classmethod
     def from_httpx(cls, response: httpx.Response):
-        return cls(
+        copy = cls(
             status_code=response.status_code,
             content=response.content,
             request=response.request,
             headers=response.headers,
         )
+        copy._json = getattr(response, "_json", _NOT_PARSED)
+        return copy
 
     def json(self, **kwargs) -> typing.Any:
+        if self._json is not _NOT_PARSED and not kwargs:
+            return self._json
         if self.content.startswith(b"data"):
             return json.loads(self.content.removeprefix(b"data"))
         elif self.content.startswith(b"event"):
@@ -2,19 +2,27 @@
 from __future__ import annotations
 
 import json
-from typing import Any, Iterator, AsyncIterator
+from typing import TYPE_CHECKING, Any, Iterator, AsyncIterator
 
 from typing_extensions import override
 
+from flymyai.core.incremental_json import PushJSONParser
+
+if TYPE_CHECKING:
+    import httpx
+
 
 class SSEException(Exception): ...
 
 
+_NOT_PARSED = object()
+
+
 class ServerSentEvent:
     _headers: dict[str, str]
     _url: str
 
-    __jsoned: Any
+    _json: Any = _NOT_PARSED
 
     def __init__(
         self,
@@ -48,14 +56,27 @@ class ServerSentEvent:
     def data(self) -> str:
         return self._data
 
+    @property
+    def json_text(self) -> str:
+        """
+        The JSON document carried by the event: its event field if set, else its data
+        """
+        return self.event or self.data
+
     def json(self) -> Any:
-        if hasattr(self, "__jsoned"):
-            return self.__jsoned
-        if self.data:
-            self.__jsoned = json.loads(self.data.strip())
-        if self.event:
-            self.__jsoned = json.loads(self.event.strip())
-        return self.__jsoned
+        """
+        Parsed json_text, parsed once
+        """
+        if self._json is _NOT_PARSED:
+            text = self.json_text
+            self._json = json.loads(text) if text else None
+        return self._json
+
+    def set_json(self, value: Any) -> None:
+        """
+        Provide json() parsed elsewhere (e.g. in an executor)
+        """
+        self._json = value
 
     @property
     def headers(self):
@@ -123,6 +144,16 @@ class SSEDecoder:
             if sse is not None:
                 yield sse
 
+    def iter_response(self, response: httpx.Response) -> Iterator[ServerSentEvent]:
+        """Iterate over the events of a streamed response"""
+        return self.iter(response.iter_lines())
+
+    def aiter_response(
+        self, response: httpx.Response
+    ) -> AsyncIterator[ServerSentEvent]:
+        """Iterate over the events of a streamed response"""
+        return self.aiter(response.aiter_lines())
+
     def decode(self, line: str) -> ServerSentEvent | None:
         # See: https://html.spec.whatwg.org/multipage/server-sent-events.html#event-stream-interpretation  # noqa: E501
 
@@ -152,10 +183,14 @@ class SSEDecoder:
         if line.startswith(":"):
             return None
 
-        fieldname, _, value = line.partition(":")
-
-        if value.startswith(" "):
-            value = value[1:]
+        # slice the value once: data lines can carry megabytes of base64
+        colon = line.find(":")
+        if colon == -1:
+            fieldname, value = line, ""
+        else:
+            fieldname = line[:colon]
+            start = colon + 2 if line.startswith(" ", colon + 1) else colon + 1
+            value = line[start:]
 
         if fieldname == "event":
             self._event = value
@@ -175,3 +210,118 @@ class SSEDecoder:
             pass  # the field is ignored.
 
         return None
+
+
+class SpillingSSEDecoder(SSEDecoder):
+    """
+    SSEDecoder that parses data fields while they arrive, without building
+    their lines, see PushJSONParser.
+    Events carry their parsed JSON (ServerSentEvent.json()) and no data text;
+    large string values in it are SpilledString handles
+    """
+
+    def __init__(self, spill_threshold: int, spill_dir: str | None = None) -> None:
+        super().__init__()
+        self.spill_threshold = spill_threshold
+        self.spill_dir = spill_dir
+        self._line = ""
+        self._parser: PushJSONParser | None = None
+        self._in_data = False
+        self._skip_space = False
+        self._skip_lf = False
+
+    def iter_response(self, response: httpx.Response) -> Iterator[ServerSentEvent]:
+        try:
+            for chunk in response.iter_text():
+                yield from self._decode_chunk(chunk)
+        finally:
+            self._abort()
+
+    async def aiter_response(
+        self, response: httpx.Response
+    ) -> AsyncIterator[ServerSentEvent]:
+        try:
+            async for chunk in response.aiter_text():
+                for sse in self._decode_chunk(chunk):
+                    yield sse
+        finally:
+            self._abort()
+
+    def _abort(self) -> None:
+        """
+        Remove the spill file of an event cut short (stream closed early,
+        broken or not JSON)
+        """
+        if self._parser is not None:
+            self._parser.abort()
+            self._parser = None
+
+    def _feed_data(self, text: str) -> None:
+        if self._skip_space and text:
+            self._skip_space = False
+            if text[0] == " ":
+                text = text[1:]
+        if text:
+            self._parser.feed(text)
+
+    def _start_data_line(self, value: str) -> None:
+        if self._parser is None:
+            self._parser = PushJSONParser(self.spill_threshold, self.spill_dir)
+        else:
+            # data lines of an event are joined with newlines
+            self._parser.feed("\n")
+        self._in_data = True
+        self._skip_space = True
+        self._feed_data(value)
+
+    def _end_line(self) -> ServerSentEvent | None:
+        if self._in_data:
+            self._in_data = False
+            return None
+        line, self._line = self._line, ""
+        if line or self._parser is None:
+            return self.decode(line)
+        sse = ServerSentEvent(
+            event=self._event, id=self._last_event_id, retry=self._retry
+        )
+        data = self._parser.close()
+        if not self._event:
+            # like ServerSentEvent.json_text: the event field wins
+            sse.set_json(data)
+        self._parser = None
+        self._event = None
+        self._data = []
+        self._retry = None
+        return sse
+
+    def _decode_chunk(self, chunk: str) -> list[ServerSentEvent]:
+        events = []
+        pos, size = 0, len(chunk)
+        if self._skip_lf and chunk.startswith("\n"):
+            pos = 1
+        self._skip_lf = False
+        while pos < size:
+            end = chunk.find("\n", pos)
+            carriage_return = chunk.find("\r", pos, size if end == -1 else end)
+            if carriage_return != -1:
+                end = carriage_return
+            segment = chunk[pos : size if end == -1 else end]
+            if self._in_data:
+                self._feed_data(segment)
+            else:
+                self._line += segment
+                if self._line.startswith("data:"):
+                    value, self._line = self._line[len("data:") :], ""
+                    self._start_data_line(value)
+            if end == -1:
+                break
+            sse = self._end_line()
+            if sse is not None:
+                events.append(sse)
+            pos = end + 1
+            if chunk[end] == "\r":
+                if pos < size and chunk[pos] == "\n":
+                    pos += 1
+                elif pos == size:
+                    self._skip_lf = True
+        return events
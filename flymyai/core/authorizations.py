@@ -1,5 +1,5 @@
-import copy
 import dataclasses
+from functools import cached_property, lru_cache
 from typing import Optional
 
 import httpx
@@ -29,60 +29,68 @@ class ClientInfo:
         raise NotImplemented
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True)
 class APIKeyClientInfo(ClientInfo):
     """
     Encapsulates information about a project.
-    Uses X-API-KEY header to perform an auth
+    Uses X-API-KEY header to perform an auth.
+    Immutable: paths and headers are built once per instance
+    and instances are shared, see copy_for_model
     """
 
     apikey: str
     username: Optional[str] = None
     project_name: Optional[str] = None
 
-    @property
+    @cached_property
     def authorization_headers(self):
         return {"X-API-KEY": self.apikey}
 
-    @property
+    @cached_property
     def _project_path(self):
         return httpx.URL(f"/api/v1/{self.username}/{self.project_name}/")
 
-    @property
+    @cached_property
     def prediction_path(self):
         return self._project_path.join(httpx.URL("predict"))
 
-    @property
+    @cached_property
     def prediction_async_path(self):
         return self._project_path.join(httpx.URL("predict/async/"))
 
-    @property
+    @cached_property
     def prediction_result_path(self):
         return self._project_path.join(httpx.URL("predict/async/result/"))
 
-    @property
+    @cached_property
     def prediction_cancel_path(self):
         return self._project_path.join(httpx.URL("predict/cancel/"))
 
-    @property
+    @cached_property
     def prediction_stream_path(self):
         return self._project_path.join(httpx.URL("predict/stream/"))
 
-    @property
+    @cached_property
     def openapi_schema_path(self):
         return self._project_path.join(httpx.URL("openapi.json"))
 
-    def copy_for_model(self, model: str):
-        copied = copy.deepcopy(self)
-        if not model:
-            raise ImproperlyConfiguredClientException(
-                "model should be provided as <owner username>/<model>"
-            )
-        split_info = model.split("/")
-        if len(split_info) != 2:
-            raise ImproperlyConfiguredClientException(
-                "model should be provided as <owner username>/<model>"
-            )
-        copied.username = split_info[0]
-        copied.project_name = split_info[1]
-        return copied
+    def copy_for_model(self, model: str) -> "APIKeyClientInfo":
+        """
+        Route of the model for this apikey.
+        Interned: the same apikey and model always give the same instance
+        """
+        return _route(self.apikey, model)
+
+
+@lru_cache(maxsize=4096)
+def _route(apikey: str, model: str) -> APIKeyClientInfo:
+    if not model:
+        raise ImproperlyConfiguredClientException(
+            "model should be provided as <owner username>/<model>"
+        )
+    split_info = model.split("/")
+    if len(split_info) != 2:
+        raise ImproperlyConfiguredClientException(
+            "model should be provided as <owner username>/<model>"
+        )
+    return APIKeyClientInfo(apikey, split_info[0], split_info[1])
@@ -1,5 +1,6 @@
 from flymyai.core.clients.AsyncClient import BaseAsyncClient
 from flymyai.core.clients.SyncClient import BaseSyncClient
+from flymyai.core.clients.EngineClient import BaseEngineClient
 from flymyai.core.clients.m1Client import BaseM1SyncClient
 from flymyai.core.clients.m1AsyncClient import BaseM1AsyncClient
 
@@ -10,6 +11,9 @@ class FlyMyAI(BaseSyncClient): ...
 class AsyncFlyMyAI(BaseAsyncClient): ...
 
 
+class EngineFlyMyAI(BaseEngineClient): ...
+
+
 class FlyMyAIM1(BaseM1SyncClient): ...
 
 
@@ -1,79 +1,220 @@
+import asyncio
 import os
-from typing import Optional, Callable, AsyncContextManager, Awaitable
+from typing import (
+    Optional,
+    Callable,
+    AsyncContextManager,
+    Awaitable,
+    Iterable,
+    AsyncIterator,
+    List,
+    Tuple,
+    Union,
+)
 
 import httpx
 
 from flymyai.core.response_factory.plain_inference_response_factory import (
     SSEInferenceResponseFactory,
 )
-from flymyai.core._streaming import SSEDecoder
+from flymyai.core._streaming import SSEDecoder, ServerSentEvent
 from flymyai.core.authorizations import APIKeyClientInfo
+from flymyai.core.clients.recovery import _aclose_quietly
+from flymyai.core.clients import preflight
+from flymyai.core.clients.default_clients import async_default_client
 from flymyai.core.clients.base_client import (
     BaseClient,
     _predict_timeout,
     _http2,
     _limits,
+    _multi_connection_transport,
     _is_reconnectable_error,
     _RECONNECT_RETRIES,
+    _stream_id_of,
+    _PredictionHandle,
+    _request_timeout,
+    _deadline_exceeded,
+    _KEEPALIVE_INTERVAL,
+    _WARMUP_PATH,
+    _warmup_timeout,
+    logger,
 )
+from flymyai.core import offload
+from flymyai.core._response import FlyMyAIResponse
 from flymyai.core.exceptions import (
     BaseFlyMyAIException,
     FlyMyAIOpenAPIException,
     FlyMyAIPredictException,
     FlyMyAIExceptionGroup,
     FlyMyAIAsyncTaskException,
+    RetryTimeoutExceededException,
 )
 from flymyai.core.models.successful_responses import (
     OpenAPISchemaResponse,
     PredictionResponse,
     AsyncPredictionTask,
+    AsyncPredictionResponseList,
+)
+from flymyai.core.stream_iterators.AsyncMultiPredictionStream import (
+    AsyncMultiPredictionStream,
 )
 from flymyai.core.stream_iterators.AsyncPredictionStream import AsyncPredictionStream
+from flymyai.core.task_pollers.AsyncTaskPoller import AsyncTaskPoller
+from flymyai.core.tls import ssl_context
+from flymyai.core.transports import AsyncMultiConnectionTransport
 from flymyai.multipart import MultipartPayload
+from flymyai.utils.deadline import Deadline
 from flymyai.utils.utils import aretryable_callback
 
 
+async def _parse_large_event(sse: ServerSentEvent) -> None:
+    """
+    Parse the JSON of a large event off the event loop, see flymyai.core.offload
+    """
+    text = sse.json_text
+    if offload.should_offload(len(text)):
+        sse.set_json(await offload.loads(text))
+
+
+async def _parse_large_response(response: httpx.Response) -> httpx.Response:
+    """
+    Parse the JSON body of a large successful response off the event loop
+    """
+    if response.status_code >= 400 or not offload.should_offload(len(response.content)):
+        return response
+    parsed = FlyMyAIResponse.from_httpx(response)
+    parsed._json = await offload.loads(response.content)
+    return parsed
+
+
 class BaseAsyncClient(BaseClient[httpx.AsyncClient]):
     def _construct_client(self):
         return httpx.AsyncClient(
             http2=_http2,
+            verify=ssl_context(http2=_http2),
             limits=_limits,
-            headers=self.client_info.authorization_headers,
+            headers=self._default_headers(),
             base_url=os.getenv("FLYMYAI_DSN", "https://api.flymy.ai/"),
             timeout=_predict_timeout,
+            transport=_multi_connection_transport(AsyncMultiConnectionTransport),
         )
 
-    async def _reconnect_client(self):
-        if hasattr(self, "_client"):
-            try:
-                await self._client.aclose()
-            except Exception:
-                pass
-        self._client = self._construct_client()
+    async def _reconnect_client(self, generation: Optional[int] = None):
+        """
+        Rebuild the HTTP client after a connection failure, see ConnectionRecovery
+        :param generation: generation the failed request ran on
+        """
+        await _aclose_quietly(self._recovery.rebuild(self, generation))
 
-    async def _awith_reconnect(self, fn):
-        last_exc = None
+    async def _awith_reconnect(self, fn, deadline: Optional[Deadline] = None):
         for attempt in range(1 + _RECONNECT_RETRIES):
-            try:
-                return await fn()
-            except BaseException as e:
-                last_exc = e
-                if not _is_reconnectable_error(e):
-                    raise
-                if attempt < _RECONNECT_RETRIES:
-                    await self._reconnect_client()
-                    continue
-                raise
-        assert last_exc is not None
-        raise last_exc
+            if deadline is not None:
+                deadline.check()
+            async with self._recovery.arequest() as generation:
+                try:
+                    return await fn()
+                except BaseException as e:
+                    if not _is_reconnectable_error(e) or attempt == _RECONNECT_RETRIES:
+                        raise
+            await self._reconnect_client(generation)
 
     async def __aenter__(self):
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop_keepalive()
+        await self._wait_background_tasks()
         if hasattr(self, "_client"):
             await self._client.aclose()
 
+    async def _ping(self) -> bool:
+        """
+        Cheap request opening (or checking) a pooled connection.
+        A dead connection gets the HTTP client rebuilt
+        :return: whether the request went through
+        """
+        async with self._recovery.arequest() as generation:
+            try:
+                await self._client.head(_WARMUP_PATH, timeout=_warmup_timeout)
+                return True
+            except Exception as e:
+                logger.debug("FlyMyAI warmup request failed: %r", e)
+                dead = _is_reconnectable_error(e)
+        if dead:
+            await self._reconnect_client(generation)
+        return False
+
+    async def _ping_many(self, connections: int) -> int:
+        return sum(await asyncio.gather(*(self._ping() for _ in range(connections))))
+
+    async def warmup(self, connections: int = 1, keepalive: bool = False) -> int:
+        """
+        Open connections ahead of traffic, so the first prediction
+        does not pay for DNS, TCP, TLS and HTTP/2 setup.
+        Concurrent requests open one connection each over HTTP/1.1;
+        HTTP/2 multiplexes them over a single connection unless
+        FMA_HTTP2_CONNECTIONS is set
+        :param connections: how many requests to make concurrently
+        :param keepalive: keep the connections open with start_keepalive()
+        :return: how many of the requests went through
+        """
+        self._warm_connections = connections
+        opened = await self._ping_many(connections)
+        if opened < connections:
+            # failed requests may have rebuilt the client: warm the new one
+            opened += await self._ping_many(connections - opened)
+        if keepalive:
+            self.start_keepalive()
+        return opened
+
+    def start_keepalive(self, interval: float = _KEEPALIVE_INTERVAL):
+        """
+        Repeat warmup() every `interval` seconds in a background task,
+        so idle connections are not dropped and dead ones are replaced
+        before a user request lands on them. Stopped by close()
+        """
+        if self._keepalive is None:
+            self._keepalive = asyncio.ensure_future(self._keepalive_loop(interval))
+
+    async def stop_keepalive(self):
+        task, self._keepalive = self._keepalive, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _keepalive_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.warmup(self._warm_connections)
+            except Exception:
+                logger.warning("FlyMyAI keepalive failed", exc_info=True)
+
+    def _cancel_in_background(
+        self, prediction_id: Optional[str], client_info: APIKeyClientInfo
+    ):
+        """
+        Ask the server to cancel a prediction nobody is waiting for anymore.
+        Used when the awaiting task is cancelled, so the request runs in a new task
+        """
+        if not prediction_id:
+            return
+        task = asyncio.ensure_future(self._cancel_quietly(prediction_id, client_info))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _cancel_quietly(self, prediction_id: str, client_info: APIKeyClientInfo):
+        try:
+            await self.cancel_prediction(prediction_id, client_info=client_info)
+        except Exception:
+            logger.warning(
+                "Failed to cancel abandoned prediction %s", prediction_id, exc_info=True
+            )
+
+    async def _wait_background_tasks(self):
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+
     async def openapi_schema(self, model: Optional[str] = None, max_retries=None):
         """
         :param max_retries: retries before giving up
@@ -131,43 +272,110 @@ class BaseAsyncClient(BaseClient[httpx.AsyncClient]):
 
     @classmethod
     async def _sse_instant(
-        cls, async_response_stream: Callable[[], AsyncContextManager[httpx.Response]]
+        cls,
+        async_response_stream: Callable[[], AsyncContextManager[httpx.Response]],
+        prediction: Optional[_PredictionHandle] = None,
+        decoder: Optional[SSEDecoder] = None,
     ):
         """
         A non-blocking approach to fetch a response stream
         :param async_response_stream: context manager with underlying stream
+        :param prediction: receives the prediction_id announced by the server
+        :param decoder: SSEDecoder of the client
         :return: FlyMyAIResponse
         """
         async with async_response_stream() as stream:
-            sse = await SSEDecoder().aiter(stream.aiter_lines()).__anext__()
-            try:
-                response = SSEInferenceResponseFactory(
-                    sse=sse, httpx_request=stream.request, httpx_response=stream
-                ).construct()
-                return response
-            except BaseFlyMyAIException as e:
-                raise FlyMyAIPredictException.from_base_exception(e)
+            async for sse in (decoder or SSEDecoder()).aiter_response(stream):
+                await _parse_large_event(sse)
+                try:
+                    response = SSEInferenceResponseFactory(
+                        sse=sse, httpx_request=stream.request, httpx_response=stream
+                    ).construct()
+                except BaseFlyMyAIException as e:
+                    raise FlyMyAIPredictException.from_base_exception(e)
+                if not response.is_event:
+                    return response
+                if prediction is not None:
+                    prediction.set(_stream_id_of(response))
+        raise FlyMyAIPredictException("Prediction stream ended without a result")
+
+    async def _preflight(
+        self,
+        client_info: APIKeyClientInfo,
+        payload: MultipartPayload,
+        deadline: Optional[Deadline] = None,
+    ):
+        """
+        Check the key and model before uploading a large payload;
+        the payload itself is not validated, see flymyai.core.clients.preflight
+        """
+        await payload.apreprocess()
+        if not preflight.needed(client_info, await payload.asize()):
+            return
+
+        async def check():
+            async with self._client.stream(
+                "get",
+                client_info.openapi_schema_path,
+                headers=client_info.authorization_headers,
+                timeout=_request_timeout(deadline),
+            ) as response:
+                if response.status_code >= 400:
+                    await response.aread()
+                return preflight.rejection(client_info, response)
+
+        rejection = await self._awith_reconnect(check, deadline)
+        if rejection is not None:
+            raise rejection
 
-    async def _predict(self, client_info, payload: MultipartPayload):
+    async def _predict(
+        self,
+        client_info,
+        payload: MultipartPayload,
+        deadline: Optional[Deadline] = None,
+    ):
         """
-        Executes request and waits for sse data
+        Executes request and waits for sse data.
+        If the caller stops waiting (task cancelled, deadline or read timeout),
+        the prediction is cancelled on the server as well
         :param payload: model input data
         :return: FlyMyAIResponse or raise an exception
         """
-        return await self._awith_reconnect(
-            lambda: self._sse_instant(
-                lambda: self._client.stream(
-                    method="post",
-                    url=client_info.prediction_path,
-                    timeout=_predict_timeout,
-                    **payload.serialize(),
-                    headers=client_info.authorization_headers,
-                )
+        await self._preflight(client_info, payload, deadline)
+        prediction = _PredictionHandle()
+        body = await payload.aserialize(client_info.authorization_headers)
+        try:
+            return await self._awith_reconnect(
+                lambda: self._sse_instant(
+                    lambda: self._client.stream(
+                        method="post",
+                        url=client_info.prediction_path,
+                        timeout=_request_timeout(deadline),
+                        **body,
+                    ),
+                    prediction,
+                    self._sse_decoder(),
+                ),
+                deadline,
             )
-        )
+        except (
+            asyncio.CancelledError,
+            httpx.TimeoutException,
+            RetryTimeoutExceededException,
+        ) as e:
+            self._cancel_in_background(prediction.prediction_id, client_info)
+            if _deadline_exceeded(e, deadline):
+                raise RetryTimeoutExceededException(
+                    f"Deadline of {deadline.seconds}s exceeded"
+                ) from e
+            raise
 
     async def predict(
-        self, payload: dict, model: Optional[str] = None, max_retries=None
+        self,
+        payload: dict,
+        model: Optional[str] = None,
+        max_retries=None,
+        deadline: Union[None, float, Deadline] = None,
     ) -> PredictionResponse:
         """
         Wrap predict method in sse.
@@ -175,110 +383,233 @@ class BaseAsyncClient(BaseClient[httpx.AsyncClient]):
         :param model: flymyai/bert
         :param payload: anything for model
         :param max_retries: retries
+        :param deadline: seconds (or a Deadline) for the whole call, retries included;
+                the prediction is cancelled and RetryTimeoutExceededException raised once it is over
         :return: PredictionResponse(exc_history, output_data, response):
                 exc_history - list of exception history during prediction
                 output_data - dict with prediction output
         """
-        payload = MultipartPayload(input_data=payload)
+        deadline = Deadline.of(deadline)
+        payload = MultipartPayload(
+            payload, self._image_options(self.amend_client_info(model))
+        )
         history, response = await aretryable_callback(
-            lambda: self._predict(self.amend_client_info(model), payload),
+            lambda: self._predict(self.amend_client_info(model), payload, deadline),
             max_retries or self.max_retries,
             FlyMyAIPredictException,
             FlyMyAIExceptionGroup,
+            deadline and deadline.remaining(),
+        )
+        return PredictionResponse.from_response(
+            response, exc_history=history, upload_bytes_saved=payload.bytes_saved
         )
-        return PredictionResponse.from_response(response, exc_history=history)
 
     async def predict_async_task(
-        self, payload: dict, model: Optional[str] = None, max_retries=None
+        self,
+        payload: dict,
+        model: Optional[str] = None,
+        max_retries=None,
+        deadline: Union[None, float, Deadline] = None,
+        dedupe: bool = False,
     ) -> AsyncPredictionTask:
-        payload = MultipartPayload(input_data=payload)
+        """
+        Submit a prediction to run in the background
+        :param dedupe: with a journal, return the unfinished task of an identical
+            payload (same model) instead of submitting it again. Off by default:
+            non-deterministic models give a new result for every submission
+        """
+        deadline = Deadline.of(deadline)
         client_info = self.amend_client_info(model)
+        payload_digest = None
+        if self.journal is not None:
+            # hashes the content of file inputs
+            payload_digest = await asyncio.get_running_loop().run_in_executor(
+                None, self._journal_digest, payload
+            )
+        if dedupe:
+            pending_task = self._journal_pending_task(payload_digest, client_info)
+            if pending_task is not None:
+                return pending_task
+        payload = MultipartPayload(payload, self._image_options(client_info))
         try:
+            await self._preflight(client_info, payload, deadline)
+            body = await payload.aserialize()
             _, response = await aretryable_callback(
                 lambda: self._awith_reconnect(
                     lambda: self._client.post(
-                        client_info.prediction_async_path, **payload.serialize()
-                    )
+                        client_info.prediction_async_path,
+                        **body,
+                        timeout=_request_timeout(deadline),
+                    ),
+                    deadline,
                 ),
                 max_retries or self.max_retries,
                 FlyMyAIAsyncTaskException,
                 FlyMyAIExceptionGroup,
+                deadline and deadline.remaining(),
             )
             response = SSEInferenceResponseFactory(response).construct()
-            return self._async_prediction_task_construct(response, client_info)
+            prediction_task = self._async_prediction_task_construct(
+                response, client_info
+            )
+            self._journal_record(prediction_task, payload_digest, client_info)
+            return prediction_task
         except BaseFlyMyAIException as e:
             raise FlyMyAIAsyncTaskException.from_base_exception(e)
 
-    async def prediction_task_result(
-        self, prediction_task: AsyncPredictionTask, timeout: Optional[float] = None
+    async def _prediction_task_check(
+        self,
+        prediction_task: AsyncPredictionTask,
+        deadline: Optional[Deadline] = None,
     ):
-        prediction_id = prediction_task.prediction_id
-
-        async def get_res():
-            data_resp = await self._awith_reconnect(
-                lambda: self._client.get(
-                    url=(
-                        prediction_task.client_info or self.client_info
-                    ).prediction_result_path,
-                    params={"request_id": prediction_id},
-                )
-            )
-            return self._construct_task_result(data_resp)
+        """
+        Single request for the result of an async prediction task
+        """
+        data_resp = await self._awith_reconnect(
+            lambda: self._client.get(
+                url=(
+                    prediction_task.client_info or self.client_info
+                ).prediction_result_path,
+                params={"request_id": prediction_task.prediction_id},
+                timeout=_request_timeout(deadline),
+            ),
+            deadline,
+        )
+        data_resp = await _parse_large_response(data_resp)
+        return self._task_result_from_response(prediction_task, data_resp)
 
+    async def prediction_task_result(
+        self,
+        prediction_task: AsyncPredictionTask,
+        timeout: Union[None, float, Deadline] = None,
+    ):
+        """
+        Poll the result of an async prediction task
+        :param timeout: seconds (or a Deadline) for all the polls together
+        """
+        deadline = Deadline.of(timeout)
         _, res = await aretryable_callback(
-            lambda: get_res(),
+            lambda: self._prediction_task_check(prediction_task, deadline),
             None,
             FlyMyAIAsyncTaskException,
             FlyMyAIExceptionGroup,
-            timeout,
+            deadline and deadline.remaining(),
             0.5,
         )
         return res
 
-    async def _stream(self, client_info: APIKeyClientInfo, payload: dict):
-        payload = MultipartPayload(payload)
-        try:
-            stream_iterator = self._stream_iterator(
-                client_info, payload, is_long_stream=True
-            )
-            decoder = SSEDecoder()
-            async with stream_iterator as sse_stream:
-                async for sse_partial in decoder.aiter(sse_stream.aiter_lines()):
-                    try:
-                        response = SSEInferenceResponseFactory(
-                            sse=sse_partial,
-                            httpx_request=sse_stream.request,
-                            httpx_response=sse_stream,
-                        ).construct()
-                    except BaseFlyMyAIException as e:
-                        raise FlyMyAIPredictException.from_base_exception(e)
-                    yield response
-        except BaseException as e:
-            if not _is_reconnectable_error(e):
-                raise
-            await self._reconnect_client()
-            stream_iterator = self._stream_iterator(
-                client_info, payload, is_long_stream=True
-            )
-            decoder = SSEDecoder()
-            async with stream_iterator as sse_stream:
-                async for sse_partial in decoder.aiter(sse_stream.aiter_lines()):
-                    try:
-                        response = SSEInferenceResponseFactory(
-                            sse=sse_partial,
-                            httpx_request=sse_stream.request,
-                            httpx_response=sse_stream,
-                        ).construct()
-                    except BaseFlyMyAIException as e:
-                        raise FlyMyAIPredictException.from_base_exception(e)
-                    yield response
-
-    def stream(self, payload: dict, model: Optional[str] = None, max_retries=None):
+    def as_completed(
+        self,
+        tasks: Iterable[AsyncPredictionTask],
+        timeout: Union[None, float, Deadline] = None,
+        return_exceptions: bool = False,
+    ) -> AsyncIterator[Tuple[AsyncPredictionTask, AsyncPredictionResponseList]]:
+        """
+        Poll many async prediction tasks at once, see AsyncTaskPoller
+        :return: async iterator over (task, result) in order of completion
+        """
+        return AsyncTaskPoller().as_completed(tasks, timeout, return_exceptions)
+
+    async def wait_all(
+        self,
+        tasks: Iterable[AsyncPredictionTask],
+        timeout: Union[None, float, Deadline] = None,
+        return_exceptions: bool = False,
+    ) -> List[AsyncPredictionResponseList]:
+        """
+        Poll many async prediction tasks at once, see AsyncTaskPoller
+        :return: results in order of tasks
+        """
+        return await AsyncTaskPoller().wait_all(tasks, timeout, return_exceptions)
+
+    async def _stream_attempt(
+        self,
+        client_info: APIKeyClientInfo,
+        payload: MultipartPayload,
+        deadline: Optional[Deadline] = None,
+    ):
+        await self._preflight(client_info, payload, deadline)
+        stream_iterator = self._stream_iterator(
+            client_info,
+            payload,
+            is_long_stream=True,
+            deadline=deadline,
+            body=await payload.aserialize(client_info.authorization_headers),
+        )
+        decoder = self._sse_decoder()
+        async with stream_iterator as sse_stream:
+            async for sse_partial in decoder.aiter_response(sse_stream):
+                await _parse_large_event(sse_partial)
+                try:
+                    response = SSEInferenceResponseFactory(
+                        sse=sse_partial,
+                        httpx_request=sse_stream.request,
+                        httpx_response=sse_stream,
+                    ).construct()
+                except BaseFlyMyAIException as e:
+                    raise FlyMyAIPredictException.from_base_exception(e)
+                yield response
+
+    async def _stream(
+        self,
+        client_info: APIKeyClientInfo,
+        payload: dict,
+        deadline: Optional[Deadline] = None,
+    ):
+        payload = MultipartPayload(payload, self._image_options(client_info))
+        for attempt in range(2):
+            async with self._recovery.arequest() as generation:
+                responses = self._stream_attempt(client_info, payload, deadline)
+                try:
+                    async for response in responses:
+                        yield response
+                    return
+                except BaseException as e:
+                    if attempt or not _is_reconnectable_error(e):
+                        raise
+                finally:
+                    # closes the HTTP stream right away when the consumer stops early
+                    await responses.aclose()
+            await self._reconnect_client(generation)
+
+    def stream(
+        self,
+        payload: dict,
+        model: Optional[str] = None,
+        max_retries=None,
+        deadline: Union[None, float, Deadline] = None,
+    ):
+        """
+        :param deadline: seconds (or a Deadline) for the whole stream; once it is over
+                the prediction is cancelled and RetryTimeoutExceededException raised
+        """
+        deadline = Deadline.of(deadline)
         full_client_info = self.amend_client_info(model)
-        stream_iter = self._stream(full_client_info, payload)
-        stream_wrapper = AsyncPredictionStream(stream_iter, self, full_client_info)
+        stream_iter = self._stream(full_client_info, payload, deadline)
+        stream_wrapper = AsyncPredictionStream(
+            stream_iter, self, full_client_info, deadline=deadline
+        )
         return stream_wrapper
 
+    def stream_many(
+        self,
+        payloads: Iterable[dict],
+        model: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        return_exceptions: bool = False,
+    ) -> AsyncMultiPredictionStream:
+        """
+        Run several streams over the shared connection pool and merge them.
+        :param payloads: model inputs, one stream per payload
+        :param model: flymyai/bert
+        :param concurrency: max number of streams open at once (all by default)
+        :param return_exceptions: yield (index, exception) instead of raising
+        :return: AsyncMultiPredictionStream yielding (index, PredictionPartial)
+        """
+        return AsyncMultiPredictionStream(
+            self, payloads, model, concurrency, return_exceptions
+        )
+
     @staticmethod
     async def _wrap_request(request_callback: Callable[..., Awaitable[httpx.Response]]):
         """
@@ -291,6 +622,8 @@ class BaseAsyncClient(BaseClient[httpx.AsyncClient]):
         """
         Close the client
         """
+        await self.stop_keepalive()
+        await self._wait_background_tasks()
         await self._client.aclose()
 
     @classmethod
@@ -303,6 +636,8 @@ class BaseAsyncClient(BaseClient[httpx.AsyncClient]):
         :return: PredictionResponse(exc_history, output_data, response)
                 exc_history - list of exception history during prediction
                 output_data - dict with prediction output
+        Runs on the default client of the apikey and event loop,
+        which keeps its connections between calls until
+        flymyai.aclose_default_clients() is awaited, see async_default_client
         """
-        async with cls(apikey, model) as client:
-            return await client.predict(payload)
+        return await async_default_client(cls, apikey).predict(payload, model)
@@ -0,0 +1,189 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from flymyai.core.authorizations import APIKeyClientInfo
+from flymyai.core.clients.AsyncClient import BaseAsyncClient
+from flymyai.core.clients.base_client import DEFAULT_RETRY_COUNT
+from flymyai.core.clients.default_clients import default_client
+from flymyai.core.engine import get_engine
+from flymyai.core.journal import TaskJournal
+from flymyai.core.models.successful_responses import (
+    AsyncPredictionResponseList,
+    AsyncPredictionTask,
+    OpenAPISchemaResponse,
+    PredictionResponse,
+)
+from flymyai.core.stream_iterators.EnginePredictionStream import (
+    EnginePredictionStream,
+)
+from flymyai.multipart.images import ImageOptions
+from flymyai.utils.deadline import Deadline
+
+
+class BaseEngineClient:
+    """
+    Sync client running an AsyncFlyMyAI on the background AsyncEngine.
+    Calls block the calling thread only: any number of threads share one event loop
+    and its multiplexed HTTP/2 connections, instead of a thread per request.
+    Same API as FlyMyAI
+    """
+
+    _async_client: BaseAsyncClient
+
+    def __init__(
+        self,
+        apikey: str,
+        model: Optional[str] = None,
+        max_retries=DEFAULT_RETRY_COUNT,
+        journal: Optional[TaskJournal] = None,
+        spill_threshold: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+        image_options: Union[None, ImageOptions, Dict[str, ImageOptions]] = None,
+    ):
+        self._async_client = BaseAsyncClient(
+            apikey,
+            model,
+            max_retries,
+            journal,
+            spill_threshold,
+            spill_dir,
+            image_options,
+        )
+
+    @property
+    def client_info(self) -> APIKeyClientInfo:
+        return self._async_client.client_info
+
+    @property
+    def max_retries(self):
+        return self._async_client.max_retries
+
+    @property
+    def journal(self) -> Optional[TaskJournal]:
+        return self._async_client.journal
+
+    @property
+    def connection_recoveries(self) -> int:
+        return self._async_client.connection_recoveries
+
+    def _affiliate(self, task: AsyncPredictionTask) -> AsyncPredictionTask:
+        """
+        Make task.result() a blocking call of this client
+        """
+        task.set_client(self)
+        return task
+
+    def predict(
+        self,
+        payload: dict,
+        model: Optional[str] = None,
+        max_retries=None,
+        deadline: Union[None, float, Deadline] = None,
+    ) -> PredictionResponse:
+        return get_engine().run(
+            self._async_client.predict(payload, model, max_retries, deadline)
+        )
+
+    def predict_async_task(
+        self,
+        payload: dict,
+        model: Optional[str] = None,
+        max_retries=None,
+        deadline: Union[None, float, Deadline] = None,
+        dedupe: bool = False,
+    ) -> AsyncPredictionTask:
+        return self._affiliate(
+            get_engine().run(
+                self._async_client.predict_async_task(
+                    payload, model, max_retries, deadline, dedupe
+                )
+            )
+        )
+
+    async def _prediction_task_check(self, *args, **kwargs):
+        """
+        Called by the pollers of as_completed(), which run on the engine
+        """
+        return await self._async_client._prediction_task_check(*args, **kwargs)
+
+    def prediction_task_result(
+        self,
+        prediction_task: AsyncPredictionTask,
+        timeout: Union[None, float, Deadline] = None,
+    ):
+        return get_engine().run(
+            self._async_client.prediction_task_result(prediction_task, timeout)
+        )
+
+    def as_completed(
+        self,
+        tasks: Iterable[AsyncPredictionTask],
+        timeout: Union[None, float, Deadline] = None,
+        return_exceptions: bool = False,
+    ) -> Iterator[Tuple[AsyncPredictionTask, AsyncPredictionResponseList]]:
+        tasks = [self._affiliate(task) for task in tasks]
+        return get_engine().iterate(
+            self._async_client.as_completed(tasks, timeout, return_exceptions)
+        )
+
+    def wait_all(
+        self,
+        tasks: Iterable[AsyncPredictionTask],
+        timeout: Union[None, float, Deadline] = None,
+        return_exceptions: bool = False,
+    ) -> List[AsyncPredictionResponseList]:
+        tasks = [self._affiliate(task) for task in tasks]
+        return get_engine().run(
+            self._async_client.wait_all(tasks, timeout, return_exceptions)
+        )
+
+    def resume_tasks(self, model: Optional[str] = None) -> List[AsyncPredictionTask]:
+        return [
+            self._affiliate(task) for task in self._async_client.resume_tasks(model)
+        ]
+
+    def stream(
+        self,
+        payload: dict,
+        model: Optional[str] = None,
+        max_retries=None,
+        deadline: Union[None, float, Deadline] = None,
+    ) -> EnginePredictionStream:
+        engine = get_engine()
+        stream = engine.call(
+            self._async_client.stream, payload, model, max_retries, deadline
+        )
+        return EnginePredictionStream(stream, engine)
+
+    def openapi_schema(
+        self, model: Optional[str] = None, max_retries=None
+    ) -> OpenAPISchemaResponse:
+        return get_engine().run(self._async_client.openapi_schema(model, max_retries))
+
+    def cancel_prediction(
+        self,
+        prediction_id: str,
+        model: Optional[str] = None,
+        client_info: APIKeyClientInfo = None,
+    ):
+        return get_engine().run(
+            self._async_client.cancel_prediction(prediction_id, model, client_info)
+        )
+
+    def warmup(self, connections: int = 1, keepalive: bool = False) -> int:
+        return get_engine().run(self._async_client.warmup(connections, keepalive))
+
+    def close(self) -> None:
+        get_engine().run(self._async_client.close())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @classmethod
+    def run_predict(cls, apikey: str, model: str, payload: dict):
+        """
+        See FlyMyAI.run_predict
+        """
+        return default_client(cls, apikey).predict(payload, model)
@@ -1,17 +1,30 @@
 import os
-from typing import Callable, Iterator, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
 
 import httpx
 
 from flymyai.core._streaming import SSEDecoder
 from flymyai.core.authorizations import APIKeyClientInfo
+from flymyai.core.clients import preflight
+from flymyai.core.clients.default_clients import default_client
 from flymyai.core.clients.base_client import (
     BaseClient,
     _predict_timeout,
     _http2,
     _limits,
+    _multi_connection_transport,
     _is_reconnectable_error,
     _RECONNECT_RETRIES,
+    _stream_id_of,
+    _PredictionHandle,
+    _request_timeout,
+    _deadline_exceeded,
+    _KEEPALIVE_INTERVAL,
+    _WARMUP_PATH,
+    _warmup_timeout,
+    logger,
 )
 from flymyai.core.exceptions import (
     BaseFlyMyAIException,
@@ -19,17 +32,23 @@ from flymyai.core.exceptions import (
     FlyMyAIPredictException,
     FlyMyAIExceptionGroup,
     FlyMyAIAsyncTaskException,
+    RetryTimeoutExceededException,
 )
 from flymyai.core.models.successful_responses import (
     PredictionResponse,
     OpenAPISchemaResponse,
     AsyncPredictionTask,
+    AsyncPredictionResponseList,
 )
 from flymyai.core.response_factory.plain_inference_response_factory import (
     SSEInferenceResponseFactory,
 )
 from flymyai.core.stream_iterators.PredictionStream import PredictionStream
+from flymyai.core.task_pollers.TaskPoller import TaskPoller
+from flymyai.core.tls import ssl_context
+from flymyai.core.transports import MultiConnectionTransport
 from flymyai.multipart import MultipartPayload
+from flymyai.utils.deadline import Deadline
 from flymyai.utils.utils import retryable_callback
 
 
@@ -37,175 +56,433 @@ class BaseSyncClient(BaseClient[httpx.Client]):
     def _construct_client(self):
         return httpx.Client(
             http2=_http2,
+            verify=ssl_context(http2=_http2),
             limits=_limits,
-            headers=self.client_info.authorization_headers,
+            headers=self._default_headers(),
             base_url=os.getenv("FLYMYAI_DSN", "https://api.flymy.ai/"),
             timeout=_predict_timeout,
+            transport=_multi_connection_transport(MultiConnectionTransport),
         )
 
-    def _with_reconnect(self, fn):
-        last_exc = None
+    def _with_reconnect(self, fn, deadline: Optional[Deadline] = None):
         for attempt in range(1 + _RECONNECT_RETRIES):
-            try:
-                return fn()
-            except BaseException as e:
-                last_exc = e
-                if not _is_reconnectable_error(e):
-                    raise
-                if attempt < _RECONNECT_RETRIES:
-                    self._reconnect_client()
-                    continue
-                raise
-        assert last_exc is not None
-        raise last_exc
+            if deadline is not None:
+                deadline.check()
+            with self._recovery.request() as generation:
+                try:
+                    return fn()
+                except BaseException as e:
+                    if not _is_reconnectable_error(e) or attempt == _RECONNECT_RETRIES:
+                        raise
+            self._reconnect_client(generation)
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self._client.close()
+        self.close()
+
+    def close(self) -> None:
+        self.stop_keepalive()
+        super().close()
+
+    def _ping(self) -> bool:
+        """
+        Cheap request opening (or checking) a pooled connection.
+        A dead connection gets the HTTP client rebuilt
+        :return: whether the request went through
+        """
+        with self._recovery.request() as generation:
+            try:
+                self._client.head(_WARMUP_PATH, timeout=_warmup_timeout)
+                return True
+            except Exception as e:
+                logger.debug("FlyMyAI warmup request failed: %r", e)
+                dead = _is_reconnectable_error(e)
+        if dead:
+            self._reconnect_client(generation)
+        return False
+
+    def _ping_many(self, connections: int) -> int:
+        if connections == 1:
+            return int(self._ping())
+        with ThreadPoolExecutor(connections) as pool:
+            return sum(pool.map(lambda _: self._ping(), range(connections)))
+
+    def warmup(self, connections: int = 1, keepalive: bool = False) -> int:
+        """
+        Open connections ahead of traffic, so the first prediction
+        does not pay for DNS, TCP, TLS and HTTP/2 setup.
+        Concurrent requests open one connection each over HTTP/1.1;
+        HTTP/2 multiplexes them over a single connection unless
+        FMA_HTTP2_CONNECTIONS is set
+        :param connections: how many requests to make concurrently
+        :param keepalive: keep the connections open with start_keepalive()
+        :return: how many of the requests went through
+        """
+        self._warm_connections = connections
+        opened = self._ping_many(connections)
+        if opened < connections:
+            # failed requests may have rebuilt the client: warm the new one
+            opened += self._ping_many(connections - opened)
+        if keepalive:
+            self.start_keepalive()
+        return opened
+
+    def start_keepalive(self, interval: float = _KEEPALIVE_INTERVAL):
+        """
+        Repeat warmup() every `interval` seconds in a background thread,
+        so idle connections are not dropped and dead ones are replaced
+        before a user request lands on them. Stopped by close()
+        """
+        if self._keepalive is not None:
+            return
+        stopped = threading.Event()
+        self._keepalive = stopped
+        threading.Thread(
+            target=self._keepalive_loop,
+            args=(stopped, interval),
+            name="flymyai-keepalive",
+            daemon=True,
+        ).start()
+
+    def stop_keepalive(self):
+        stopped, self._keepalive = self._keepalive, None
+        if stopped is not None:
+            stopped.set()
+
+    def _keepalive_loop(self, stopped: threading.Event, interval: float):
+        while not stopped.wait(interval):
+            try:
+                self.warmup(self._warm_connections)
+            except Exception:
+                logger.warning("FlyMyAI keepalive failed", exc_info=True)
 
     @classmethod
-    def _sse_instant(cls, stream_iter_func: Callable[[], Iterator[httpx.Response]]):
+    def _sse_instant(
+        cls,
+        stream_iter_func: Callable[[], Iterator[httpx.Response]],
+        prediction: Optional[_PredictionHandle] = None,
+        decoder: Optional[SSEDecoder] = None,
+    ):
         """
         Fetch sse response on prediction
         :param stream_iter_func: context manager with underlying stream
+        :param prediction: receives the prediction_id announced by the server
+        :param decoder: SSEDecoder of the client
         :return: FlyMyAIResponse
         """
         with stream_iter_func() as stream:
             stream: httpx.Response
-            response = SSEInferenceResponseFactory(
-                sse=next(SSEDecoder().iter(stream.iter_lines())),
-                httpx_request=stream.request,
-                httpx_response=stream,
-            ).construct()
-            return response
+            for sse in (decoder or SSEDecoder()).iter_response(stream):
+                response = SSEInferenceResponseFactory(
+                    sse=sse,
+                    httpx_request=stream.request,
+                    httpx_response=stream,
+                ).construct()
+                if not response.is_event:
+                    return response
+                if prediction is not None:
+                    prediction.set(_stream_id_of(response))
+        raise FlyMyAIPredictException("Prediction stream ended without a result")
+
+    def _cancel_quietly(
+        self, prediction_id: Optional[str], client_info: APIKeyClientInfo
+    ):
+        if not prediction_id:
+            return
+        try:
+            self.cancel_prediction(prediction_id, client_info=client_info)
+        except Exception:
+            logger.warning(
+                "Failed to cancel abandoned prediction %s", prediction_id, exc_info=True
+            )
 
-    def _predict(self, payload: MultipartPayload, client_info: APIKeyClientInfo):
+    def _cancel_in_background(
+        self, prediction_id: Optional[str], client_info: APIKeyClientInfo
+    ):
+        """
+        Ask the server to cancel a prediction nobody is waiting for anymore,
+        from a new thread: used where blocking is not allowed (finalizers)
+        """
+        if not prediction_id:
+            return
+        threading.Thread(
+            target=self._cancel_quietly,
+            args=(prediction_id, client_info),
+            name="flymyai-cancel",
+            daemon=True,
+        ).start()
+
+    def _preflight(
+        self,
+        client_info: APIKeyClientInfo,
+        payload: MultipartPayload,
+        deadline: Optional[Deadline] = None,
+    ):
         """
-        Wrap predict method in sse
+        Check the key and model before uploading a large payload;
+        the payload itself is not validated, see flymyai.core.clients.preflight
         """
+        payload.preprocess()
+        if not preflight.needed(client_info, payload.size()):
+            return
 
+        def check():
+            with self._client.stream(
+                "get",
+                client_info.openapi_schema_path,
+                headers=client_info.authorization_headers,
+                timeout=_request_timeout(deadline),
+            ) as response:
+                if response.status_code >= 400:
+                    response.read()
+                return preflight.rejection(client_info, response)
+
+        rejection = self._with_reconnect(check, deadline)
+        if rejection is not None:
+            raise rejection
+
+    def _predict(
+        self,
+        payload: MultipartPayload,
+        client_info: APIKeyClientInfo,
+        deadline: Optional[Deadline] = None,
+    ):
+        """
+        Wrap predict method in sse.
+        If the caller stops waiting (deadline, read timeout or KeyboardInterrupt),
+        the prediction is cancelled on the server as well
+        """
+        self._preflight(client_info, payload, deadline)
+        prediction = _PredictionHandle()
         try:
             return self._with_reconnect(
                 lambda: self._sse_instant(
-                    lambda: self._stream_iterator(client_info, payload, False)
-                )
+                    lambda: self._stream_iterator(
+                        client_info, payload, False, deadline
+                    ),
+                    prediction,
+                    self._sse_decoder(),
+                ),
+                deadline,
             )
         except BaseFlyMyAIException as e:
             raise FlyMyAIPredictException.from_base_exception(e)
+        except (
+            KeyboardInterrupt,
+            httpx.TimeoutException,
+            RetryTimeoutExceededException,
+        ) as e:
+            self._cancel_quietly(prediction.prediction_id, client_info)
+            if _deadline_exceeded(e, deadline):
+                raise RetryTimeoutExceededException(
+                    f"Deadline of {deadline.seconds}s exceeded"
+                ) from e
+            raise
 
-    def predict(self, payload: dict, model: Optional[str] = None, max_retries=None):
+    def predict(
+        self,
+        payload: dict,
+        model: Optional[str] = None,
+        max_retries=None,
+        deadline: Union[None, float, Deadline] = None,
+    ):
         """
         Wrap predict method in sse.
         Retries until max_retries or self.max_retries is reached
         :param model: flymyai/bert | None, If none - get self.client_info.<username/project_name>
         :param payload: anything for model
         :param max_retries: retries
+        :param deadline: seconds (or a Deadline) for the whole call, retries included;
+                the prediction is cancelled and RetryTimeoutExceededException raised once it is over
         :return: PredictionResponse(exc_history, output_data, response):
                 exc_history - list of exception history during prediction
                 output_data - dict with prediction output
         """
-
-        payload = MultipartPayload(payload)
+        deadline = Deadline.of(deadline)
+        payload = MultipartPayload(
+            payload, self._image_options(self.amend_client_info(model))
+        )
         history, response = retryable_callback(
-            lambda: self._predict(payload, self.amend_client_info(model)),
+            lambda: self._predict(payload, self.amend_client_info(model), deadline),
             max_retries or self.max_retries,
             FlyMyAIPredictException,
             FlyMyAIExceptionGroup,
+            deadline and deadline.remaining(),
+        )
+        return PredictionResponse.from_response(
+            response, exc_history=history, upload_bytes_saved=payload.bytes_saved
         )
-        return PredictionResponse.from_response(response, exc_history=history)
 
     def predict_async_task(
-        self, payload: dict, model: Optional[str] = None, max_retries=None
+        self,
+        payload: dict,
+        model: Optional[str] = None,
+        max_retries=None,
+        deadline: Union[None, float, Deadline] = None,
+        dedupe: bool = False,
     ):
-        payload = MultipartPayload(input_data=payload)
+        """
+        Submit a prediction to run in the background
+        :param dedupe: with a journal, return the unfinished task of an identical
+            payload (same model) instead of submitting it again. Off by default:
+            non-deterministic models give a new result for every submission
+        """
+        deadline = Deadline.of(deadline)
         client_info = self.amend_client_info(model)
+        payload_digest = self._journal_digest(payload)
+        if dedupe:
+            pending_task = self._journal_pending_task(payload_digest, client_info)
+            if pending_task is not None:
+                return pending_task
+        payload = MultipartPayload(payload, self._image_options(client_info))
         try:
+            self._preflight(client_info, payload, deadline)
             _, response = retryable_callback(
                 lambda: self._with_reconnect(
                     lambda: self._client.post(
-                        client_info.prediction_async_path, **payload.serialize()
-                    )
+                        client_info.prediction_async_path,
+                        **payload.serialize(),
+                        timeout=_request_timeout(deadline),
+                    ),
+                    deadline,
                 ),
                 max_retries or self.max_retries,
                 FlyMyAIAsyncTaskException,
                 FlyMyAIExceptionGroup,
+                deadline and deadline.remaining(),
             )
             response = SSEInferenceResponseFactory(response).construct()
-            return self._async_prediction_task_construct(response, client_info)
+            prediction_task = self._async_prediction_task_construct(
+                response, client_info
+            )
+            self._journal_record(prediction_task, payload_digest, client_info)
+            return prediction_task
         except BaseFlyMyAIException as e:
             raise FlyMyAIAsyncTaskException.from_base_exception(e)
 
-    def prediction_task_result(
-        self, prediction_task: AsyncPredictionTask, timeout: Optional[float] = None
+    def _prediction_task_check(
+        self,
+        prediction_task: AsyncPredictionTask,
+        deadline: Optional[Deadline] = None,
     ):
-        prediction_id = prediction_task.prediction_id
-
-        def get_res():
-            resp = self._with_reconnect(
-                lambda: self._client.get(
-                    url=(
-                        prediction_task.client_info or self.client_info
-                    ).prediction_result_path,
-                    params={"request_id": prediction_id},
-                )
-            )
-            return self._construct_task_result(resp)
+        """
+        Single request for the result of an async prediction task
+        """
+        resp = self._with_reconnect(
+            lambda: self._client.get(
+                url=(
+                    prediction_task.client_info or self.client_info
+                ).prediction_result_path,
+                params={"request_id": prediction_task.prediction_id},
+                timeout=_request_timeout(deadline),
+            ),
+            deadline,
+        )
+        return self._task_result_from_response(prediction_task, resp)
 
+    def prediction_task_result(
+        self,
+        prediction_task: AsyncPredictionTask,
+        timeout: Union[None, float, Deadline] = None,
+    ):
+        """
+        Poll the result of an async prediction task
+        :param timeout: seconds (or a Deadline) for all the polls together
+        """
+        deadline = Deadline.of(timeout)
         _, res = retryable_callback(
-            lambda: get_res(),
+            lambda: self._prediction_task_check(prediction_task, deadline),
             None,
             FlyMyAIAsyncTaskException,
             FlyMyAIExceptionGroup,
-            timeout,
+            deadline and deadline.remaining(),
             0.5,
         )
 
         return res
 
-    def _stream(self, client_info: APIKeyClientInfo, payload: dict):
-        payload = MultipartPayload(payload)
-        try:
-            response_iterator = self._stream_iterator(
-                client_info, payload, is_long_stream=True
-            )
-            decoder = SSEDecoder()
-            with response_iterator as sse_stream:
-                for sse_partial in decoder.iter(sse_stream.iter_lines()):
-                    try:
-                        response = SSEInferenceResponseFactory(
-                            sse=sse_partial,
-                            httpx_request=sse_stream.request,
-                            httpx_response=sse_stream,
-                        ).construct()
-                    except BaseFlyMyAIException as e:
-                        raise FlyMyAIPredictException.from_base_exception(e)
-                    yield response
-        except BaseException as e:
-            if not _is_reconnectable_error(e):
-                raise
-            self._reconnect_client()
-            response_iterator = self._stream_iterator(
-                client_info, payload, is_long_stream=True
-            )
-            decoder = SSEDecoder()
-            with response_iterator as sse_stream:
-                for sse_partial in decoder.iter(sse_stream.iter_lines()):
-                    try:
-                        response = SSEInferenceResponseFactory(
-                            sse=sse_partial,
-                            httpx_request=sse_stream.request,
-                            httpx_response=sse_stream,
-                        ).construct()
-                    except BaseFlyMyAIException as e:
-                        raise FlyMyAIPredictException.from_base_exception(e)
-                    yield response
-
-    def stream(self, payload: dict, model: Optional[str] = None):
+    def as_completed(
+        self,
+        tasks: Iterable[AsyncPredictionTask],
+        timeout: Union[None, float, Deadline] = None,
+        return_exceptions: bool = False,
+    ) -> Iterator[Tuple[AsyncPredictionTask, AsyncPredictionResponseList]]:
+        """
+        Poll many async prediction tasks at once, see TaskPoller
+        :return: iterator over (task, result) in order of completion
+        """
+        return TaskPoller().as_completed(tasks, timeout, return_exceptions)
+
+    def wait_all(
+        self,
+        tasks: Iterable[AsyncPredictionTask],
+        timeout: Union[None, float, Deadline] = None,
+        return_exceptions: bool = False,
+    ) -> List[AsyncPredictionResponseList]:
+        """
+        Poll many async prediction tasks at once, see TaskPoller
+        :return: results in order of tasks
+        """
+        return TaskPoller().wait_all(tasks, timeout, return_exceptions)
+
+    def _stream_attempt(
+        self,
+        client_info: APIKeyClientInfo,
+        payload: MultipartPayload,
+        deadline: Optional[Deadline] = None,
+    ):
+        self._preflight(client_info, payload, deadline)
+        response_iterator = self._stream_iterator(
+            client_info, payload, is_long_stream=True, deadline=deadline
+        )
+        decoder = self._sse_decoder()
+        with response_iterator as sse_stream:
+            for sse_partial in decoder.iter_response(sse_stream):
+                try:
+                    response = SSEInferenceResponseFactory(
+                        sse=sse_partial,
+                        httpx_request=sse_stream.request,
+                        httpx_response=sse_stream,
+                    ).construct()
+                except BaseFlyMyAIException as e:
+                    raise FlyMyAIPredictException.from_base_exception(e)
+                yield response
+
+    def _stream(
+        self,
+        client_info: APIKeyClientInfo,
+        payload: dict,
+        deadline: Optional[Deadline] = None,
+    ):
+        payload = MultipartPayload(payload, self._image_options(client_info))
+        for attempt in range(2):
+            with self._recovery.request() as generation:
+                try:
+                    yield from self._stream_attempt(client_info, payload, deadline)
+                    return
+                except BaseException as e:
+                    if attempt or not _is_reconnectable_error(e):
+                        raise
+            self._reconnect_client(generation)
+
+    def stream(
+        self,
+        payload: dict,
+        model: Optional[str] = None,
+        deadline: Union[None, float, Deadline] = None,
+    ):
+        """
+        :param deadline: seconds (or a Deadline) for the whole stream; once it is over
+                the prediction is cancelled and RetryTimeoutExceededException raised
+        """
+        deadline = Deadline.of(deadline)
         full_client_info = self.amend_client_info(model)
-        stream_iter = self._stream(full_client_info, payload)
-        stream_wrapper = PredictionStream(stream_iter, self, full_client_info)
+        stream_iter = self._stream(full_client_info, payload, deadline)
+        stream_wrapper = PredictionStream(
+            stream_iter, self, full_client_info, deadline=deadline
+        )
         return stream_wrapper
 
     def _openapi_schema(self, client_info: APIKeyClientInfo):
@@ -273,6 +550,7 @@ class BaseSyncClient(BaseClient[httpx.Client]):
         :return: PredictionResponse(exc_history, output_data, response):
                 exc_history - list of exception history during prediction;
                 output_data - dict with prediction output;
+        Runs on the default client of the apikey, which keeps its connections
+        between calls, see default_client
         """
-        with cls(apikey, model) as client:
-            return client.predict(payload)
+        return default_client(cls, apikey).predict(payload, model)
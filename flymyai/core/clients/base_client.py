@@ -1,5 +1,15 @@
+import logging
 import os
-from typing import Generic, Optional, overload, AsyncIterator, Iterator, Callable
+from typing import (
+    Dict,
+    Generic,
+    Optional,
+    overload,
+    AsyncIterator,
+    Iterator,
+    Callable,
+    List,
+)
 from typing import (
     TypeVar,
     Union,
@@ -14,20 +24,35 @@ from flymyai.core.response_factory.async_task_result_factory import (
 from flymyai.core.response_factory.plain_inference_response_factory import (
     SSEInferenceResponseFactory,
 )
+from flymyai.core._streaming import SSEDecoder, SpillingSSEDecoder
 from flymyai.core.authorizations import APIKeyClientInfo
+from flymyai.core.compression import ACCEPT_ENCODING
+from flymyai.core.clients import fork_safety
+from flymyai.core.clients.recovery import ConnectionRecovery, _close_quietly
 from flymyai.core.exceptions import (
     ImproperlyConfiguredClientException,
     BaseFlyMyAIException,
     FlyMyAIAsyncTaskException,
+    FlyMyAIExceptionGroup,
+    RetryTimeoutExceededException,
 )
+from flymyai.core.journal import TaskJournal, payload_hash
+from flymyai.core.tls import ssl_context
+from flymyai.core.transports import _HTTP2_CONNECTIONS
 from flymyai.core.models.successful_responses import (
     PredictionResponse,
     OpenAPISchemaResponse,
     PredictionPartial,
+    PredictionEvent,
     AsyncPredictionTask,
     AsyncPredictionResponseList,
 )
+from flymyai.core.types.event_types import EventType
 from flymyai.multipart import MultipartPayload
+from flymyai.multipart.images import ImageOptions
+from flymyai.utils.deadline import Deadline
+
+logger = logging.getLogger("flymyai")
 
 DEFAULT_RETRY_COUNT = os.getenv("FLYMYAI_MAX_RETRIES", 2)
 
@@ -65,6 +90,30 @@ def _is_reconnectable_error(exc: BaseException) -> bool:
     return False
 
 
+def _stream_id_of(response) -> Optional[str]:
+    """
+    prediction_id carried by a STREAM_ID event, None for any other response
+    """
+    if not response.is_event:
+        return None
+    event = PredictionEvent.from_response(response)
+    if event.event_type == EventType.STREAM_ID:
+        return event.prediction_id
+    return None
+
+
+class _PredictionHandle:
+    """
+    prediction_id of the request in flight, once the server has announced it
+    """
+
+    prediction_id: Optional[str] = None
+
+    def set(self, prediction_id: Optional[str]):
+        if prediction_id:
+            self.prediction_id = prediction_id
+
+
 _predict_timeout = httpx.Timeout(
     connect=int(os.getenv("FMA_CONNECT_TIMEOUT", 999999)),
     read=int(os.getenv("FMA_READ_TIMEOUT", 999999)),
@@ -72,6 +121,29 @@ _predict_timeout = httpx.Timeout(
     pool=int(os.getenv("FMA_POOL_TIMEOUT", 999999)),
 )
 
+
+def _request_timeout(deadline: Optional[Deadline]) -> httpx.Timeout:
+    """
+    Timeout of a single request: the rest of the deadline, if any
+    """
+    if deadline is None:
+        return _predict_timeout
+    return deadline.timeout()
+
+
+def _deadline_exceeded(exc: BaseException, deadline: Optional[Deadline]) -> bool:
+    """
+    Whether a request failed because the deadline of the call ran out
+    """
+    if isinstance(exc, RetryTimeoutExceededException):
+        return True
+    return (
+        isinstance(exc, httpx.TimeoutException)
+        and deadline is not None
+        and deadline.expired
+    )
+
+
 _http2 = os.getenv("FLYMYAI_HTTP2", "true").lower() in ("1", "true", "yes")
 _limits = httpx.Limits(
     max_connections=int(os.getenv("FMA_MAX_CONNECTIONS", "100")),
@@ -80,6 +152,26 @@ _limits = httpx.Limits(
 )
 
 
+# Requests made by warmup() and the keepalive to open and check pooled connections
+_WARMUP_PATH = os.getenv("FMA_WARMUP_PATH", "/")
+_warmup_timeout = httpx.Timeout(float(os.getenv("FMA_WARMUP_TIMEOUT", "10")))
+# Seconds between keepalive pings, half of the keepalive expiry by default
+# so that pooled connections never go idle long enough to be dropped
+_KEEPALIVE_INTERVAL = float(
+    os.getenv("FMA_KEEPALIVE_INTERVAL", str(_limits.keepalive_expiry / 2))
+)
+
+
+def _multi_connection_transport(transport_cls):
+    """
+    Transport spreading streams over FMA_HTTP2_CONNECTIONS HTTP/2 connections,
+    None (the default httpx pool) when a single connection is configured
+    """
+    if not _http2 or _HTTP2_CONNECTIONS < 2:
+        return None
+    return transport_cls(limits=_limits, verify=ssl_context(http2=True))
+
+
 class BaseClient(Generic[_PossibleClients]):
     """
     Base class for FlyMyAI clients
@@ -88,15 +180,69 @@ class BaseClient(Generic[_PossibleClients]):
     _client: _PossibleClients
     max_retries: int
     client_info: APIKeyClientInfo
+    journal: Optional[TaskJournal]
+    spill_threshold: Optional[int]
+    image_options: Union[None, ImageOptions, Dict[str, ImageOptions]]
 
     def __init__(
-        self, apikey: str, model: Optional[str] = None, max_retries=DEFAULT_RETRY_COUNT
+        self,
+        apikey: str,
+        model: Optional[str] = None,
+        max_retries=DEFAULT_RETRY_COUNT,
+        journal: Optional[TaskJournal] = None,
+        spill_threshold: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+        image_options: Union[None, ImageOptions, Dict[str, ImageOptions]] = None,
     ):
+        """
+        :param spill_threshold: parse prediction results incrementally and write
+            string values of at least this many characters (e.g. base64 images)
+            to temporary files, returning SpilledString handles in output_data
+        :param spill_dir: directory of those files, the system temp dir by default
+        :param image_options: downscale and re-encode image inputs before upload,
+            for every model or per model ({"owner/model": ImageOptions(...)}),
+            see ImageOptions.from_openapi_schema
+        """
         self.client_info = APIKeyClientInfo(apikey)
         if model:
             self.client_info = self.client_info.copy_for_model(model)
+        self._recovery = ConnectionRecovery()
         self._client = self._construct_client()
         self.max_retries = max_retries
+        self.journal = journal
+        self.spill_threshold = spill_threshold
+        self.spill_dir = spill_dir
+        self.image_options = image_options
+        self._background_tasks = set()
+        self._warm_connections = 1
+        self._keepalive = None
+        fork_safety.register(self)
+
+    def _after_fork(self):
+        """
+        Called in the child process after a fork: the connections, background
+        threads and tasks of the parent are not ours to use
+        """
+        self._recovery = ConnectionRecovery()
+        self._keepalive = None
+        self._background_tasks = set()
+        self._client = fork_safety.LazyClient(self, "_client", self._construct_client)
+
+    def _default_headers(self) -> dict:
+        return {
+            **self.client_info.authorization_headers,
+            "Accept-Encoding": ACCEPT_ENCODING,
+        }
+
+    def _sse_decoder(self) -> SSEDecoder:
+        if self.spill_threshold is None:
+            return SSEDecoder()
+        return SpillingSSEDecoder(self.spill_threshold, self.spill_dir)
+
+    def _image_options(self, client_info: APIKeyClientInfo) -> Optional[ImageOptions]:
+        if isinstance(self.image_options, dict):
+            return self.image_options.get(self._journal_model(client_info))
+        return self.image_options
 
     def amend_client_info(self, model: Optional[str] = None):
         if model:
@@ -111,30 +257,57 @@ class BaseClient(Generic[_PossibleClients]):
 
     @overload
     async def predict(
-        self, payload: dict, model: Optional[str] = None, max_retries=None
+        self,
+        payload: dict,
+        model: Optional[str] = None,
+        max_retries=None,
+        deadline: Union[None, float, Deadline] = None,
     ) -> PredictionResponse: ...
 
     @overload
     def predict(
-        self, payload: dict, model: Optional[str] = None, max_retries=None
+        self,
+        payload: dict,
+        model: Optional[str] = None,
+        max_retries=None,
+        deadline: Union[None, float, Deadline] = None,
     ) -> PredictionResponse: ...
 
     def predict(
-        self, payload: dict, model: Optional[str] = None, max_retries=None
+        self,
+        payload: dict,
+        model: Optional[str] = None,
+        max_retries=None,
+        deadline: Union[None, float, Deadline] = None,
     ) -> PredictionResponse: ...
 
     @overload
     async def predict_async_task(
-        self, payload: dict, model: Optional[str] = None, max_retries=None
+        self,
+        payload: dict,
+        model: Optional[str] = None,
+        max_retries=None,
+        deadline: Union[None, float, Deadline] = None,
+        dedupe: bool = False,
     ) -> AsyncPredictionTask: ...
 
     @overload
     def predict_async_task(
-        self, payload: dict, model: Optional[str] = None, max_retries=None
+        self,
+        payload: dict,
+        model: Optional[str] = None,
+        max_retries=None,
+        deadline: Union[None, float, Deadline] = None,
+        dedupe: bool = False,
     ) -> AsyncPredictionTask: ...
 
     def predict_async_task(
-        self, payload: dict, model: Optional[str] = None, max_retries=None
+        self,
+        payload: dict,
+        model: Optional[str] = None,
+        max_retries=None,
+        deadline: Union[None, float, Deadline] = None,
+        dedupe: bool = False,
     ) -> AsyncPredictionTask: ...
 
     @classmethod
@@ -148,6 +321,25 @@ class BaseClient(Generic[_PossibleClients]):
         except pydantic.ValidationError as e:
             raise AsyncPredictionResponseList.convert_error(e) from e
 
+    def _task_result_from_response(
+        self, prediction_task: AsyncPredictionTask, response: httpx.Response
+    ):
+        """
+        Construct the task result, marking the task finished in the journal
+        once the result is final (either successful or failed)
+        """
+        try:
+            result = self._construct_task_result(response)
+        except FlyMyAIAsyncTaskException as e:
+            if not e.requires_retry:
+                self._journal_finish(prediction_task)
+            raise e
+        except FlyMyAIExceptionGroup as e:
+            self._journal_finish(prediction_task)
+            raise e
+        self._journal_finish(prediction_task)
+        return result
+
     def _async_prediction_task_construct(
         self, response: httpx.Response, client_info: APIKeyClientInfo
     ) -> AsyncPredictionTask:
@@ -158,18 +350,91 @@ class BaseClient(Generic[_PossibleClients]):
         async_prediction_task.set_client(self)
         return async_prediction_task
 
+    def _async_prediction_task_restore(
+        self, prediction_id: str, client_info: APIKeyClientInfo
+    ) -> AsyncPredictionTask:
+        async_prediction_task = AsyncPredictionTask[self.__class__](
+            prediction_id=prediction_id
+        )
+        async_prediction_task.client_info = client_info
+        async_prediction_task.set_client(self)
+        return async_prediction_task
+
+    @staticmethod
+    def _journal_model(client_info: APIKeyClientInfo) -> str:
+        return f"{client_info.username}/{client_info.project_name}"
+
+    def _journal_digest(self, payload: dict) -> Optional[str]:
+        """
+        :return: payload hash to look up / record, None without a journal
+        """
+        if self.journal is None:
+            return None
+        return payload_hash(payload)
+
+    def _journal_pending_task(
+        self, digest: Optional[str], client_info: APIKeyClientInfo
+    ) -> Optional[AsyncPredictionTask]:
+        if digest is None:
+            return None
+        prediction_id = self.journal.find_pending(
+            self._journal_model(client_info), digest
+        )
+        if prediction_id is None:
+            return None
+        return self._async_prediction_task_restore(prediction_id, client_info)
+
+    def _journal_record(
+        self,
+        prediction_task: AsyncPredictionTask,
+        digest: Optional[str],
+        client_info: APIKeyClientInfo,
+    ):
+        if digest is not None:
+            self.journal.record(
+                prediction_task.prediction_id, self._journal_model(client_info), digest
+            )
+
+    def _journal_finish(self, prediction_task: AsyncPredictionTask):
+        if self.journal is not None:
+            self.journal.finish(prediction_task.prediction_id)
+
+    def resume_tasks(self, model: Optional[str] = None) -> List[AsyncPredictionTask]:
+        """
+        Restore unfinished tasks recorded in the journal (e.g. after a restart).
+        Their results are available through the usual AsyncPredictionTask API
+        :param model: flymyai/bert, all the journaled models by default
+        """
+        if self.journal is None:
+            raise ImproperlyConfiguredClientException(
+                "resume_tasks requires a client constructed with"
+                " journal=TaskJournal(...)"
+            )
+        return [
+            self._async_prediction_task_restore(
+                entry.prediction_id, self.amend_client_info(entry.model)
+            )
+            for entry in self.journal.pending(model)
+        ]
+
     @overload
     async def prediction_task_result(
-        self, prediction_task: AsyncPredictionTask, timeout: Optional[float] = None
+        self,
+        prediction_task: AsyncPredictionTask,
+        timeout: Union[None, float, Deadline] = None,
     ): ...
 
     @overload
     def prediction_task_result(
-        self, prediction_task: AsyncPredictionTask, timeout: Optional[float] = None
+        self,
+        prediction_task: AsyncPredictionTask,
+        timeout: Union[None, float, Deadline] = None,
     ): ...
 
     def prediction_task_result(
-        self, prediction_task: AsyncPredictionTask, timeout: Optional[float] = None
+        self,
+        prediction_task: AsyncPredictionTask,
+        timeout: Union[None, float, Deadline] = None,
     ): ...
 
     @overload
@@ -191,6 +456,7 @@ class BaseClient(Generic[_PossibleClients]):
         self,
         payload: dict,
         model: Optional[str] = None,
+        deadline: Union[None, float, Deadline] = None,
     ) -> AsyncIterator[PredictionPartial]: ...
 
     @overload
@@ -198,17 +464,30 @@ class BaseClient(Generic[_PossibleClients]):
         self,
         payload: dict,
         model: Optional[str] = None,
+        deadline: Union[None, float, Deadline] = None,
     ) -> Iterator[PredictionPartial]: ...
 
     def stream(
         self,
         payload: dict,
         model: Optional[str] = None,
+        deadline: Union[None, float, Deadline] = None,
     ): ...
 
     def _stream_iterator(
-        self, client_info, payload: MultipartPayload, is_long_stream: bool
+        self,
+        client_info,
+        payload: MultipartPayload,
+        is_long_stream: bool,
+        deadline: Optional[Deadline] = None,
+        body: Optional[dict] = None,
     ) -> Union[Iterator[httpx.Response], AsyncIterator[httpx.Response]]:
+        """
+        :param body: request kwargs of the payload with headers,
+            from MultipartPayload.aserialize() in async clients
+        """
+        if body is None:
+            body = payload.serialize(client_info.authorization_headers)
         return self._client.stream(
             method="post",
             url=(
@@ -216,9 +495,8 @@ class BaseClient(Generic[_PossibleClients]):
                 if not is_long_stream
                 else client_info.prediction_stream_path
             ),
-            **payload.serialize(),
-            timeout=_predict_timeout,
-            headers=client_info.authorization_headers,
+            **body,
+            timeout=_request_timeout(deadline),
             follow_redirects=True,
         )
 
@@ -241,13 +519,19 @@ class BaseClient(Generic[_PossibleClients]):
         if hasattr(self, "_client"):
             self._client.close()
 
-    def _reconnect_client(self):
-        if hasattr(self, "_client"):
-            try:
-                self._client.close()
-            except Exception:
-                pass
-        self._client = self._construct_client()
+    def _reconnect_client(self, generation: Optional[int] = None):
+        """
+        Rebuild the HTTP client after a connection failure, see ConnectionRecovery
+        :param generation: generation the failed request ran on
+        """
+        _close_quietly(self._recovery.rebuild(self, generation))
+
+    @property
+    def connection_recoveries(self) -> int:
+        """
+        How many times the HTTP client has been rebuilt after connection failures
+        """
+        return self._recovery.recoveries
 
     def _construct_client(self):
         raise NotImplemented
@@ -5,8 +5,11 @@ from typing import overload, Union, TypeVar, Generic, Optional
 import httpx
 
 from flymyai.core._response import FlyMyAIM1Response
+from flymyai.core.clients import fork_safety
+from flymyai.core.clients.recovery import ConnectionRecovery, _close_quietly
 from flymyai.core.types.m1 import M1GenerationTask
 from flymyai.core.models.m1_history import M1History
+from flymyai.utils.deadline import Deadline
 
 DEFAULT_RETRY_COUNT = os.getenv("FLYMYAI_MAX_RETRIES", 2)
 
@@ -31,6 +34,12 @@ _predict_timeout = httpx.Timeout(
 )
 
 
+def _request_timeout(deadline: Optional[Deadline]) -> httpx.Timeout:
+    if deadline is None:
+        return _predict_timeout
+    return deadline.timeout()
+
+
 class BaseM1Client(Generic[_PossibleClients]):
     client: _PossibleClients
     _m1_history: M1History
@@ -38,24 +47,31 @@ class BaseM1Client(Generic[_PossibleClients]):
 
     def __init__(self, apikey: str):
         self._apikey = apikey
+        self._recovery = ConnectionRecovery()
         self._client = self._construct_client()
         self._m1_history = M1History()
         self._image = None
+        fork_safety.register(self)
 
-    def _reconnect_client(self):
-        if hasattr(self, "_client"):
-            try:
-                self._client.close()
-            except Exception:
-                pass
-        self._client = self._construct_client()
+    def _after_fork(self):
+        """
+        Called in the child process after a fork, see BaseClient._after_fork
+        """
+        self._recovery = ConnectionRecovery()
+        self._client = fork_safety.LazyClient(self, "_client", self._construct_client)
+
+    def _reconnect_client(self, generation: Optional[int] = None):
+        _close_quietly(self._recovery.rebuild(self, generation))
 
     def reset_history(self):
         self._m1_history = M1History()
 
     @overload
     def generate(
-        self, prompt: str, image: Optional[Union[str, Path]] = None
+        self,
+        prompt: str,
+        image: Optional[Union[str, Path]] = None,
+        deadline: Union[None, float, Deadline] = None,
     ) -> FlyMyAIM1Response: ...
 
     @overload
@@ -65,7 +81,9 @@ class BaseM1Client(Generic[_PossibleClients]):
 
     @overload
     def generation_task_result(
-        self, generation_task: M1GenerationTask
+        self,
+        generation_task: M1GenerationTask,
+        deadline: Union[None, float, Deadline] = None,
     ) -> FlyMyAIM1Response: ...
 
     @overload
@@ -73,7 +91,10 @@ class BaseM1Client(Generic[_PossibleClients]):
 
     @overload
     async def generate(
-        self, prompt: str, image: Optional[Union[str, Path]] = None
+        self,
+        prompt: str,
+        image: Optional[Union[str, Path]] = None,
+        deadline: Union[None, float, Deadline] = None,
     ) -> FlyMyAIM1Response: ...
 
     @overload
@@ -83,7 +104,9 @@ class BaseM1Client(Generic[_PossibleClients]):
 
     @overload
     async def generation_task_result(
-        self, generation_task: M1GenerationTask
+        self,
+        generation_task: M1GenerationTask,
+        deadline: Union[None, float, Deadline] = None,
     ) -> FlyMyAIM1Response: ...
 
     @overload
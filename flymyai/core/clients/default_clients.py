@@ -0,0 +1,97 @@
+import asyncio
+import atexit
+import os
+import threading
+import weakref
+from typing import Dict, Tuple, Type, TypeVar
+
+_Client = TypeVar("_Client")
+
+_lock = threading.Lock()
+_sync_clients: Dict[Tuple[type, str], object] = {}
+# event loop -> {(client class, apikey): client}; an async client
+# is bound to the loop it was created on
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def default_client(cls: Type[_Client], apikey: str) -> _Client:
+    """
+    Client shared by every module-level call (flymyai.run) with this apikey,
+    created on first use and closed at interpreter exit
+    """
+    key = (cls, apikey)
+    client = _sync_clients.get(key)
+    if client is None:
+        with _lock:
+            client = _sync_clients.get(key)
+            if client is None:
+                client = _sync_clients[key] = cls(apikey)
+    return client
+
+
+def async_default_client(cls: Type[_Client], apikey: str) -> _Client:
+    """
+    Async counterpart of default_client: one client per apikey and event loop,
+    closed by aclose_default_clients() or at interpreter exit
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_clients.get(loop)
+        if clients is None:
+            for closed in [loop for loop in _async_clients if loop.is_closed()]:
+                # connections of a closed loop can neither be used nor closed
+                del _async_clients[closed]
+            clients = _async_clients[loop] = {}
+        client = clients.get((cls, apikey))
+        if client is None:
+            client = clients[(cls, apikey)] = cls(apikey)
+    return client
+
+
+async def aclose_default_clients():
+    """
+    Close the default clients of the running event loop (flymyai.async_run);
+    await it before the loop is closed, e.g. at the end of the coroutine
+    passed to asyncio.run(). New clients are created on the next call
+    """
+    with _lock:
+        clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    await asyncio.gather(
+        *(client.close() for client in clients.values()), return_exceptions=True
+    )
+
+
+def close_default_clients():
+    """
+    Close the default clients; new ones are created on the next call.
+    Async clients are closed only if their event loop is neither
+    running nor closed, see aclose_default_clients
+    """
+    with _lock:
+        sync_clients = list(_sync_clients.values())
+        async_clients = [
+            (loop, list(clients.values())) for loop, clients in _async_clients.items()
+        ]
+        _sync_clients.clear()
+        _async_clients.clear()
+    for client in sync_clients:
+        client.close()
+    for loop, clients in async_clients:
+        if loop.is_closed() or loop.is_running():
+            continue
+        for client in clients:
+            loop.run_until_complete(client.close())
+
+
+def _after_fork_in_child():
+    # another thread of the parent may have held the lock while forking;
+    # the clients themselves reset their connections, see fork_safety
+    global _lock
+    _lock = threading.Lock()
+
+
+atexit.register(close_default_clients)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,63 @@
+import logging
+import os
+import threading
+import weakref
+from typing import Callable
+
+logger = logging.getLogger("flymyai")
+
+# Clients created in this process, told to drop their connections after a fork
+_clients: "weakref.WeakSet" = weakref.WeakSet()
+
+
+class LazyClient:
+    """
+    Stands in for an HTTP client inherited from the parent process.
+    Its sockets, TLS and HTTP/2 state belong to the parent, so it is never
+    used nor closed in the child: a new client is built on first use instead
+    """
+
+    is_closed = False
+
+    def __init__(self, owner, attribute: str, factory: Callable):
+        self._owner = owner
+        self._attribute = attribute
+        self._factory = factory
+        self._lock = threading.Lock()
+
+    def _materialize(self):
+        with self._lock:
+            client = getattr(self._owner, self._attribute)
+            if client is self:
+                client = self._factory()
+                setattr(self._owner, self._attribute, client)
+            return client
+
+    def __getattr__(self, name: str):
+        return getattr(self._materialize(), name)
+
+    def close(self):
+        pass
+
+    async def aclose(self):
+        pass
+
+
+def register(client):
+    """
+    Have client._after_fork() called in the child after every fork,
+    so it stops using the connections of the parent
+    """
+    _clients.add(client)
+
+
+def _after_fork_in_child():
+    for client in list(_clients):
+        try:
+            client._after_fork()
+        except Exception:
+            logger.warning("Failed to reset %r after fork", client, exc_info=True)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -8,11 +8,15 @@ import httpx
 
 from flymyai.core._response import FlyMyAIM1Response
 from flymyai.core.types.m1 import M1GenerationTask, M1Record, M1Role
+from flymyai.core.clients.recovery import _aclose_quietly
 from flymyai.core.clients.base_m1_client import (
     BaseM1Client,
     M1_DEPRECATION_MESSAGE,
     _predict_timeout,
+    _request_timeout,
 )
+from flymyai.core.tls import ssl_context
+from flymyai.utils.deadline import Deadline
 
 
 class BaseM1AsyncClient(BaseM1Client[httpx.AsyncClient]):
@@ -23,24 +27,23 @@ class BaseM1AsyncClient(BaseM1Client[httpx.AsyncClient]):
     def _construct_client(self):
         return httpx.AsyncClient(
             http2=True,
+            verify=ssl_context(http2=True),
             headers=self._headers,
             base_url=os.getenv("FLYMYAI_M1_DSN", "https://api.chat.flymy.ai/"),
             timeout=_predict_timeout,
         )
 
-    async def _reconnect_client(self):
-        if hasattr(self, "_client"):
-            try:
-                await self._client.aclose()
-            except Exception:
-                pass
-        self._client = self._construct_client()
+    async def _reconnect_client(self, generation: Optional[int] = None):
+        await _aclose_quietly(self._recovery.rebuild(self, generation))
 
     async def _awith_reconnect(self, fn):
-        try:
-            return await fn()
-        except httpx.RemoteProtocolError:
-            await self._reconnect_client()
+        async with self._recovery.arequest() as generation:
+            try:
+                return await fn()
+            except httpx.RemoteProtocolError:
+                pass
+        await self._reconnect_client(generation)
+        async with self._recovery.arequest():
             return await fn()
 
     async def __aenter__(self):
@@ -51,43 +54,58 @@ class BaseM1AsyncClient(BaseM1Client[httpx.AsyncClient]):
             await self._client.aclose()
 
     async def generate(
-        self, prompt: str, image: Union[str, Path, None] = None
+        self,
+        prompt: str,
+        image: Union[str, Path, None] = None,
+        deadline: Union[None, float, Deadline] = None,
     ) -> FlyMyAIM1Response:
         """Submit a chat prompt with optional image input and return the final generation result.
 
         :param prompt: User input string to send to the model.
         :param image: Local image file (as `Path`) or remote image URL (as `str`).
+        :param deadline: Seconds (or a `Deadline`) for the upload, the submission and all the polls.
         :return: FlyMyAIM1Response with generated content and metadata.
         """
         warnings.warn(M1_DEPRECATION_MESSAGE, DeprecationWarning, stacklevel=2)
-        await self._process_image(image)
+        deadline = Deadline.of(deadline)
+        await self._process_image(image, deadline)
         self._m1_history.add(M1Record(role=M1Role.user, content=prompt))
-        generation_task = await self.generation_task()
-        result = await self.generation_task_result(generation_task)
+        generation_task = await self.generation_task(deadline)
+        result = await self.generation_task_result(generation_task, deadline)
         return result
 
-    async def _process_image(self, image: Optional[Union[str, Path]]) -> Optional[str]:
+    async def _process_image(
+        self,
+        image: Optional[Union[str, Path]],
+        deadline: Optional[Deadline] = None,
+    ) -> Optional[str]:
         if image is None:
             return
 
         image_url = None
 
         if isinstance(image, Path):
-            image_url = await self.upload_image(image)
+            image_url = await self.upload_image(image, deadline)
         elif isinstance(image, str):
             image_url = image
 
         self._image = image_url
         return image_url
 
-    async def generation_task(self) -> M1GenerationTask:
+    async def generation_task(
+        self, deadline: Union[None, float, Deadline] = None
+    ) -> M1GenerationTask:
+        deadline = Deadline.of(deadline)
         payload = {
             "chat_history": self._m1_history.serialize(),
             "image_url": self._image,
         }
         response = await self._awith_reconnect(
             lambda: self._client.post(
-                self._generation_path, json=payload, headers=self._headers
+                self._generation_path,
+                json=payload,
+                headers=self._headers,
+                timeout=_request_timeout(deadline),
             )
         )
         response.raise_for_status()
@@ -95,11 +113,22 @@ class BaseM1AsyncClient(BaseM1Client[httpx.AsyncClient]):
         return M1GenerationTask(request_id=response_data["request_id"])
 
     async def generation_task_result(
-        self, generation_task: M1GenerationTask
+        self,
+        generation_task: M1GenerationTask,
+        deadline: Union[None, float, Deadline] = None,
     ) -> FlyMyAIM1Response:
+        """Poll until the generation is finished.
+
+        :param deadline: Seconds (or a `Deadline`) for all the polls together;
+            `RetryTimeoutExceededException` is raised once it is over.
+        """
+        deadline = Deadline.of(deadline)
         while True:
             response = await self._awith_reconnect(
-                lambda: self._client.get(self._populate_result_path(generation_task))
+                lambda: self._client.get(
+                    self._populate_result_path(generation_task),
+                    timeout=_request_timeout(deadline),
+                )
             )
             response.raise_for_status()
             response_data = response.json()
@@ -120,7 +149,9 @@ class BaseM1AsyncClient(BaseM1Client[httpx.AsyncClient]):
                 return FlyMyAIM1Response.from_httpx(response)
 
             if response_data.get("error") == "Still processing":
-                await asyncio.sleep(1)
+                if deadline is not None:
+                    deadline.check()
+                await asyncio.sleep(1 if deadline is None else deadline.sleep_time(1))
                 continue
 
             raise RuntimeError(
@@ -128,17 +159,27 @@ class BaseM1AsyncClient(BaseM1Client[httpx.AsyncClient]):
                 f" {response_data.get('error')}"
             )
 
-    async def upload_image(self, image: Union[str, Path]) -> str:
+    async def upload_image(
+        self,
+        image: Union[str, Path],
+        deadline: Union[None, float, Deadline] = None,
+    ) -> str:
         """Upload a local image file and receive a hosted URL.
 
         :param image: Local file path (as `str` or `Path`).
+        :param deadline: Seconds (or a `Deadline`) for the upload.
         :return: Hosted image URL returned by the server.
         """
+        deadline = Deadline.of(deadline)
         image_path = Path(image) if isinstance(image, str) else image
         with image_path.open("rb") as f:
             files = {"file": (image_path.name, f, "image/png")}
             response = await self._awith_reconnect(
-                lambda: self._client.post(self._image_upload_path, files=files)
+                lambda: self._client.post(
+                    self._image_upload_path,
+                    files=files,
+                    timeout=_request_timeout(deadline),
+                )
             )
         response.raise_for_status()
         response_data = response.json()
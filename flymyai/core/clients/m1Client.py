@@ -12,7 +12,10 @@ from flymyai.core.clients.base_m1_client import (
     BaseM1Client,
     M1_DEPRECATION_MESSAGE,
     _predict_timeout,
+    _request_timeout,
 )
+from flymyai.core.tls import ssl_context
+from flymyai.utils.deadline import Deadline
 
 
 class BaseM1SyncClient(BaseM1Client[httpx.Client]):
@@ -23,16 +26,20 @@ class BaseM1SyncClient(BaseM1Client[httpx.Client]):
     def _construct_client(self):
         return httpx.Client(
             http2=True,
+            verify=ssl_context(http2=True),
             headers=self._headers,
             base_url=os.getenv("FLYMYAI_M1_DSN", "https://api.chat.flymy.ai/"),
             timeout=_predict_timeout,
         )
 
     def _with_reconnect(self, fn):
-        try:
-            return fn()
-        except httpx.RemoteProtocolError:
-            self._reconnect_client()
+        with self._recovery.request() as generation:
+            try:
+                return fn()
+            except httpx.RemoteProtocolError:
+                pass
+        self._reconnect_client(generation)
+        with self._recovery.request():
             return fn()
 
     def __enter__(self):
@@ -41,41 +48,58 @@ class BaseM1SyncClient(BaseM1Client[httpx.Client]):
     def __exit__(self, exc_type, exc_val, exc_tb):
         self._client.close()
 
-    def generate(self, prompt: str, image: Optional[Union[str, Path]] = None):
+    def generate(
+        self,
+        prompt: str,
+        image: Optional[Union[str, Path]] = None,
+        deadline: Union[None, float, Deadline] = None,
+    ):
         """Submit a chat prompt with optional image input and return the final generation result.
 
         :param prompt: User input string to send to the model.
         :param image: Local image file (as `Path`) or remote image URL (as `str`).
+        :param deadline: Seconds (or a `Deadline`) for the upload, the submission and all the polls.
         :return: FlyMyAIM1Response with generated content and metadata.
         """
         warnings.warn(M1_DEPRECATION_MESSAGE, DeprecationWarning, stacklevel=2)
-        self._process_image(image)
+        deadline = Deadline.of(deadline)
+        self._process_image(image, deadline)
         self._m1_history.add(M1Record(role=M1Role.user, content=prompt))
-        generation_task = self.generation_task()
-        result = self.generation_task_result(generation_task)
+        generation_task = self.generation_task(deadline)
+        result = self.generation_task_result(generation_task, deadline)
         return result
 
-    def _process_image(self, image: Optional[Union[str, Path]]) -> Optional[str]:
+    def _process_image(
+        self,
+        image: Optional[Union[str, Path]],
+        deadline: Optional[Deadline] = None,
+    ) -> Optional[str]:
         if image is None:
             return
         image_url = None
 
         if isinstance(image, Path):
-            image_url = self.upload_image(image)
+            image_url = self.upload_image(image, deadline)
         elif isinstance(image, str):
             image_url = image
 
         self._image = image_url
         return image_url
 
-    def generation_task(self) -> M1GenerationTask:
+    def generation_task(
+        self, deadline: Union[None, float, Deadline] = None
+    ) -> M1GenerationTask:
+        deadline = Deadline.of(deadline)
         payload = {
             "chat_history": self._m1_history.serialize(),
             "image_url": self._image,
         }
         response = self._with_reconnect(
             lambda: self._client.post(
-                self._generation_path, json=payload, headers=self._headers
+                self._generation_path,
+                json=payload,
+                headers=self._headers,
+                timeout=_request_timeout(deadline),
             )
         )
         response.raise_for_status()
@@ -83,11 +107,22 @@ class BaseM1SyncClient(BaseM1Client[httpx.Client]):
         return M1GenerationTask(request_id=response_data["request_id"])
 
     def generation_task_result(
-        self, generation_task: M1GenerationTask
+        self,
+        generation_task: M1GenerationTask,
+        deadline: Union[None, float, Deadline] = None,
     ) -> FlyMyAIM1Response:
+        """Poll until the generation is finished.
+
+        :param deadline: Seconds (or a `Deadline`) for all the polls together;
+            `RetryTimeoutExceededException` is raised once it is over.
+        """
+        deadline = Deadline.of(deadline)
         while True:
             response = self._with_reconnect(
-                lambda: self._client.get(self._populate_result_path(generation_task))
+                lambda: self._client.get(
+                    self._populate_result_path(generation_task),
+                    timeout=_request_timeout(deadline),
+                )
             )
             response.raise_for_status()
             response_data = response.json()
@@ -108,7 +143,9 @@ class BaseM1SyncClient(BaseM1Client[httpx.Client]):
                 return FlyMyAIM1Response.from_httpx(response)
 
             if response_data.get("error") == "Still processing":
-                time.sleep(1)
+                if deadline is not None:
+                    deadline.check()
+                time.sleep(1 if deadline is None else deadline.sleep_time(1))
                 continue
 
             raise RuntimeError(
@@ -116,17 +153,27 @@ class BaseM1SyncClient(BaseM1Client[httpx.Client]):
                 f" {response_data.get('error')}"
             )
 
-    def upload_image(self, image: Union[str, Path]) -> str:
+    def upload_image(
+        self,
+        image: Union[str, Path],
+        deadline: Union[None, float, Deadline] = None,
+    ) -> str:
         """Upload a local image file and receive a hosted URL.
 
         :param image: Local file path (as `str` or `Path`).
+        :param deadline: Seconds (or a `Deadline`) for the upload.
         :return: Hosted image URL returned by the server.
         """
+        deadline = Deadline.of(deadline)
         image_path = Path(image) if isinstance(image, str) else image
         with image_path.open("rb") as f:
             files = {"file": (image_path.name, f, "image/png")}
             response = self._with_reconnect(
-                lambda: self._client.post(self._image_upload_path, files=files)
+                lambda: self._client.post(
+                    self._image_upload_path,
+                    files=files,
+                    timeout=_request_timeout(deadline),
+                )
             )
         response.raise_for_status()
         response_data = response.json()
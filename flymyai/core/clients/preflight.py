@@ -0,0 +1,58 @@
+import os
+import threading
+import time
+from typing import Dict, Hashable, Optional
+
+import httpx
+
+from flymyai.core._response import FlyMyAIResponse
+from flymyai.core.exceptions import FlyMyAIPredictException
+
+# payloads of at least this many bytes are preceded by a preflight check
+# of the key and model, 0 disables it. The check is a GET of the model's
+# openapi.json: it catches a rejected key or model (e.g. 401, 403), never
+# a payload that fails validation (422), which is known only after upload
+_PREFLIGHT_THRESHOLD = int(os.getenv("FMA_PREFLIGHT_THRESHOLD", 32 * 1024 * 1024))
+# seconds a successful check is trusted for
+_PREFLIGHT_TTL = float(os.getenv("FMA_PREFLIGHT_TTL", "300"))
+# answers that do not tell whether the prediction would be accepted
+_INCONCLUSIVE = frozenset((404, 405, 408, 425, 429))
+
+_lock = threading.Lock()
+# client info (key and model) -> monotonic time until which it is trusted
+_valid_until: Dict[Hashable, float] = {}
+
+
+def needed(client_info: Hashable, payload_size: int) -> bool:
+    """
+    Whether a payload of payload_size bytes must be preceded by a check
+    """
+    if not _PREFLIGHT_THRESHOLD or payload_size < _PREFLIGHT_THRESHOLD:
+        return False
+    return _valid_until.get(client_info, 0) < time.monotonic()
+
+
+def rejection(
+    client_info: Hashable, response: httpx.Response
+) -> Optional[FlyMyAIPredictException]:
+    """
+    Verdict of a check; a successful one is cached for FMA_PREFLIGHT_TTL.
+    The response must be read when it is a rejection
+    :return: the exception to raise instead of uploading, None to upload
+    """
+    if response.status_code < 400:
+        with _lock:
+            _valid_until[client_info] = time.monotonic() + _PREFLIGHT_TTL
+        return None
+    if response.status_code >= 500 or response.status_code in _INCONCLUSIVE:
+        return None
+    return FlyMyAIPredictException.from_response(FlyMyAIResponse.from_httpx(response))
+
+
+def _after_fork_in_child():
+    global _lock
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
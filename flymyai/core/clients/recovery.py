@@ -0,0 +1,108 @@
+import collections
+import contextlib
+import logging
+import threading
+from typing import Any, Dict, Iterator, AsyncIterator, Optional
+
+logger = logging.getLogger("flymyai")
+
+
+class ConnectionRecovery:
+    """
+    Rebuilds the httpx client of its owner at most once per failure episode.
+    Every rebuild bumps `generation`: a request that failed on a generation
+    that has already been replaced simply retries on the new client.
+    The replaced client is closed only after the requests still running on it
+    have finished, so a broken connection does not take healthy ones down with it
+    """
+
+    generation: int
+    recoveries: int
+
+    def __init__(self):
+        self.generation = 0
+        self.recoveries = 0
+        self._lock = threading.Lock()
+        self._in_flight: Dict[int, int] = collections.Counter()
+        self._retired: Dict[int, Any] = {}
+
+    def _acquire(self) -> int:
+        with self._lock:
+            generation = self.generation
+            self._in_flight[generation] += 1
+            return generation
+
+    def _release(self, generation: int) -> Optional[Any]:
+        """
+        :return: a retired client nobody uses anymore, to be closed by the caller
+        """
+        with self._lock:
+            self._in_flight[generation] -= 1
+            if self._in_flight[generation]:
+                return None
+            del self._in_flight[generation]
+            return self._retired.pop(generation, None)
+
+    @contextlib.contextmanager
+    def request(self) -> Iterator[int]:
+        """
+        Track a request of a sync client; yields the generation it runs on
+        """
+        generation = self._acquire()
+        try:
+            yield generation
+        finally:
+            _close_quietly(self._release(generation))
+
+    @contextlib.asynccontextmanager
+    async def arequest(self) -> AsyncIterator[int]:
+        """
+        Track a request of an async client; yields the generation it runs on
+        """
+        generation = self._acquire()
+        try:
+            yield generation
+        finally:
+            await _aclose_quietly(self._release(generation))
+
+    def rebuild(self, owner, generation: Optional[int] = None) -> Optional[Any]:
+        """
+        Replace owner._client unless it has already been replaced since `generation`
+        :param generation: generation the failed request ran on, the current one by default
+        :return: the replaced client if it can be closed right away
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return None
+            retired = getattr(owner, "_client", None)
+            owner._client = owner._construct_client()
+            self.generation += 1
+            self.recoveries += 1
+            logger.warning(
+                "FlyMyAI connection lost, rebuilt the HTTP client"
+                " (generation %d, %d recoveries so far)",
+                self.generation,
+                self.recoveries,
+            )
+            if self._in_flight.get(self.generation - 1):
+                self._retired[self.generation - 1] = retired
+                return None
+            return retired
+
+
+def _close_quietly(client):
+    if client is None:
+        return
+    try:
+        client.close()
+    except Exception:
+        pass
+
+
+async def _aclose_quietly(client):
+    if client is None:
+        return
+    try:
+        await client.aclose()
+    except Exception:
+        pass
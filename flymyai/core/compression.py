@@ -0,0 +1,86 @@
+import gzip
+import logging
+import os
+from typing import Callable, Dict, Optional, Tuple
+
+import httpx
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+logger = logging.getLogger("flymyai")
+
+
+def _version(version: str) -> Tuple[int, ...]:
+    return tuple(int(part) for part in version.split(".")[:3] if part.isdigit())
+
+
+# response encodings httpx can decode, most effective first: it decodes
+# br with the same modules as here, and zstd with zstandard since 0.27.1
+ACCEPT_ENCODING = ", ".join(
+    encoding
+    for encoding, available in (
+        ("zstd", zstandard is not None and _version(httpx.__version__) >= (0, 27, 1)),
+        ("br", brotli is not None),
+        ("gzip", True),
+        ("deflate", True),
+    )
+    if available
+)
+
+# request bodies at least this large are compressed, 0 disables (the default):
+# the server must accept a Content-Encoding on requests
+_COMPRESS_THRESHOLD = int(os.getenv("FMA_COMPRESS_THRESHOLD", 0))
+# a compressed body is sent only if it saves at least this fraction
+_COMPRESS_MIN_SAVING = float(os.getenv("FMA_COMPRESS_MIN_SAVING", 0.1))
+
+_COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {
+    "gzip": lambda body: gzip.compress(body, compresslevel=6, mtime=0)
+}
+if brotli is not None:
+    _COMPRESSORS["br"] = lambda body: brotli.compress(body, quality=5)
+if zstandard is not None:
+    _COMPRESSORS["zstd"] = lambda body: zstandard.ZstdCompressor(level=3).compress(body)
+
+_ENCODING = next(
+    encoding for encoding in ("zstd", "br", "gzip") if encoding in _COMPRESSORS
+)
+if os.getenv("FMA_COMPRESS_ENCODING") in _COMPRESSORS:
+    _ENCODING = os.environ["FMA_COMPRESS_ENCODING"]
+elif os.getenv("FMA_COMPRESS_ENCODING"):
+    logger.warning(
+        "FMA_COMPRESS_ENCODING=%s is not available (one of: %s), using %s",
+        os.environ["FMA_COMPRESS_ENCODING"],
+        ", ".join(_COMPRESSORS),
+        _ENCODING,
+    )
+
+# bodies of these types are compressed; multipart uploads carry media
+# (images, audio, video) that is compressed already
+_COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+def compress_body(body: bytes, content_type: str) -> Optional[Tuple[str, bytes]]:
+    """
+    Compress a request body if compression is enabled and worth it
+    for its size and type
+    :return: (Content-Encoding, compressed body), None to send the body as is
+    """
+    if not _COMPRESS_THRESHOLD or len(body) < _COMPRESS_THRESHOLD:
+        return None
+    if not content_type.startswith(_COMPRESSIBLE_TYPES):
+        return None
+    compressed = _COMPRESSORS[_ENCODING](body)
+    if len(compressed) > len(body) * (1 - _COMPRESS_MIN_SAVING):
+        return None
+    return _ENCODING, compressed
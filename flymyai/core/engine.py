@@ -0,0 +1,102 @@
+import asyncio
+import os
+import threading
+from typing import AsyncIterator, Awaitable, Callable, Iterator, Optional, TypeVar
+
+_T = TypeVar("_T")
+
+
+class AsyncEngine:
+    """
+    Event loop running in a background thread.
+    Sync callers submit coroutines to it and block on the result,
+    so any number of caller threads share the loop and its connection pools
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run_forever, name="flymyai-engine", daemon=True
+        )
+        self._thread.start()
+
+    def _run_forever(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, awaitable: Awaitable[_T]) -> _T:
+        """
+        Run a coroutine on the engine and wait for its result.
+        If the caller is interrupted (e.g. KeyboardInterrupt),
+        the coroutine is cancelled on the engine
+        """
+        if threading.current_thread() is self._thread:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise RuntimeError(
+                "Blocking FlyMyAI call made from the engine loop, use AsyncFlyMyAI"
+            )
+        future = asyncio.run_coroutine_threadsafe(awaitable, self.loop)
+        try:
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
+
+    def call(self, fn: Callable[..., _T], *args) -> _T:
+        """
+        Run a plain function on the engine thread, for objects bound to its loop
+        """
+
+        async def call():
+            return fn(*args)
+
+        return self.run(call())
+
+    def submit(self, awaitable: Awaitable) -> None:
+        """
+        Run a coroutine on the engine without waiting for it
+        """
+        asyncio.run_coroutine_threadsafe(awaitable, self.loop)
+
+    def iterate(self, iterator: AsyncIterator[_T]) -> Iterator[_T]:
+        """
+        Sync iterator over an async iterator living on the engine
+        """
+        while True:
+            try:
+                yield self.run(iterator.__anext__())
+            except StopAsyncIteration:
+                return
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+_lock = threading.Lock()
+_engine: Optional[AsyncEngine] = None
+
+
+def get_engine() -> AsyncEngine:
+    """
+    The engine of this process, started on first use
+    """
+    global _engine
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                _engine = AsyncEngine()
+    return _engine
+
+
+def _after_fork_in_child():
+    # the engine thread does not survive a fork: the child starts its own
+    global _engine, _lock
+    _engine = None
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,341 @@
+import json
+import os
+import re
+import tempfile
+import weakref
+from typing import IO, Any, List, Optional
+
+_STRUCTURAL = re.compile(r'[\s,:\[\]{}"]')
+_HIGH_SURROGATE = re.compile(r"\\u[dD][89abAB][0-9a-fA-F]{2}")
+
+
+class SpilledString:
+    """
+    Handle to a large JSON string value written to a temporary file
+    instead of being kept in memory.
+    The file is removed when the handle is garbage collected
+    """
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size  # bytes, utf-8
+        self._finalizer = weakref.finalize(self, _remove, path)
+
+    def open(self, mode: str = "r") -> IO:
+        """
+        :param mode: "r" for text, "rb" for the utf-8 bytes
+        """
+        return open(self.path, mode, **({} if "b" in mode else {"encoding": "utf-8"}))
+
+    def read(self) -> str:
+        with self.open() as file:
+            return file.read()
+
+    def __fspath__(self) -> str:
+        return self.path
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __eq__(self, other):
+        if isinstance(other, str):
+            return self.read() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"SpilledString(path={self.path!r}, size={self.size})"
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _discard(file: IO):
+    file.close()
+    _remove(file.name)
+
+
+class _String:
+    """
+    A string value being parsed; its escaped text is kept until it grows
+    past the spill threshold, then decoded into a temporary file
+    """
+
+    def __init__(self, spill: bool):
+        self.spill = spill
+        self.raw: List[str] = []
+        self.raw_size = 0
+        self.file: Optional[IO] = None
+        self.size = 0
+        # removes the file of a string that is never finished
+        self._finalizer: Optional[weakref.finalize] = None
+
+    def add(self, raw: str, threshold: Optional[int], spill_dir: Optional[str]):
+        self.raw.append(raw)
+        self.raw_size += len(raw)
+        if self.spill and threshold is not None and self.raw_size >= threshold:
+            self._flush(spill_dir, final=False)
+
+    def _flush(self, spill_dir: Optional[str], final: bool):
+        raw = "".join(self.raw)
+        # keep a trailing escape for later: it may be incomplete
+        # or the first half of a surrogate pair
+        cut = len(raw) if final else _safe_cut(raw)
+        if self.file is None:
+            self.file = tempfile.NamedTemporaryFile(
+                "w",
+                encoding="utf-8",
+                suffix=".flymyai",
+                dir=spill_dir,
+                delete=False,
+            )
+            self._finalizer = weakref.finalize(self, _discard, self.file)
+        # plain text (e.g. base64) needs no decoding
+        text = raw[:cut] if "\\" not in raw else json.loads(f'"{raw[:cut]}"')
+        self.file.write(text)
+        self.size += len(text.encode()) if not text.isascii() else len(text)
+        self.raw = [raw[cut:]]
+        self.raw_size = len(raw) - cut
+
+    def value(self, spill_dir: Optional[str]):
+        if self.file is None:
+            return json.loads('"%s"' % "".join(self.raw))
+        self._flush(spill_dir, final=True)
+        self.file.close()
+        # the handle owns the file from now on
+        self._finalizer.detach()
+        return SpilledString(self.file.name, self.size)
+
+    def abort(self):
+        """
+        Close and remove the file of an unfinished string
+        """
+        if self._finalizer is not None:
+            self._finalizer()
+
+
+def _escape_starts_at(raw: str, pos: int) -> bool:
+    """
+    Whether the backslash at pos starts an escape (is not an escaped backslash)
+    """
+    run = 0
+    while pos - run > 0 and raw[pos - run - 1] == "\\":
+        run += 1
+    return run % 2 == 0
+
+
+def _safe_cut(raw: str) -> int:
+    """
+    Length of the prefix of escaped string text that can be decoded on its
+    own: it must not end inside an escape or between the two escapes of a
+    surrogate pair
+    """
+    backslash = raw.rfind("\\", max(0, len(raw) - 12))
+    if backslash == -1:
+        return len(raw)
+    cut = backslash
+    while cut > 0 and raw[cut - 1] == "\\":
+        cut -= 1
+    if (
+        cut >= 6
+        and _HIGH_SURROGATE.fullmatch(raw, cut - 6, cut)
+        and _escape_starts_at(raw, cut - 6)
+    ):
+        cut -= 6
+    return cut
+
+
+class PushJSONParser:
+    """
+    Incremental JSON parser: text is fed in chunks as it arrives.
+    String values (not keys) of at least spill_threshold characters
+    are written to temporary files as they are parsed and returned as
+    SpilledString handles, so they are never held in memory whole
+    """
+
+    def __init__(
+        self, spill_threshold: Optional[int] = None, spill_dir: Optional[str] = None
+    ):
+        self.spill_threshold = spill_threshold
+        self.spill_dir = spill_dir
+        self._buffer = ""
+        # [container, key] for every open object/array
+        self._stack: List[list] = []
+        self._expect = "value"
+        self._string: Optional[_String] = None
+        self._done = False
+        self._result: Any = None
+
+    def feed(self, text: str) -> None:
+        self._buffer = self._buffer + text if self._buffer else text
+        self._parse(final=False)
+
+    def close(self) -> Any:
+        """
+        :return: the parsed document
+        """
+        self._parse(final=True)
+        if not self._done or self._buffer.strip():
+            raise json.JSONDecodeError("Incomplete JSON document", self._buffer, 0)
+        return self._result
+
+    def abort(self) -> None:
+        """
+        Give up on the document: removes the file of a string being spilled
+        """
+        if self._string is not None:
+            self._string.abort()
+            self._string = None
+
+    def _error(self, message: str, pos: int):
+        raise json.JSONDecodeError(message, self._buffer, pos)
+
+    def _emit(self, value: Any):
+        if not self._stack:
+            self._result = value
+            self._done = True
+            self._expect = "end"
+            return
+        container, key = self._stack[-1]
+        if isinstance(container, list):
+            container.append(value)
+        else:
+            container[key] = value
+        self._expect = "comma"
+
+    def _open(self, container):
+        if self._stack:
+            parent, key = self._stack[-1]
+            if isinstance(parent, list):
+                parent.append(container)
+            else:
+                parent[key] = container
+        self._stack.append([container, None])
+
+    def _close(self, char: str, pos: int):
+        container, _ = self._stack.pop()
+        if isinstance(container, list) != (char == "]"):
+            self._error("Mismatched closing bracket", pos)
+        if not self._stack:
+            self._result = container
+            self._done = True
+            self._expect = "end"
+        else:
+            self._expect = "comma"
+
+    def _parse_string(self, buffer: str, pos: int) -> int:
+        """
+        Consume string text from pos; the position after the closing quote,
+        -1 when the buffer ended inside the string,
+        -2 when it ended inside an escape (kept in the buffer)
+        """
+        string = self._string
+        start = pos
+        quote = buffer.find('"', pos)
+        while True:
+            if quote != -1 and quote < pos:
+                quote = buffer.find('"', pos)
+            backslash = buffer.find("\\", pos, len(buffer) if quote == -1 else quote)
+            if backslash == -1:
+                if quote == -1:
+                    string.add(buffer[start:], self.spill_threshold, self.spill_dir)
+                    return -1
+                string.add(buffer[start:quote], self.spill_threshold, self.spill_dir)
+                return quote + 1
+            if backslash + 1 >= len(buffer):
+                # the escaped character is in the next chunk
+                string.add(
+                    buffer[start:backslash], self.spill_threshold, self.spill_dir
+                )
+                self._buffer = buffer[backslash:]
+                return -2
+            pos = backslash + 2
+
+    def _parse(self, final: bool):
+        buffer = self._buffer
+        pos = 0
+        size = len(buffer)
+        while True:
+            if self._string is not None:
+                end = self._parse_string(buffer, pos)
+                if end == -1:
+                    self._buffer = ""
+                    return
+                if end == -2:
+                    return
+                string, self._string = self._string, None
+                pos = end
+                if self._expect == "colon":
+                    self._stack[-1][1] = string.value(self.spill_dir)
+                else:
+                    self._emit(string.value(self.spill_dir))
+                continue
+            while pos < size and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos >= size:
+                self._buffer = ""
+                return
+            char = buffer[pos]
+            expect = self._expect
+            if expect == "end":
+                self._error("Extra data", pos)
+            if expect == "colon":
+                if char != ":":
+                    self._error("Expecting ':' delimiter", pos)
+                self._expect = "value"
+                pos += 1
+                continue
+            if expect == "comma":
+                if char == ",":
+                    is_object = isinstance(self._stack[-1][0], dict)
+                    self._expect = "key" if is_object else "value"
+                    pos += 1
+                elif char in "]}":
+                    self._close(char, pos)
+                    pos += 1
+                else:
+                    self._error("Expecting ',' delimiter", pos)
+                continue
+            if expect in ("key", "key_or_end"):
+                if char == "}" and expect == "key_or_end":
+                    self._close(char, pos)
+                    pos += 1
+                    continue
+                if char != '"':
+                    self._error("Expecting property name", pos)
+                self._string = _String(spill=False)
+                self._expect = "colon"
+                pos += 1
+                continue
+            # a value
+            if char == "]" and expect == "value_or_end":
+                self._close(char, pos)
+                pos += 1
+            elif char == '"':
+                self._string = _String(spill=True)
+                self._expect = "value"
+                pos += 1
+            elif char == "{":
+                self._open({})
+                self._expect = "key_or_end"
+                pos += 1
+            elif char == "[":
+                self._open([])
+                self._expect = "value_or_end"
+                pos += 1
+            else:
+                # number, true, false, null: may continue in the next chunk
+                match = _STRUCTURAL.search(buffer, pos)
+                if match is None and not final:
+                    self._buffer = buffer[pos:]
+                    return
+                end = size if match is None else match.start()
+                try:
+                    value = json.loads(buffer[pos:end])
+                except json.JSONDecodeError:
+                    self._error("Expecting value", pos)
+                self._emit(value)
+                pos = end
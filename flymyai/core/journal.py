@@ -0,0 +1,126 @@
+import dataclasses
+import hashlib
+import io
+import json
+import pathlib
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Union
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS prediction_tasks (
+    prediction_id TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    payload_hash TEXT NOT NULL,
+    submitted_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS prediction_tasks_pending
+    ON prediction_tasks (model, payload_hash) WHERE finished_at IS NULL;
+"""
+
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+def _hash_binary(digest, value):
+    if isinstance(value, bytes):
+        digest.update(value)
+        return
+    if isinstance(value, pathlib.Path):
+        with value.open("rb") as f:
+            while chunk := f.read(_HASH_CHUNK_SIZE):
+                digest.update(chunk)
+        return
+    position = value.tell()
+    while chunk := value.read(_HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    value.seek(position)
+
+
+def payload_hash(payload: dict) -> str:
+    """
+    Stable sha256 of a prediction payload; binary inputs are hashed by content
+    """
+    digest = hashlib.sha256()
+    for key in sorted(payload):
+        value = payload[key]
+        digest.update(json.dumps(key).encode())
+        if isinstance(value, (bytes, pathlib.Path, io.BufferedIOBase)):
+            _hash_binary(digest, value)
+        else:
+            digest.update(json.dumps(value, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+@dataclasses.dataclass
+class JournalEntry:
+    prediction_id: str
+    model: str
+    payload_hash: str
+    submitted_at: float
+    finished_at: Optional[float] = None
+
+
+class TaskJournal:
+    """
+    Durable SQLite journal of submitted async prediction tasks.
+    Pass it to a client (journal=...) to survive restarts: unfinished tasks
+    are returned by client.resume_tasks(), and predict_async_task(dedupe=True)
+    does not submit an identical payload twice. API keys are never written
+    to the journal
+    """
+
+    def __init__(self, path: Union[str, pathlib.Path]):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+    def record(self, prediction_id: str, model: str, payload_digest: str):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO prediction_tasks"
+                " (prediction_id, model, payload_hash, submitted_at)"
+                " VALUES (?, ?, ?, ?)",
+                (prediction_id, model, payload_digest, time.time()),
+            )
+
+    def finish(self, prediction_id: str):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE prediction_tasks SET finished_at = ?"
+                " WHERE prediction_id = ? AND finished_at IS NULL",
+                (time.time(), prediction_id),
+            )
+
+    def find_pending(self, model: str, payload_digest: str) -> Optional[str]:
+        """
+        prediction_id of an unfinished task submitted with the same payload
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT prediction_id FROM prediction_tasks"
+                " WHERE model = ? AND payload_hash = ? AND finished_at IS NULL"
+                " ORDER BY submitted_at LIMIT 1",
+                (model, payload_digest),
+            ).fetchone()
+        return row[0] if row else None
+
+    def pending(self, model: Optional[str] = None) -> List[JournalEntry]:
+        query = "SELECT * FROM prediction_tasks WHERE finished_at IS NULL"
+        params = ()
+        if model:
+            query += " AND model = ?"
+            params = (model,)
+        with self._lock:
+            rows = self._connection.execute(
+                query + " ORDER BY submitted_at", params
+            ).fetchall()
+        return [JournalEntry(*row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -25,9 +25,15 @@ class BaseFromServer(pydantic.BaseModel):
     def from_response(cls, response: FlyMyAIResponse, **kwargs):
         status_code = kwargs.pop("status", response.status_code)
         response_json = response.json()
-        response_json["status"] = response_json.get("status", status_code)
         ctx = kwargs.pop("context", None)
-        self = cls.model_validate(dict(**response_json, **kwargs), context=ctx)
+        self = cls.model_validate(
+            {
+                **response_json,
+                "status": response_json.get("status", status_code),
+                **kwargs,
+            },
+            context=ctx,
+        )
         self._response = response
         return self
 
@@ -44,6 +50,8 @@ class PredictionResponse(BasePredictionResponse):
 
     status: int
     inference_time: Optional[float] = None
+    # bytes image preprocessing took off the upload, see ImageOptions
+    upload_bytes_saved: Optional[int] = None
 
     @property
     def response(self):
@@ -128,6 +136,10 @@ class AsyncPredictionTask(BaseFromServer, Generic[_ClientT]):
     def client_info(self, v: APIKeyClientInfo):
         self._client_info = v
 
+    @property
+    def client(self) -> Optional[_ClientT]:
+        return self._affiliated_client
+
     def set_client(self, client: _ClientT):
         self._affiliated_client = client
 
@@ -0,0 +1,46 @@
+import asyncio
+import json
+import os
+from concurrent.futures import Executor
+from typing import Any, Callable, Optional, TypeVar, Union
+
+_T = TypeVar("_T")
+
+# responses at least this large (bytes of JSON text) are parsed off the event loop
+_OFFLOAD_THRESHOLD = int(os.getenv("FMA_OFFLOAD_THRESHOLD", 1024 * 1024))
+
+# None: the default executor of the running loop
+_executor: Optional[Executor] = None
+
+
+def set_offload_executor(executor: Optional[Executor]) -> None:
+    """
+    Executor running offloaded work (e.g. a ProcessPoolExecutor).
+    Offloaded callables and their arguments must be picklable for a process pool
+    :param executor: None restores the default executor of the loop
+    """
+    global _executor
+    _executor = executor
+
+
+def should_offload(size: int) -> bool:
+    return size >= _OFFLOAD_THRESHOLD
+
+
+async def offload(fn: Callable[..., _T], *args) -> _T:
+    """
+    Run fn(*args) in the offload executor, keeping the event loop responsive
+    """
+    return await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+
+
+async def loads(text: Union[str, bytes]) -> Any:
+    """
+    json.loads(text) in the offload executor.
+    Executors with their own loads coroutine (see ProcessCodec)
+    receive the text through shared memory instead of a pickle
+    """
+    executor_loads = getattr(_executor, "loads", None)
+    if executor_loads is not None:
+        return await executor_loads(text)
+    return await offload(json.loads, text)
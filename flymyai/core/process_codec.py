@@ -0,0 +1,73 @@
+import asyncio
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Optional, Union
+
+from flymyai.core import offload
+
+
+def _loads_shared(name: str, size: int) -> Any:
+    shared = SharedMemory(name=name)
+    view = shared.buf[:size]
+    try:
+        return json.loads(str(view, "utf-8"))
+    finally:
+        view.release()
+        shared.close()
+
+
+class ProcessCodec(ProcessPoolExecutor):
+    """
+    Process pool parsing the JSON of large prediction results.
+    The text is handed to workers through shared memory; the result comes
+    back pickled, which costs the event loop a fraction of the parsing.
+    It pays off only with spare CPU cores for its workers.
+    Install it with flymyai.core.offload.set_offload_executor(codec)
+    to parse large responses of async clients (predict, stream,
+    prediction_task_result, as_completed, wait_all) in its workers
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        min_size: Optional[int] = None,
+        mp_context=None,
+    ):
+        """
+        :param max_workers: one per CPU but the one running the event loop
+        :param min_size: smaller inputs are handled inline,
+            FMA_OFFLOAD_THRESHOLD by default
+        :param mp_context: spawn by default: workers do not inherit
+            the threads and connections of the client process
+        """
+        super().__init__(
+            max_workers or max(1, (os.cpu_count() or 2) - 1),
+            mp_context=mp_context or multiprocessing.get_context("spawn"),
+        )
+        self.min_size = offload._OFFLOAD_THRESHOLD if min_size is None else min_size
+
+    async def loads(self, text: Union[str, bytes]) -> Any:
+        """
+        json.loads(text) in a worker
+        """
+        if len(text) < self.min_size:
+            return json.loads(text)
+        data = text.encode() if isinstance(text, str) else text
+        size = len(data)
+        shared = SharedMemory(create=True, size=max(size, 1))
+        try:
+            shared.buf[:size] = data
+            return await asyncio.get_running_loop().run_in_executor(
+                self, _loads_shared, shared.name, size
+            )
+        finally:
+            shared.close()
+            shared.unlink()
+
+    def shutdown(self, wait: bool = True, **kwargs) -> None:
+        if offload._executor is self:
+            offload.set_offload_executor(None)
+        super().shutdown(wait, **kwargs)
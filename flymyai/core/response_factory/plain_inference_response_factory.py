@@ -26,6 +26,18 @@ class SSEInferenceResponseFactory(ResponseFactory):
             "status", self.httpx_response.status_code if self.httpx_response else 200
         )
 
+    @staticmethod
+    def _event_headers(headers) -> httpx.Headers:
+        """
+        Headers of the stream for a response made of one of its events:
+        the event is decoded already, the stream's encoding and length do not apply
+        """
+        headers = httpx.Headers(headers)
+        for name in ("Content-Encoding", "Content-Length"):
+            if name in headers:
+                del headers[name]
+        return headers
+
     def _base_construct_from_sse(self):
         sse_status = self.get_sse_status_code()
         is_details = self.sse.json().get("details") is not None
@@ -36,20 +48,24 @@ class SSEInferenceResponseFactory(ResponseFactory):
                 status_code=sse_status,
                 content=self.sse.data or self.sse.event,
                 request=self.httpx_request,
-                headers=self.httpx_response.headers or self.sse.headers,
+                headers=self._event_headers(
+                    self.httpx_response.headers or self.sse.headers
+                ),
             )
             response.is_event = self.sse.event is not None
+            response._json = self.sse.json()
             return response
         else:
-            raise BaseFlyMyAIException.from_response(
-                FlyMyAIResponse(
-                    status_code=sse_status,
-                    content=self.sse.data or self.sse.event,
-                    request=self.httpx_request,
-                    headers=self.httpx_response.headers
-                    or getattr(self.sse, "headers", {}),
-                )
+            response = FlyMyAIResponse(
+                status_code=sse_status,
+                content=self.sse.data or self.sse.event,
+                request=self.httpx_request,
+                headers=self._event_headers(
+                    self.httpx_response.headers or getattr(self.sse, "headers", {})
+                ),
             )
+            response._json = self.sse.json()
+            raise BaseFlyMyAIException.from_response(response)
 
     def construct(self):
         if self.sse:
@@ -0,0 +1,119 @@
+import asyncio
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from flymyai.core.clients.base_client import BaseClient
+from flymyai.core.models.successful_responses import PredictionPartial
+from flymyai.core.stream_iterators.AsyncPredictionStream import AsyncPredictionStream
+
+_STREAM_END = object()
+
+
+class AsyncMultiPredictionStream:
+    """
+    Merges several prediction streams into a single async iterator.
+    Yields (index, PredictionPartial) tuples in the order partials arrive,
+    index being the position of the payload in the input sequence.
+    All streams share the underlying client (and its HTTP/2 connections).
+    """
+
+    streams: List[AsyncPredictionStream]
+    return_exceptions: bool = False
+
+    _client: BaseClient
+
+    def __init__(
+        self,
+        client: BaseClient,
+        payloads: Iterable[dict],
+        model: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        return_exceptions: bool = False,
+    ):
+        self._client = client
+        self.streams = [client.stream(payload, model) for payload in payloads]
+        self.return_exceptions = return_exceptions
+        self._concurrency = concurrency or len(self.streams) or 1
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._cancelled: Set[int] = set()
+        self._queue: Optional[asyncio.Queue] = None
+        self._running = 0
+
+    def __aiter__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    @property
+    def stream_details(self):
+        """
+        StreamDetails of every stream (None until a stream has finished)
+        """
+        return [getattr(stream, "stream_details", None) for stream in self.streams]
+
+    def _start(self):
+        self._queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(self._concurrency)
+        for index in range(len(self.streams)):
+            if index in self._cancelled:
+                continue
+            self._tasks[index] = asyncio.ensure_future(self._pump(index, semaphore))
+        self._running = len(self._tasks)
+
+    async def _pump(self, index: int, semaphore: asyncio.Semaphore):
+        try:
+            async with semaphore:
+                async for partial in self.streams[index]:
+                    self._queue.put_nowait((index, partial))
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self._queue.put_nowait((index, e))
+        finally:
+            self._queue.put_nowait((index, _STREAM_END))
+
+    async def __anext__(self) -> Tuple[int, Union[PredictionPartial, BaseException]]:
+        if self._queue is None:
+            self._start()
+        while self._running:
+            index, item = await self._queue.get()
+            if item is _STREAM_END:
+                self._running -= 1
+                continue
+            if isinstance(item, BaseException) and not self.return_exceptions:
+                # the consumer may not close us: stop the other streams now
+                await self.aclose()
+                raise item
+            return index, item
+        raise StopAsyncIteration()
+
+    async def cancel(self, index: int):
+        """
+        Stop consuming a single stream and cancel its prediction on the server
+        (if the prediction_id has already been obtained)
+        """
+        self._cancelled.add(index)
+        task = self._tasks.get(index)
+        if task and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await self.streams[index].aclose(cancel=True)
+        await self._client._wait_background_tasks()
+
+    async def aclose(self):
+        """
+        Stop consuming every stream that is still running,
+        cancelling their predictions unless cancel_on_close is False
+        """
+        for index in range(len(self.streams)):
+            self._cancelled.add(index)
+        tasks = [task for task in self._tasks.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for stream in self.streams:
+            await stream.aclose()
+        await self._client._wait_background_tasks()
@@ -1,17 +1,25 @@
 import asyncio
-from typing import AsyncIterator, TypeVar, Callable, Union, Awaitable
+from typing import AsyncIterator, TypeVar, Callable, Union, Awaitable, Optional
+
+import httpx
 
 from flymyai.core._response import FlyMyAIResponse
 from flymyai.core.authorizations import APIKeyClientInfo
 from flymyai.core.clients.base_client import BaseClient
-from flymyai.core.exceptions import BaseFlyMyAIException
+from flymyai.core.exceptions import (
+    BaseFlyMyAIException,
+    RetryTimeoutExceededException,
+)
 from flymyai.core.models.successful_responses import (
     StreamDetails,
     PredictionPartial,
     PredictionEvent,
 )
+from flymyai.core.stream_iterators.dispatchers import AsyncCallbackDispatcher
 from flymyai.core.stream_iterators.exceptions import StreamCancellationException
+from flymyai.core.stream_iterators.metrics import StreamMetrics
 from flymyai.core.types.event_types import EventType
+from flymyai.utils.deadline import Deadline
 
 _AsyncEventCallbackType = TypeVar(
     "_AsyncEventCallbackType",
@@ -19,43 +27,134 @@ _AsyncEventCallbackType = TypeVar(
         Callable[[PredictionEvent], None], Callable[[PredictionEvent], Awaitable[None]]
     ],
 )
+_AsyncMetricsCallbackType = TypeVar(
+    "_AsyncMetricsCallbackType",
+    bound=Union[
+        Callable[[StreamMetrics], None], Callable[[StreamMetrics], Awaitable[None]]
+    ],
+)
 
 
 class AsyncPredictionStream:
     stream_details: StreamDetails
 
     event_callback: _AsyncEventCallbackType = None
+    metrics_callback: _AsyncMetricsCallbackType = None
+    metrics: StreamMetrics
+    dispatcher: Optional[AsyncCallbackDispatcher] = None
 
     prediction_id: str
 
     follow_cancelling: bool = True
+    cancel_on_close: bool = True
+    deadline: Optional[Deadline] = None
 
     _client: BaseClient
     _client_info: APIKeyClientInfo
+    _finished: bool = False
+    _closed: bool = False
+    _cancel_requested: bool = False
+    _expired: bool = False
 
     def __init__(
         self,
         response_iterator: AsyncIterator,
         client: BaseClient,
         client_info: APIKeyClientInfo,
+        deadline: Optional[Deadline] = None,
     ):
         self.response_iterator = response_iterator
         self._client = client
         self._client_info = client_info
+        self.metrics = StreamMetrics()
+        self.deadline = deadline
 
     async def cancel(self):
         if not hasattr(self, "prediction_id"):
             raise StreamCancellationException("No prediction_id obtained!")
+        self._cancel_requested = True
         return await self._client.cancel_prediction(
             self.prediction_id, client_info=self._client_info
         )
 
+    def _should_cancel(self, cancel: Optional[bool] = None) -> bool:
+        if cancel is None:
+            cancel = self.cancel_on_close
+        return (
+            cancel
+            and not self._finished
+            and not self._cancel_requested
+            and hasattr(self, "prediction_id")
+        )
+
+    async def aclose(self, cancel: Optional[bool] = None):
+        """
+        Close the underlying HTTP stream.
+        A stream closed before its end also cancels the prediction on the server,
+        unless cancel (self.cancel_on_close by default) is False
+        """
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            await self.response_iterator.aclose()
+            if self._should_cancel(cancel):
+                self._cancel_requested = True
+                await self._client._cancel_quietly(
+                    self.prediction_id, self._client_info
+                )
+        finally:
+            await self._flush_callbacks()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    def __del__(self):
+        # the garbage collector may run this on any thread
+        if self.dispatcher is not None:
+            self.dispatcher.stop()
+        if self._closed or not self._should_cancel():
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._cancel_abandoned()
+
     def __aiter__(self):
         return self
 
     def set_on_event(self, callback_or_coro: _AsyncEventCallbackType):
         self.event_callback = callback_or_coro
 
+    def set_on_metrics(self, callback_or_coro: _AsyncMetricsCallbackType):
+        """
+        Call back with self.metrics every time a partial with tokens arrives
+        """
+        self.metrics_callback = callback_or_coro
+
+    def set_dispatcher(self, dispatcher: AsyncCallbackDispatcher):
+        """
+        Use a custom dispatcher (queue size, executor, on_error) for callbacks
+        """
+        self.dispatcher = dispatcher
+
+    async def _dispatch(self, callback: Callable, arg):
+        if self.dispatcher is None:
+            self.dispatcher = AsyncCallbackDispatcher()
+        await self.dispatcher.submit(callback, arg)
+
+    async def _flush_callbacks(self):
+        if self.dispatcher is not None:
+            await self.dispatcher.aclose()
+
+    async def _update_metrics(self, partial: PredictionPartial):
+        if self.metrics.record_partial(partial.output_data) and self.metrics_callback:
+            await self._dispatch(self.metrics_callback, self.metrics.snapshot())
+
     async def loop_iter(self):
         response_end = None
         while not response_end:
@@ -65,34 +164,80 @@ class AsyncPredictionStream:
                 return response_end
             else:
                 evt = PredictionEvent.from_response(next_resp)
-                if not self.event_callback:
-                    pass
-                else:
-                    coro_or_res = self.event_callback(evt)
-                    if asyncio.iscoroutine(coro_or_res):
-                        asyncio.run_coroutine_threadsafe(
-                            coro_or_res, asyncio.get_event_loop()
-                        )
-                if self.follow_cancelling and evt.event_type == EventType.CANCELLING:
-                    raise StopAsyncIteration
                 if evt.event_type == EventType.STREAM_ID:
                     self.prediction_id = evt.prediction_id
+                if self.event_callback:
+                    await self._dispatch(self.event_callback, evt)
+                if self.follow_cancelling and evt.event_type == EventType.CANCELLING:
+                    raise StopAsyncIteration
+
+    def _cancel_abandoned(self):
+        """
+        Cancel the prediction on the server when the consuming task is cancelled
+        or the stream is dropped before its end
+        """
+        if self._should_cancel():
+            self._cancel_requested = True
+            self._client._cancel_in_background(self.prediction_id, self._client_info)
+
+    async def _next_response(self) -> FlyMyAIResponse:
+        if self.deadline is None:
+            return await self.loop_iter()
+        try:
+            return await asyncio.wait_for(self.loop_iter(), self.deadline.remaining())
+        except asyncio.TimeoutError as e:
+            await self._expire(e)
+
+    async def _expire(self, cause: Optional[BaseException] = None):
+        """
+        The deadline is over: close the stream, cancelling the prediction
+        """
+        self._expired = True
+        await self.aclose()
+        raise RetryTimeoutExceededException(
+            f"Deadline of {self.deadline.seconds}s exceeded"
+        ) from cause
 
     async def __anext__(self):
+        if self.deadline is not None and self.deadline.expired:
+            await self._expire()
         response_end = None
+        cancelled = False
+        self.metrics.start()
         try:
-            response_end = await self.loop_iter()
-            return PredictionPartial.from_response(response_end)
+            response_end = await self._next_response()
+            partial = PredictionPartial.from_response(response_end)
+            await self._update_metrics(partial)
+            return partial
         except BaseFlyMyAIException as e:
             response_end = e.response
+            self._finished = True
+            await self._flush_callbacks()
+            raise e
+        except asyncio.CancelledError:
+            cancelled = True
+            self._cancel_abandoned()
+            if self.dispatcher is not None:
+                self.dispatcher.stop()
+            raise
+        except httpx.TimeoutException as e:
+            if self.deadline is not None and self.deadline.expired:
+                await self._expire(e)
             raise e
         except Exception as e:
             raise e
         finally:
-            if not response_end:
+            if response_end:
+                self._update_stream_details(response_end)
+            elif not cancelled and not self._expired:
+                self._finished = True
+                await self._flush_callbacks()
                 raise StopAsyncIteration()
-            stream_details_marshalled = response_end.json().get("stream_details")
-            if stream_details_marshalled:
-                self.stream_details = StreamDetails.model_validate(
-                    stream_details_marshalled
-                )
+
+    def _update_stream_details(self, response_end: FlyMyAIResponse):
+        stream_details_marshalled = response_end.json().get("stream_details")
+        if stream_details_marshalled:
+            self.stream_details = StreamDetails.model_validate(
+                stream_details_marshalled
+            )
+            self.metrics.output_tokens = self.stream_details.output_tokens
@@ -0,0 +1,68 @@
+from typing import Optional
+
+from flymyai.core.engine import AsyncEngine
+from flymyai.core.models.successful_responses import PredictionPartial
+from flymyai.core.stream_iterators.AsyncPredictionStream import AsyncPredictionStream
+
+
+class EnginePredictionStream:
+    """
+    Sync view of an AsyncPredictionStream consumed on the AsyncEngine.
+    Other attributes (stream_details, metrics, prediction_id, set_on_event, ...)
+    are those of the underlying stream; callbacks run on the engine thread
+    """
+
+    _closed: bool = False
+
+    def __init__(self, stream: AsyncPredictionStream, engine: AsyncEngine):
+        self._stream = stream
+        self._engine = engine
+
+    @property
+    def cancel_on_close(self) -> bool:
+        return self._stream.cancel_on_close
+
+    @cancel_on_close.setter
+    def cancel_on_close(self, value: bool):
+        self._stream.cancel_on_close = value
+
+    def __getattr__(self, name: str):
+        if name == "_stream":
+            raise AttributeError(name)
+        return getattr(self._stream, name)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> PredictionPartial:
+        try:
+            return self._engine.run(self._stream.__anext__())
+        except StopAsyncIteration:
+            raise StopIteration()
+
+    def cancel(self):
+        return self._engine.run(self._stream.cancel())
+
+    def close(self, cancel: Optional[bool] = None):
+        """
+        See AsyncPredictionStream.aclose
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._engine.run(self._stream.aclose(cancel))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __del__(self):
+        if self._closed or "_stream" not in self.__dict__:
+            return
+        try:
+            # never block here: the garbage collector may run on the engine thread
+            self._engine.submit(self._stream.aclose())
+        except Exception:
+            pass
@@ -1,51 +1,167 @@
+import sys
+import warnings
 from typing import Optional, Iterator, TypeVar, Callable
 
+import httpx
+
 from flymyai.core._response import FlyMyAIResponse
 from flymyai.core.authorizations import APIKeyClientInfo
 from flymyai.core.clients.base_client import BaseClient
-from flymyai.core.exceptions import BaseFlyMyAIException
+from flymyai.core.exceptions import (
+    BaseFlyMyAIException,
+    RetryTimeoutExceededException,
+)
 from flymyai.core.models.successful_responses import (
     StreamDetails,
     PredictionPartial,
     PredictionEvent,
 )
+from flymyai.core.stream_iterators.dispatchers import CallbackDispatcher
 from flymyai.core.stream_iterators.exceptions import StreamCancellationException
+from flymyai.core.stream_iterators.metrics import StreamMetrics
 from flymyai.core.types.event_types import EventType
+from flymyai.utils.deadline import Deadline
 
 _SyncEventCallbackType = TypeVar(
     "_SyncEventCallbackType", bound=Callable[[PredictionEvent], None]
 )
+_SyncMetricsCallbackType = TypeVar(
+    "_SyncMetricsCallbackType", bound=Callable[[StreamMetrics], None]
+)
 
 
 class PredictionStream:
     stream_details: StreamDetails
     event_callback: _SyncEventCallbackType = None
+    metrics_callback: _SyncMetricsCallbackType = None
+    metrics: StreamMetrics
+    dispatcher: Optional[CallbackDispatcher] = None
     prediction_id: str
     follow_cancelling: bool = True
+    cancel_on_close: bool = True
+    deadline: Optional[Deadline] = None
 
     _client: BaseClient
     _client_info: APIKeyClientInfo
+    _finished: bool = False
+    _closed: bool = False
+    _cancel_requested: bool = False
+    _expired: bool = False
 
     def __init__(
         self,
         response_iterator: Iterator,
         client: BaseClient,
         client_info: APIKeyClientInfo,
+        deadline: Optional[Deadline] = None,
     ):
         self.response_iterator = response_iterator
         self._client = client
         self._client_info = client_info
+        self.metrics = StreamMetrics()
+        self.deadline = deadline
 
     def cancel(self):
         if not hasattr(self, "prediction_id"):
             raise StreamCancellationException("No prediction_id obtained!")
+        self._cancel_requested = True
         return self._client.cancel_prediction(
             self.prediction_id, client_info=self._client_info
         )
 
+    def _should_cancel(self, cancel: Optional[bool] = None) -> bool:
+        if cancel is None:
+            cancel = self.cancel_on_close
+        return (
+            cancel
+            and not self._finished
+            and not self._cancel_requested
+            and hasattr(self, "prediction_id")
+        )
+
+    def close(self, cancel: Optional[bool] = None):
+        """
+        Close the underlying HTTP stream.
+        A stream closed before its end also cancels the prediction on the server,
+        unless cancel (self.cancel_on_close by default) is False
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self.response_iterator.close()
+        if self._should_cancel(cancel):
+            self._cancel_requested = True
+            self._client._cancel_quietly(self.prediction_id, self._client_info)
+        self._flush_callbacks()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __del__(self):
+        if self._closed or "response_iterator" not in self.__dict__:
+            return
+        self._closed = True
+        if not self._finished:
+            warnings.warn(f"{self!r} was not closed", ResourceWarning, source=self)
+        try:
+            self.response_iterator.close()
+        except Exception:
+            pass
+        # no blocking I/O in a finalizer: the cancel request runs in a thread,
+        # and none is started while the interpreter shuts down
+        if self._should_cancel() and not sys.is_finalizing():
+            self._cancel_requested = True
+            self._client._cancel_in_background(self.prediction_id, self._client_info)
+
     def set_on_event(self, callback: _SyncEventCallbackType):
         self.event_callback = callback
 
+    def set_on_metrics(self, callback: _SyncMetricsCallbackType):
+        """
+        Call back with self.metrics every time a partial with tokens arrives
+        """
+        self.metrics_callback = callback
+
+    def set_dispatcher(self, dispatcher: CallbackDispatcher):
+        """
+        Use a custom dispatcher (queue size, executor, on_error) for callbacks
+        """
+        self.dispatcher = dispatcher
+
+    def _dispatch(self, callback: Callable, arg):
+        if self.dispatcher is None:
+            self.dispatcher = CallbackDispatcher()
+        self.dispatcher.submit(callback, arg)
+
+    def _flush_callbacks(self):
+        if self.dispatcher is not None:
+            self.dispatcher.flush()
+
+    def _update_metrics(self, partial: PredictionPartial):
+        if self.metrics.record_partial(partial.output_data) and self.metrics_callback:
+            self._dispatch(self.metrics_callback, self.metrics.snapshot())
+
+    def _expire(self, cause: Optional[BaseException] = None):
+        """
+        The deadline is over: close the stream, cancelling the prediction
+        """
+        self._expired = True
+        self.close()
+        raise RetryTimeoutExceededException(
+            f"Deadline of {self.deadline.seconds}s exceeded"
+        ) from cause
+
+    def _update_stream_details(self, response_end: FlyMyAIResponse):
+        stream_details_marshalled = response_end.json().get("stream_details")
+        if stream_details_marshalled:
+            self.stream_details = StreamDetails.model_validate(
+                stream_details_marshalled
+            )
+            self.metrics.output_tokens = self.stream_details.output_tokens
+
     def __iter__(self):
         return self
 
@@ -61,25 +177,35 @@ class PredictionStream:
                 if evt.event_type == EventType.STREAM_ID:
                     self.prediction_id = evt.prediction_id
                 if self.event_callback:
-                    self.event_callback(evt)
+                    self._dispatch(self.event_callback, evt)
                 if self.follow_cancelling and evt.event_type == EventType.CANCELLING:
                     raise StopIteration
 
     def __next__(self):
+        if self.deadline is not None and self.deadline.expired:
+            self._expire()
         response_end = None
+        self.metrics.start()
         try:
             response_end = self.loop_iter()
-            return PredictionPartial.from_response(response_end)
+            partial = PredictionPartial.from_response(response_end)
+            self._update_metrics(partial)
+            return partial
         except BaseFlyMyAIException as e:
             response_end = e.response
+            self._finished = True
+            self._flush_callbacks()
+            raise e
+        except httpx.TimeoutException as e:
+            if self.deadline is not None and self.deadline.expired:
+                self._expire(e)
             raise e
         except Exception as e:
             raise e
         finally:
-            if not response_end:
+            if response_end:
+                self._update_stream_details(response_end)
+            elif not self._expired:
+                self._finished = True
+                self._flush_callbacks()
                 raise StopIteration()
-            stream_details_marshalled = response_end.json().get("stream_details")
-            if stream_details_marshalled:
-                self.stream_details = StreamDetails.model_validate(
-                    stream_details_marshalled
-                )
@@ -0,0 +1,199 @@
+import asyncio
+import concurrent.futures
+import logging
+import os
+import queue
+import threading
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger("flymyai")
+
+_CALLBACK_QUEUE_SIZE = int(os.getenv("FMA_CALLBACK_QUEUE_SIZE", "1024"))
+
+_shared_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_shared_executor_lock = threading.Lock()
+
+
+def _callbacks_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _shared_executor
+    with _shared_executor_lock:
+        if _shared_executor is None:
+            _shared_executor = concurrent.futures.ThreadPoolExecutor(
+                thread_name_prefix="flymyai-callbacks"
+            )
+        return _shared_executor
+
+
+def _after_fork_in_child():
+    # the workers of the executor do not survive a fork, though it counts
+    # them as idle: the child starts its own executor
+    global _shared_executor, _shared_executor_lock
+    _shared_executor = None
+    _shared_executor_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+_ErrorCallbackType = Callable[[BaseException, Any], None]
+
+
+class _BaseCallbackDispatcher:
+    errors: List[BaseException]
+    on_error: Optional[_ErrorCallbackType] = None
+
+    def __init__(
+        self,
+        maxsize: int = _CALLBACK_QUEUE_SIZE,
+        executor: Optional[concurrent.futures.Executor] = None,
+        on_error: Optional[_ErrorCallbackType] = None,
+    ):
+        self.maxsize = maxsize
+        self.errors = []
+        self.on_error = on_error
+        self._executor = executor
+
+    @property
+    def executor(self) -> concurrent.futures.Executor:
+        return self._executor or _callbacks_executor()
+
+    def _report(self, exc: BaseException, arg: Any):
+        logger.error("FlyMyAI stream callback failed on %r", arg, exc_info=exc)
+        self.errors.append(exc)
+        if self.on_error:
+            try:
+                self.on_error(exc, arg)
+            except Exception:
+                logger.exception("FlyMyAI stream on_error callback failed")
+
+
+class CallbackDispatcher(_BaseCallbackDispatcher):
+    """
+    Runs stream callbacks on an executor, one at a time and in submission order,
+    so that a slow callback does not stall the stream.
+    submit() blocks only when `maxsize` callbacks are already waiting
+    """
+
+    def __init__(
+        self,
+        maxsize: int = _CALLBACK_QUEUE_SIZE,
+        executor: Optional[concurrent.futures.Executor] = None,
+        on_error: Optional[_ErrorCallbackType] = None,
+    ):
+        super().__init__(maxsize, executor, on_error)
+        self._queue = queue.Queue(maxsize)
+        self._lock = threading.Lock()
+        self._draining = False
+        self._idle = threading.Event()
+        self._idle.set()
+
+    def submit(self, callback: Callable[[Any], Any], arg: Any):
+        self._queue.put((callback, arg))
+        with self._lock:
+            if self._draining:
+                return
+            self._draining = True
+            self._idle.clear()
+        self.executor.submit(self._drain)
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                try:
+                    callback, arg = self._queue.get_nowait()
+                except queue.Empty:
+                    self._draining = False
+                    self._idle.set()
+                    return
+            try:
+                callback(arg)
+            except Exception as e:
+                self._report(e, arg)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every submitted callback has been called
+        """
+        return self._idle.wait(timeout)
+
+
+class AsyncCallbackDispatcher(_BaseCallbackDispatcher):
+    """
+    Asynchronous counterpart of CallbackDispatcher.
+    Coroutine callbacks are awaited on the running loop, plain callables
+    are run on the executor; either way one at a time and in submission order
+    """
+
+    def __init__(
+        self,
+        maxsize: int = _CALLBACK_QUEUE_SIZE,
+        executor: Optional[concurrent.futures.Executor] = None,
+        on_error: Optional[_ErrorCallbackType] = None,
+    ):
+        super().__init__(maxsize, executor, on_error)
+        self._queue: Optional[asyncio.Queue] = None
+        self._consumer: Optional[asyncio.Task] = None
+
+    async def submit(self, callback: Callable[[Any], Any], arg: Any):
+        if self._queue is None:
+            self._queue = asyncio.Queue(self.maxsize)
+        if self._consumer is None or self._consumer.done():
+            self._consumer = asyncio.ensure_future(self._consume())
+        await self._queue.put((callback, arg))
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            callback, arg = await self._queue.get()
+            try:
+                if asyncio.iscoroutinefunction(callback):
+                    await callback(arg)
+                else:
+                    res = await loop.run_in_executor(self.executor, callback, arg)
+                    if asyncio.iscoroutine(res):
+                        await res
+            except Exception as e:
+                self._report(e, arg)
+            finally:
+                self._queue.task_done()
+
+    async def flush(self):
+        """
+        Wait until every submitted callback has been called
+        """
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def aclose(self):
+        try:
+            await self.flush()
+        finally:
+            consumer = self.stop()
+            if consumer is not None:
+                await asyncio.gather(consumer, return_exceptions=True)
+
+    def stop(self) -> Optional[asyncio.Task]:
+        """
+        Cancel the consumer without waiting for the callbacks still queued,
+        where awaiting is not possible (cancelled tasks, finalizers).
+        Safe to call from any thread, e.g. a garbage collection
+        :return: the cancelled consumer task
+        """
+        consumer, self._consumer = self._consumer, None
+        if consumer is None or consumer.done():
+            return None
+        loop = consumer.get_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        try:
+            if running is loop:
+                consumer.cancel()
+            else:
+                loop.call_soon_threadsafe(consumer.cancel)
+        except RuntimeError:
+            # its loop is closed already
+            return None
+        return consumer
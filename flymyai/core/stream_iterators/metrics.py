@@ -0,0 +1,99 @@
+import collections
+import dataclasses
+import time
+from typing import Deque, Optional
+
+_RECENT_GAPS_COUNT = 64
+
+
+def count_tokens(output_data: Optional[dict]) -> int:
+    """
+    Approximate the number of tokens in a partial:
+    the longest list among output fields, 1 for any other non-empty value
+    """
+    if not output_data:
+        return 0
+    count = 0
+    for value in output_data.values():
+        if isinstance(value, (list, tuple)):
+            count = max(count, len(value))
+        elif value not in (None, ""):
+            count = max(count, 1)
+    return count
+
+
+@dataclasses.dataclass
+class StreamMetrics:
+    """
+    Client-side latency metrics of a prediction stream.
+    Timestamps are time.monotonic() values
+    """
+
+    started_at: Optional[float] = None
+    first_token_at: Optional[float] = None
+    last_token_at: Optional[float] = None
+    token_count: int = 0
+    partial_count: int = 0
+    max_inter_token_gap: float = 0.0
+    output_tokens: Optional[int] = None  # reported by the server in StreamDetails
+    recent_gaps: Deque[float] = dataclasses.field(
+        default_factory=lambda: collections.deque(maxlen=_RECENT_GAPS_COUNT)
+    )
+
+    def start(self):
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+
+    def record_partial(self, output_data: Optional[dict]) -> bool:
+        """
+        Register a partial; returns True when it carried tokens
+        """
+        self.partial_count += 1
+        tokens = count_tokens(output_data)
+        if not tokens:
+            return False
+        now = time.monotonic()
+        if self.first_token_at is None:
+            self.first_token_at = now
+        else:
+            gap = now - self.last_token_at
+            self.recent_gaps.append(gap)
+            self.max_inter_token_gap = max(self.max_inter_token_gap, gap)
+        self.last_token_at = now
+        self.token_count += tokens
+        return True
+
+    def snapshot(self) -> "StreamMetrics":
+        """
+        Copy that is safe to hand over to callbacks running on other threads
+        """
+        return dataclasses.replace(
+            self,
+            recent_gaps=collections.deque(self.recent_gaps, maxlen=_RECENT_GAPS_COUNT),
+        )
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        if self.first_token_at is None or self.started_at is None:
+            return None
+        return self.first_token_at - self.started_at
+
+    @property
+    def last_inter_token_gap(self) -> Optional[float]:
+        return self.recent_gaps[-1] if self.recent_gaps else None
+
+    @property
+    def mean_inter_token_latency(self) -> Optional[float]:
+        if not self.recent_gaps:
+            return None
+        return sum(self.recent_gaps) / len(self.recent_gaps)
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """
+        Decoding speed: tokens received after the first one per second
+        """
+        if self.first_token_at is None or self.last_token_at == self.first_token_at:
+            return None
+        tokens = self.output_tokens or self.token_count
+        return (tokens - 1) / (self.last_token_at - self.first_token_at)
@@ -0,0 +1,91 @@
+import collections
+import concurrent.futures
+import time
+from typing import Any, Deque, Iterable, Iterator, List, Optional, Tuple, Union
+
+from flymyai.core.exceptions import RetryTimeoutExceededException
+from flymyai.core.models.successful_responses import (
+    AsyncPredictionResponseList,
+    AsyncPredictionTask,
+)
+from flymyai.core.task_pollers.base import BaseTaskPoller, _PollEntry
+from flymyai.utils.deadline import Deadline
+
+
+class TaskPoller(BaseTaskPoller):
+    """
+    Polls many async prediction tasks from the calling thread.
+    Checks that are due at the same time run on a pool of max_in_flight threads
+    """
+
+    _deadline: Optional[Deadline] = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._completed: Deque[Tuple[AsyncPredictionTask, Any]] = collections.deque()
+
+    def _check(self, entry: _PollEntry) -> Tuple[bool, Any]:
+        try:
+            return True, entry.task.client._prediction_task_check(
+                entry.task, self._deadline
+            )
+        except Exception as e:
+            return self._classify(e)
+
+    def _poll_round(self, executor: concurrent.futures.Executor, due: List[_PollEntry]):
+        for entry, (finished, outcome) in zip(due, executor.map(self._check, due)):
+            if finished:
+                self._done(entry)
+                self._completed.append((entry.task, outcome))
+            else:
+                self._reschedule(entry)
+
+    def as_completed(
+        self,
+        tasks: Optional[Iterable[AsyncPredictionTask]] = None,
+        timeout: Union[None, float, Deadline] = None,
+        return_exceptions: bool = False,
+    ) -> Iterator[Tuple[AsyncPredictionTask, AsyncPredictionResponseList]]:
+        """
+        Yield (task, result) for every tracked task as soon as it is finished
+        :param tasks: tasks to track in addition to the ones already added
+        :param timeout: seconds (or a Deadline) to wait for all of them
+        :param return_exceptions: yield (task, exception) for failed tasks instead of raising
+        """
+        for task in tasks or ():
+            self.add(task)
+        self._deadline = Deadline.of(timeout)
+        with concurrent.futures.ThreadPoolExecutor(
+            self.max_in_flight, thread_name_prefix="flymyai-poller"
+        ) as executor:
+            while self._completed or self._heap:
+                while self._completed:
+                    task, outcome = self._completed.popleft()
+                    yield task, self._raise_or_return(outcome, return_exceptions)
+                if not self._heap:
+                    break
+                remaining = self._deadline and self._deadline.remaining()
+                if remaining is not None and remaining <= 0:
+                    raise RetryTimeoutExceededException()
+                now = time.monotonic()
+                due = self._pop_due(now)
+                if due:
+                    self._poll_round(executor, due)
+                    continue
+                wait = self._until_next_check(now)
+                time.sleep(wait if remaining is None else min(wait, remaining))
+
+    def wait_all(
+        self,
+        tasks: Iterable[AsyncPredictionTask],
+        timeout: Union[None, float, Deadline] = None,
+        return_exceptions: bool = False,
+    ) -> List[AsyncPredictionResponseList]:
+        """
+        Wait for every task; results are returned in the order of `tasks`
+        """
+        tasks = list(tasks)
+        results = {}
+        for task, outcome in self.as_completed(tasks, timeout, return_exceptions):
+            results[task.prediction_id] = outcome
+        return [results[task.prediction_id] for task in tasks]
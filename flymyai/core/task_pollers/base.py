@@ -0,0 +1,110 @@
+import dataclasses
+import heapq
+import itertools
+import os
+import time
+from typing import Any, List, Tuple
+
+import httpx
+
+from flymyai.core.clients.base_client import _is_reconnectable_error
+from flymyai.core.exceptions import (
+    FlyMyAIAsyncTaskException,
+    FlyMyAIExceptionGroup,
+    RetryTimeoutExceededException,
+)
+from flymyai.core.models.successful_responses import AsyncPredictionTask
+
+_POLL_MIN_INTERVAL = float(os.getenv("FMA_POLL_MIN_INTERVAL", "0.5"))
+_POLL_MAX_INTERVAL = float(os.getenv("FMA_POLL_MAX_INTERVAL", "10"))
+_POLL_BACKOFF = float(os.getenv("FMA_POLL_BACKOFF", "1.5"))
+_POLL_MAX_IN_FLIGHT = int(os.getenv("FMA_POLL_MAX_IN_FLIGHT", "16"))
+
+
+@dataclasses.dataclass(order=True)
+class _PollEntry:
+    next_check: float
+    seq: int
+    task: AsyncPredictionTask = dataclasses.field(compare=False)
+    interval: float = dataclasses.field(compare=False)
+
+
+class BaseTaskPoller:
+    """
+    Tracks many AsyncPredictionTasks in a heap ordered by the next check time.
+    Every task gets its own interval: it starts at min_interval and grows
+    by `backoff` (up to max_interval) each time the result is not ready yet
+    """
+
+    def __init__(
+        self,
+        min_interval: float = _POLL_MIN_INTERVAL,
+        max_interval: float = _POLL_MAX_INTERVAL,
+        backoff: float = _POLL_BACKOFF,
+        max_in_flight: int = _POLL_MAX_IN_FLIGHT,
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.max_in_flight = max_in_flight
+        self._heap: List[_PollEntry] = []
+        self._seq = itertools.count()
+        self._tracked = set()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def add(self, task: AsyncPredictionTask, check_now: bool = False):
+        """
+        Start tracking a task; it is checked after min_interval (or right away)
+        """
+        if task.prediction_id in self._tracked:
+            return
+        self._tracked.add(task.prediction_id)
+        delay = 0 if check_now else self.min_interval
+        self._push(task, time.monotonic() + delay, self.min_interval)
+
+    def _push(self, task: AsyncPredictionTask, next_check: float, interval: float):
+        heapq.heappush(
+            self._heap, _PollEntry(next_check, next(self._seq), task, interval)
+        )
+
+    def _pop_due(self, now: float) -> List[_PollEntry]:
+        due = []
+        while self._heap and self._heap[0].next_check <= now:
+            if len(due) == self.max_in_flight:
+                break
+            due.append(heapq.heappop(self._heap))
+        return due
+
+    def _until_next_check(self, now: float) -> float:
+        return max(self._heap[0].next_check - now, 0) if self._heap else 0
+
+    def _reschedule(self, entry: _PollEntry):
+        interval = min(entry.interval * self.backoff, self.max_interval)
+        self._push(entry.task, time.monotonic() + interval, interval)
+
+    def _done(self, entry: _PollEntry):
+        self._tracked.discard(entry.task.prediction_id)
+
+    @staticmethod
+    def _classify(exc: BaseException) -> Tuple[bool, Any]:
+        """
+        :return: (finished, outcome) for an exception raised by a single check
+        """
+        if isinstance(exc, FlyMyAIAsyncTaskException):
+            if exc.requires_retry:
+                return False, None
+            return True, FlyMyAIExceptionGroup([exc])
+        if _is_reconnectable_error(exc):
+            return False, None
+        # the check ran out of time; the deadline of the poller decides what's next
+        if isinstance(exc, (httpx.TimeoutException, RetryTimeoutExceededException)):
+            return False, None
+        return True, exc
+
+    @staticmethod
+    def _raise_or_return(outcome: Any, return_exceptions: bool):
+        if isinstance(outcome, BaseException) and not return_exceptions:
+            raise outcome
+        return outcome
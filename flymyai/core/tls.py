@@ -0,0 +1,143 @@
+import os
+import ssl
+import threading
+from typing import Dict, Optional
+
+import httpx
+
+_lock = threading.Lock()
+_contexts: Dict[bool, ssl.SSLContext] = {}
+
+
+class _SessionRecorder:
+    """
+    Hands the TLS session over to the context once the server has issued it:
+    TLS 1.3 session tickets arrive after the handshake, with the first reads.
+    A server that has sent none by the first response data (TLS 1.2 session
+    ids, tickets disabled) will not send any: recording stops there
+    """
+
+    _session_recorded = False
+
+    def read(self, *args, **kwargs):
+        data = super().read(*args, **kwargs)
+        if not self._session_recorded:
+            # data is bytes, or the number of bytes read into a buffer
+            self._session_recorded = self.context._record_session(self) or bool(data)
+        return data
+
+
+class _SSLSocket(_SessionRecorder, ssl.SSLSocket):
+    pass
+
+
+class _SSLObject(_SessionRecorder, ssl.SSLObject):
+    pass
+
+
+class _ResumingSSLContext(ssl.SSLContext):
+    """
+    SSLContext offering the latest TLS session with a host to every new
+    connection to the same host, so that new connections (reconnects,
+    extra pooled connections, new clients) resume the session
+    instead of going through a full handshake, if the server allows it
+    """
+
+    sslsocket_class = _SSLSocket
+    sslobject_class = _SSLObject
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self._sessions: Dict[str, ssl.SSLSession] = {}
+
+    def _record_session(self, connection) -> bool:
+        """
+        :return: whether the session of the connection is final
+        """
+        session = connection.session
+        if session is None or not connection.server_hostname:
+            return False
+        self._sessions[connection.server_hostname] = session
+        return session.has_ticket
+
+    def _session_for(self, server_hostname) -> Optional[ssl.SSLSession]:
+        if isinstance(server_hostname, bytes):
+            # anyio passes IDNA-encoded host names
+            server_hostname = server_hostname.decode("ascii")
+        return self._sessions.get(server_hostname)
+
+    def wrap_socket(
+        self,
+        sock,
+        server_side=False,
+        do_handshake_on_connect=True,
+        suppress_ragged_eofs=True,
+        server_hostname=None,
+        session=None,
+    ):
+        return super().wrap_socket(
+            sock,
+            server_side,
+            do_handshake_on_connect,
+            suppress_ragged_eofs,
+            server_hostname,
+            session or self._session_for(server_hostname),
+        )
+
+    def wrap_bio(
+        self, incoming, outgoing, server_side=False, server_hostname=None, session=None
+    ):
+        return super().wrap_bio(
+            incoming,
+            outgoing,
+            server_side,
+            server_hostname,
+            session or self._session_for(server_hostname),
+        )
+
+
+def _create_ssl_context() -> ssl.SSLContext:
+    """
+    Same settings and trust store as httpx.create_ssl_context()
+    (SSL_CERT_FILE, SSL_CERT_DIR or its default bundle)
+    """
+    defaults = httpx.create_ssl_context()
+    context = _ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.minimum_version = defaults.minimum_version
+    context.options |= defaults.options
+    context.verify_flags = defaults.verify_flags
+    if os.environ.get("SSL_CERT_DIR") and not os.environ.get("SSL_CERT_FILE"):
+        # certificates of a directory are loaded on demand, not listed
+        context.load_verify_locations(capath=os.environ["SSL_CERT_DIR"])
+    else:
+        context.load_verify_locations(
+            cadata=b"".join(defaults.get_ca_certs(binary_form=True))
+        )
+    return context
+
+
+def _after_fork_in_child():
+    # another thread of the parent may have held the lock while forking
+    global _lock
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def ssl_context(http2: bool = True) -> ssl.SSLContext:
+    """
+    Process-wide SSLContext shared by every client, so the certificate bundle
+    is loaded once and TLS sessions are resumed across clients and reconnects.
+    httpcore sets the ALPN protocols of the context on every connection,
+    hence one context per protocol set
+    :param http2: whether the connections may negotiate HTTP/2
+    """
+    context = _contexts.get(http2)
+    if context is None:
+        with _lock:
+            context = _contexts.get(http2)
+            if context is None:
+                context = _contexts[http2] = _create_ssl_context()
+    return context
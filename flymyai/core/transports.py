@@ -0,0 +1,197 @@
+import asyncio
+import os
+import threading
+from typing import Callable, List, Optional, TypeVar, Union
+
+import httpx
+
+_HTTP2_CONNECTIONS = int(os.getenv("FMA_HTTP2_CONNECTIONS", "1"))
+_HTTP2_MAX_STREAMS_PER_CONNECTION = int(
+    os.getenv("FMA_HTTP2_MAX_STREAMS_PER_CONNECTION", "100")
+)
+
+_Transport = TypeVar(
+    "_Transport", bound=Union[httpx.BaseTransport, httpx.AsyncBaseTransport]
+)
+
+
+_NO_STREAM = "No stream available within the pool timeout"
+
+
+def _pool_timeout(request: httpx.Request) -> Optional[float]:
+    return request.extensions.get("timeout", {}).get("pool")
+
+
+class _BaseMultiConnectionTransport:
+    """
+    Spreads requests over `connections` independent connection pools,
+    each of which keeps a single HTTP/2 connection per host.
+    A new request goes to the pool with the fewest streams in flight;
+    a pool never carries more than `max_streams_per_connection` streams,
+    extra requests wait until a stream is released,
+    at most for the request's pool timeout
+    """
+
+    def __init__(
+        self,
+        connections: int = _HTTP2_CONNECTIONS,
+        max_streams_per_connection: int = _HTTP2_MAX_STREAMS_PER_CONNECTION,
+        limits: httpx.Limits = httpx.Limits(),
+        transport_factory: Optional[Callable[[], _Transport]] = None,
+        **transport_kwargs,
+    ):
+        self.connections = max(connections, 1)
+        self.max_streams_per_connection = max_streams_per_connection
+        if transport_factory is None:
+
+            def transport_factory():
+                return self._connection_pool(limits, transport_kwargs)
+
+        self._transports: List[_Transport] = [
+            transport_factory() for _ in range(self.connections)
+        ]
+        self._in_flight = [0] * self.connections
+        self._lock = threading.Lock()
+
+    _transport_cls: type
+
+    def _connection_pool(self, limits: httpx.Limits, transport_kwargs: dict):
+        """
+        One pool per connection; more than one connection per host is opened
+        only by servers without HTTP/2 support
+        """
+        return self._transport_cls(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=max(
+                    (limits.max_connections or self.connections) // self.connections,
+                    1,
+                ),
+                max_keepalive_connections=1,
+                keepalive_expiry=limits.keepalive_expiry,
+            ),
+            **transport_kwargs,
+        )
+
+    @property
+    def load(self) -> List[int]:
+        """
+        Streams in flight on every connection
+        """
+        return list(self._in_flight)
+
+    def _place(self) -> int:
+        with self._lock:
+            index = min(range(self.connections), key=self._in_flight.__getitem__)
+            self._in_flight[index] += 1
+            return index
+
+    def _release(self, index: int):
+        with self._lock:
+            self._in_flight[index] -= 1
+
+
+class _TrackedStream(httpx.SyncByteStream):
+    def __init__(self, stream: httpx.SyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            release, self._release = self._release, None
+            if release:
+                release()
+
+
+class _AsyncTrackedStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            release, self._release = self._release, None
+            if release:
+                release()
+
+
+class MultiConnectionTransport(_BaseMultiConnectionTransport, httpx.BaseTransport):
+    _transport_cls = httpx.HTTPTransport
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._capacity = threading.BoundedSemaphore(
+            self.connections * self.max_streams_per_connection
+        )
+
+    def _release_stream(self, index: int):
+        self._release(index)
+        self._capacity.release()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if not self._capacity.acquire(timeout=_pool_timeout(request)):
+            raise httpx.PoolTimeout(_NO_STREAM, request=request)
+        index = self._place()
+        try:
+            response = self._transports[index].handle_request(request)
+        except BaseException:
+            self._release_stream(index)
+            raise
+        response.stream = _TrackedStream(
+            response.stream, lambda: self._release_stream(index)
+        )
+        return response
+
+    def close(self):
+        for transport in self._transports:
+            transport.close()
+
+
+class AsyncMultiConnectionTransport(
+    _BaseMultiConnectionTransport, httpx.AsyncBaseTransport
+):
+    _transport_cls = httpx.AsyncHTTPTransport
+
+    _capacity: Optional[asyncio.Semaphore] = None
+
+    def _release_stream(self, index: int):
+        self._release(index)
+        self._capacity.release()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self._capacity is None:
+            self._capacity = asyncio.Semaphore(
+                self.connections * self.max_streams_per_connection
+            )
+        if not self._capacity.locked():
+            await self._capacity.acquire()
+        else:
+            try:
+                await asyncio.wait_for(self._capacity.acquire(), _pool_timeout(request))
+            except asyncio.TimeoutError:
+                raise httpx.PoolTimeout(_NO_STREAM, request=request) from None
+        index = self._place()
+        try:
+            response = await self._transports[index].handle_async_request(request)
+        except BaseException:
+            self._release_stream(index)
+            raise
+        response.stream = _AsyncTrackedStream(
+            response.stream, lambda: self._release_stream(index)
+        )
+        return response
+
+    async def aclose(self):
+        for transport in self._transports:
+            await transport.aclose()
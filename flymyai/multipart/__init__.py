@@ -1,3 +1,4 @@
 from .binary_field import BinaryField
+from .images import ImageOptions
 from .simple_field import SimpleField
 from .payload import MultipartPayload
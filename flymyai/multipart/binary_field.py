@@ -6,6 +6,7 @@ from io import BytesIO
 from typing import Union, BinaryIO, Any, Optional, Tuple
 
 from .base_field import BaseField
+from .images import ImageOptions, is_still_image, preprocess_image
 
 _BinaryInput = Union[bytes, pathlib.Path, BinaryIO, str]
 _IOOutput = Union[BinaryIO, BytesIO]
@@ -13,7 +14,7 @@ _FieldOutput = Tuple[str, _IOOutput, str]  # filename, io[binary], mime
 
 
 def is_binary_input(value: _BinaryInput) -> bool:
-    if isinstance(value, (bytes, BinaryIO)):
+    if isinstance(value, (bytes, BinaryIO, io.BufferedIOBase)):
         return True
     if isinstance(value, str):
         try:
@@ -54,10 +55,60 @@ class BinaryField(BaseField):
             )
         return io_obj
 
+    @staticmethod
+    def _mime(filename: str) -> str:
+        return mimetypes.guess_type(filename)[0] or "applications/octet-stream"
+
     def serialize(self, value=None) -> Tuple[Union[str, Any], _IOOutput, Optional[str]]:
         value = value or self.value
         io_obj = self.to_io(value)
         filename = io_obj.name
-        mime = mimetypes.guess_type(filename)[0] or "applications/octet-stream"
         io_obj.seek(0)
-        return filename, io_obj, mime
+        return filename, io_obj, self._mime(filename)
+
+    def serialize_deferred(
+        self, value=None
+    ) -> Tuple[Union[str, Any], Union[pathlib.Path, _IOOutput], Optional[str]]:
+        """
+        serialize() that leaves paths unopened and files unrewound,
+        for AsyncFileMultipartStream to do the disk work off the event loop
+        """
+        value = value or self.value
+        if isinstance(value, pathlib.Path):
+            return str(value), value, self._mime(str(value))
+        if isinstance(value, io.BufferedIOBase) and not isinstance(value, BytesIO):
+            return value.name, value, self._mime(value.name)
+        return self.serialize(value)
+
+    def preprocess(self, options: ImageOptions) -> int:
+        """
+        Downscale and re-encode an image value in place, see ImageOptions.
+        Files are read whole only when their header is an image's:
+        call it off the event loop
+        :return: bytes saved
+        """
+        value = self.value
+        if isinstance(value, bytes):
+            data, filename = value, uuid.uuid4().hex
+        elif isinstance(value, pathlib.Path):
+            if not is_still_image(value):
+                return 0
+            data, filename = value.read_bytes(), value.name
+        elif isinstance(value, io.BufferedIOBase):
+            value.seek(0)
+            image = is_still_image(value)
+            value.seek(0)
+            if not image:
+                return 0
+            data = value.read()
+            value.seek(0)
+            filename = pathlib.Path(str(getattr(value, "name", uuid.uuid4().hex))).name
+        else:
+            return 0
+        result = preprocess_image(data, filename, options)
+        if result is None:
+            return 0
+        content, filename = result
+        self.value = io.BytesIO(content)
+        self.value.name = filename
+        return len(data) - len(content)
@@ -0,0 +1,107 @@
+import asyncio
+import io
+import os
+import pathlib
+from typing import AsyncIterator, Optional, Union
+
+from httpx._multipart import FileField, MultipartStream
+
+_DiskFile = Union[pathlib.Path, io.BufferedIOBase]
+
+
+def _reads_disk(file) -> bool:
+    return isinstance(file, pathlib.Path) or (
+        isinstance(file, io.BufferedIOBase) and not isinstance(file, io.BytesIO)
+    )
+
+
+def _file_length(file: _DiskFile) -> Optional[int]:
+    if isinstance(file, pathlib.Path):
+        return os.stat(file).st_size
+    try:
+        return os.fstat(file.fileno()).st_size
+    except (AttributeError, OSError):
+        return None
+
+
+def _rewind(file: io.BufferedIOBase) -> None:
+    try:
+        file.seek(0)
+    except (AttributeError, io.UnsupportedOperation):
+        pass
+
+
+class AsyncFileMultipartStream(MultipartStream):
+    """
+    multipart/form-data body for async clients.
+    Files on disk (paths and opened files) are measured, opened and read
+    in the default executor, so that slow disks do not block the event loop.
+    Paths are opened on every iteration of the body and closed after it
+    """
+
+    # fewer, larger reads: every chunk is a hop to the executor
+    CHUNK_SIZE = 1024 * 1024
+
+    _content_length: Optional[int] = None
+
+    # async only: httpx must not pick this up as a sync iterable body
+    __iter__ = None
+
+    @classmethod
+    async def create(cls, data: dict, files: dict) -> "AsyncFileMultipartStream":
+        stream = cls(data, files)
+        stream._content_length = await asyncio.get_running_loop().run_in_executor(
+            None, stream._measure
+        )
+        return stream
+
+    def _measure(self) -> Optional[int]:
+        boundary_length = len(self.boundary)
+        length = 0
+        for field in self.fields:
+            if isinstance(field, FileField) and _reads_disk(field.file):
+                file_length = _file_length(field.file)
+                field_length = (
+                    None
+                    if file_length is None
+                    else len(field.render_headers()) + file_length
+                )
+            else:
+                field_length = field.get_length()
+            if field_length is None:
+                return None
+            length += 2 + boundary_length + 2 + field_length + 2
+        return length + 2 + boundary_length + 4
+
+    def get_content_length(self) -> Optional[int]:
+        return self._content_length
+
+    async def _aiter_file(self, file: _DiskFile) -> AsyncIterator[bytes]:
+        loop = asyncio.get_running_loop()
+        if isinstance(file, pathlib.Path):
+            fileobj = await loop.run_in_executor(None, open, file, "rb")
+        else:
+            fileobj = file
+            await loop.run_in_executor(None, _rewind, fileobj)
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, fileobj.read, self.CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+        finally:
+            if fileobj is not file:
+                fileobj.close()
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        for field in self.fields:
+            yield b"--%s\r\n" % self.boundary
+            if isinstance(field, FileField) and _reads_disk(field.file):
+                yield field.render_headers()
+                async for chunk in self._aiter_file(field.file):
+                    yield chunk
+            else:
+                for chunk in field.render():
+                    yield chunk
+            yield b"\r\n"
+        yield b"--%s--\r\n" % self.boundary
@@ -0,0 +1,139 @@
+import dataclasses
+import io
+import pathlib
+from typing import BinaryIO, Iterator, Optional, Tuple, Union
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = ImageOps = None
+
+# formats that can be re-encoded to, with the file extension they get
+_FORMATS = {"WEBP": ".webp", "JPEG": ".jpg", "PNG": ".png"}
+_LOSSY = ("WEBP", "JPEG")
+
+
+@dataclasses.dataclass(frozen=True)
+class ImageOptions:
+    """
+    Client-side preprocessing of image inputs before upload,
+    needs Pillow (pip install flymyai[images]).
+    Images larger than max_width x max_height are downscaled keeping
+    the aspect ratio; an image is replaced only if the result is smaller
+    :param max_width: pixels, None for no limit
+    :param max_height: pixels, None for no limit
+    :param format: "WEBP", "JPEG" or "PNG" to re-encode to, None keeps the format
+    :param quality: of WEBP and JPEG
+    """
+
+    max_width: Optional[int] = None
+    max_height: Optional[int] = None
+    format: Optional[str] = None
+    quality: int = 85
+
+    def __post_init__(self):
+        if Image is None:
+            raise ImportError(
+                "ImageOptions requires Pillow: pip install flymyai[images]"
+            )
+        if self.format is not None and self.format.upper() not in _FORMATS:
+            raise ValueError(
+                f"format={self.format} is not supported, one of: {', '.join(_FORMATS)}"
+            )
+
+    @classmethod
+    def from_openapi_schema(cls, schema: dict, **kwargs) -> Optional["ImageOptions"]:
+        """
+        Options from the input properties of a model's OpenAPI schema
+        (see openapi_schema()) that declare x-max-width / x-max-height:
+        the smallest of the declared limits
+        :param kwargs: the other fields, e.g. format and quality
+        :return: None if the schema declares no limits
+        """
+        widths, heights = [], []
+        for prop in _properties(schema):
+            if isinstance(prop.get("x-max-width"), int):
+                widths.append(prop["x-max-width"])
+            if isinstance(prop.get("x-max-height"), int):
+                heights.append(prop["x-max-height"])
+        if not widths and not heights:
+            return None
+        return cls(
+            max_width=min(widths, default=None),
+            max_height=min(heights, default=None),
+            **kwargs,
+        )
+
+
+def _properties(schema) -> Iterator[dict]:
+    if isinstance(schema, dict):
+        for value in (schema.get("properties") or {}).values():
+            if isinstance(value, dict):
+                yield value
+        for value in schema.values():
+            yield from _properties(value)
+    elif isinstance(schema, list):
+        for value in schema:
+            yield from _properties(value)
+
+
+def is_still_image(source: Union[pathlib.Path, BinaryIO]) -> bool:
+    """
+    Whether a file is a still image Pillow reads; only its header is read,
+    so that e.g. videos are not loaded into memory for nothing
+    """
+    try:
+        with Image.open(source) as image:
+            return image.format == "MPO" or not getattr(image, "is_animated", False)
+    except Exception:
+        return False
+
+
+def preprocess_image(
+    data: bytes, filename: str, options: ImageOptions
+) -> Optional[Tuple[bytes, str]]:
+    """
+    Downscale and re-encode an image
+    :return: (new content, new filename), None to upload data as is:
+        not an image Pillow reads, animated, or the result is not smaller
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except Exception:
+        return None
+    # MPO: a JPEG with extra frames (e.g. depth maps) from phone cameras
+    if image.format != "MPO" and getattr(image, "n_frames", 1) > 1:
+        return None
+    source_format = "JPEG" if image.format == "MPO" else image.format
+    target = (options.format or source_format or "").upper()
+    if target not in _FORMATS:
+        return None
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+    if target == "JPEG" and has_alpha:
+        # JPEG would drop the transparency
+        if source_format not in _FORMATS:
+            return None
+        target = source_format
+
+    # the EXIF orientation is lost on re-encoding, apply it to the pixels
+    image = ImageOps.exif_transpose(image)
+    width, height = image.size
+    max_width, max_height = options.max_width or width, options.max_height or height
+    downscale = width > max_width or height > max_height
+    if not downscale and target == source_format:
+        return None
+    # palette images would be resized with nearest neighbour
+    if image.mode not in ("RGB", "RGBA", "L", "LA"):
+        image = image.convert("RGBA" if has_alpha else "RGB")
+    if downscale:
+        image.thumbnail((max_width, max_height), Image.LANCZOS)
+    output = io.BytesIO()
+    if target in _LOSSY:
+        image.save(output, target, quality=options.quality)
+    else:
+        image.save(output, target, optimize=True)
+    if output.tell() >= len(data):
+        return None
+    stem = filename.rsplit(".", 1)[0] if "." in filename else filename
+    return output.getvalue(), stem + _FORMATS[target]
@@ -1,18 +1,74 @@
+import asyncio
 import io
+import json
+import logging
+import os
 import pathlib
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from flymyai.core.compression import compress_body
 
 from .binary_field import BinaryField
+from .file_stream import AsyncFileMultipartStream
+from .images import ImageOptions
 from .simple_field import SimpleField
 
+logger = logging.getLogger("flymyai")
+
+
+# FMA_JSON_BODY=0 sends text-only payloads as form fields, as before
+_JSON_BODY = os.getenv("FMA_JSON_BODY", "1") != "0"
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _dumps(value) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(value)
+        except TypeError:
+            # e.g. integers beyond 64 bits
+            pass
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def _value_size(value) -> int:
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    if isinstance(value, io.BytesIO):
+        return value.getbuffer().nbytes
+    try:
+        if isinstance(value, pathlib.Path):
+            return os.stat(value).st_size
+        if isinstance(value, io.BufferedIOBase):
+            return os.fstat(value.fileno()).st_size
+    except (OSError, io.UnsupportedOperation):
+        pass
+    return 0
+
 
 class MultipartPayload:
     """
     This class provides a way to create a multipart-prepared
-    payload (multipart/form-data) from a python dict
+    payload (multipart/form-data) from a python dict.
+    Payloads without binary fields are sent as a compact JSON body instead.
+    With image_options, image inputs are downscaled and re-encoded first,
+    see ImageOptions; bytes_saved tells how much smaller the upload got
     """
 
-    def __init__(self, input_data: dict):
+    _json_body: Optional[bytes] = None
+    _json_headers: dict
+    _size: Optional[int] = None
+    bytes_saved: Optional[int] = None
+
+    def __init__(self, input_data: dict, image_options: Optional[ImageOptions] = None):
         self.data = input_data
+        self.image_options = image_options
 
     @classmethod
     def _serialize_bin(cls, value):
@@ -26,13 +82,111 @@ class MultipartPayload:
         data.validate()
         return data.serialize()
 
-    def serialize(self) -> dict:
+    @staticmethod
+    def _is_binary(value) -> bool:
+        return isinstance(value, (pathlib.Path, io.BufferedIOBase, bytes))
+
+    def size(self) -> int:
+        """
+        Approximate size of the request body in bytes, files are not read
+        but stat'ed: call it off the event loop when there are files
+        """
+        if self._size is None:
+            self._size = sum(map(_value_size, self.data.values()))
+        return self._size
+
+    async def asize(self) -> int:
+        """
+        size() in a thread pool when the payload has files
+        """
+        if self._size is None and any(
+            isinstance(value, (pathlib.Path, io.BufferedIOBase))
+            for value in self.data.values()
+        ):
+            return await asyncio.get_running_loop().run_in_executor(None, self.size)
+        return self.size()
+
+    def preprocess(self) -> None:
+        """
+        Apply image_options to the binary fields, once.
+        Reads the files: call it off the event loop
+        """
+        if self.image_options is None or self.bytes_saved is not None:
+            return
+        data = dict(self.data)
+        saved = 0
+        for key, value in self.data.items():
+            if self._is_binary(value):
+                field = BinaryField(value)
+                saved += field.preprocess(self.image_options)
+                data[key] = field.value
+        self.data = data
+        self._size = None
+        self.bytes_saved = saved
+        if saved:
+            logger.debug("Image preprocessing saved %d bytes of upload", saved)
+
+    async def apreprocess(self) -> None:
+        """
+        preprocess() in a thread pool
+        """
+        if self.image_options is not None and self.bytes_saved is None:
+            await asyncio.get_running_loop().run_in_executor(None, self.preprocess)
+
+    def has_files(self) -> bool:
+        return any(self._is_binary(value) for value in self.data.values())
+
+    def _serialize_json(self, headers: dict) -> dict:
+        if self._json_body is None:
+            body = _dumps(self.data)
+            self._json_headers = dict(_JSON_HEADERS)
+            compressed = compress_body(body, _JSON_HEADERS["Content-Type"])
+            if compressed is not None:
+                self._json_headers["Content-Encoding"], body = compressed
+            self._json_body = body
+        return {
+            "content": self._json_body,
+            "headers": {**headers, **self._json_headers},
+        }
+
+    def serialize(self, headers: Optional[dict] = None) -> dict:
+        """
+        Request kwargs: a JSON body for text-only payloads, else multipart files
+        and form data
+        :param headers: request headers, merged with the headers of the body
+        """
+        self.preprocess()
+        headers = dict(headers or {})
+        if _JSON_BODY and not self.has_files():
+            return self._serialize_json(headers)
         files = {}
         data = {}
 
         for key, value in self.data.items():
-            if isinstance(value, (pathlib.Path, io.BufferedIOBase, bytes)):
+            if self._is_binary(value):
                 files[key] = self._serialize_bin(value)
             else:
                 data[key] = self._serialize_simple(value)
-        return {"files": files, "data": data}
+        return {"files": files, "data": data, "headers": headers}
+
+    async def aserialize(self, headers: Optional[dict] = None) -> dict:
+        """
+        Request kwargs for async clients: with files, a multipart body
+        whose disk reads run in a thread pool (see AsyncFileMultipartStream)
+        :param headers: request headers, merged with the headers of the body
+        """
+        if not self.has_files():
+            return self.serialize(headers)
+        await self.apreprocess()
+        headers = dict(headers or {})
+        files = {}
+        data = {}
+        for key, value in self.data.items():
+            if self._is_binary(value):
+                field = BinaryField(value)
+                field.validate()
+                files[key] = field.serialize_deferred()
+            else:
+                data[key] = self._serialize_simple(value)
+        stream = await AsyncFileMultipartStream.create(data, files)
+        return {"content": stream, "headers": {**headers, **stream.get_headers()}}
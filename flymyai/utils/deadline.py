@@ -0,0 +1,51 @@
+import time
+from typing import Optional, Union
+
+import httpx
+
+from flymyai.core.exceptions import RetryTimeoutExceededException
+
+
+class Deadline:
+    """
+    Time budget of a single logical call.
+    Shared by every retry, reconnect and poll of the call, so the call as a whole
+    takes at most `seconds`. Pass the same Deadline to several calls to share it
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def of(cls, value: Union[None, float, "Deadline"]) -> Optional["Deadline"]:
+        """
+        :param value: seconds, a Deadline or None (no deadline)
+        """
+        if value is None or isinstance(value, Deadline):
+            return value
+        return cls(value)
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self):
+        if self.expired:
+            raise RetryTimeoutExceededException(f"Deadline of {self.seconds}s exceeded")
+
+    def timeout(self) -> httpx.Timeout:
+        """
+        httpx timeout of the next attempt: whatever is left of the budget
+        """
+        self.check()
+        return httpx.Timeout(self.remaining())
+
+    def sleep_time(self, interval: float) -> float:
+        return min(interval, self.remaining())
+
+    def __repr__(self):
+        return f"Deadline(seconds={self.seconds}, remaining={self.remaining():.3f})"
@@ -0,0 +1,81 @@
+import asyncio
+import json
+import time
+import urllib.parse
+from typing import Dict, List, Optional
+
+import httpx
+
+from flymyai import client as sync_client, async_client
+
+
+def sse(kind: str, body: dict) -> bytes:
+    return f"{kind}: {json.dumps(body)}\n\n".encode()
+
+
+class SSEStandIn:
+    """
+    In-process stand-in of the inference server.
+    Streams `tokens` partials per request, sleeping delays[prompt] before each one
+    """
+
+    def __init__(self, delays: Optional[Dict[str, float]] = None, tokens: int = 3):
+        self.delays = delays or {}
+        self.tokens = tokens
+        self.cancelled: List[str] = []
+        self.requests: List[httpx.Request] = []
+
+    def _events(self, prompt: str):
+        """
+        (delay before the event, SSE field, body)
+        """
+        delay = self.delays.get(prompt, 0)
+        yield 0, "event", {"status": 200, "event_type": "id", "prediction_id": prompt}
+        for token in range(self.tokens):
+            yield delay, "data", {"status": 200, "output_data": {"output": [token]}}
+        yield 0, "data", {
+            "status": 200,
+            "output_data": {"output": []},
+            "stream_details": {"input_tokens": 1, "output_tokens": self.tokens},
+        }
+
+    def _sync_body(self, prompt: str):
+        for delay, kind, body in self._events(prompt):
+            time.sleep(delay)
+            yield sse(kind, body)
+
+    async def _async_body(self, prompt: str):
+        for delay, kind, body in self._events(prompt):
+            await asyncio.sleep(delay)
+            yield sse(kind, body)
+
+    def _handler(self, is_async: bool):
+        def handler(request: httpx.Request):
+            self.requests.append(request)
+            if request.url.path.endswith("predict/cancel/"):
+                self.cancelled.append(json.loads(request.content)["infer_id"])
+                return httpx.Response(200, json={"status": 200})
+            if request.headers["Content-Type"] == "application/json":
+                prompt = json.loads(request.content)["prompt"]
+            else:
+                prompt = urllib.parse.parse_qs(request.content.decode())["prompt"][0]
+            body = self._async_body(prompt) if is_async else self._sync_body(prompt)
+            return httpx.Response(200, content=body)
+
+        return handler
+
+    def sync_client(self, apikey: str = "fly-123", model: str = "owner/model"):
+        client = sync_client(apikey, model)
+        client._client = httpx.Client(
+            transport=httpx.MockTransport(self._handler(False)),
+            base_url="https://api.flymy.ai/",
+        )
+        return client
+
+    def async_client(self, apikey: str = "fly-123", model: str = "owner/model"):
+        client = async_client(apikey, model)
+        client._client = httpx.AsyncClient(
+            transport=httpx.MockTransport(self._handler(True)),
+            base_url="https://api.flymy.ai/",
+        )
+        return client
@@ -1,6 +1,7 @@
 """Tests for flymyai.agents — SyncAgentClient, AsyncAgentClient, and helpers."""
 
 import asyncio
+import itertools
 import time
 from datetime import datetime, timezone
 from typing import Any
@@ -384,10 +385,38 @@ class TestSyncRuns:
         mock_http = MagicMock()
         mock_http.request.return_value = _make_response(_run_payload(status="running"))
         client = _sync_client(mock_http)
-        with patch("time.sleep"), patch("time.monotonic", side_effect=[0, 0, 1000]):
+        with patch("time.sleep"), patch(
+            "time.monotonic",
+            side_effect=itertools.chain([0, 0], itertools.repeat(1000)),
+        ):
             with pytest.raises(TimeoutError, match="did not complete"):
                 client.runs.wait(42, timeout=1.0, poll_interval=0.01)
 
+    def test_wait_cancels_run_on_timeout(self):
+        mock_http = MagicMock()
+        mock_http.request.return_value = _make_response(_run_payload(status="running"))
+        client = _sync_client(mock_http)
+        with patch("time.sleep"), patch(
+            "time.monotonic",
+            side_effect=itertools.chain([0, 0], itertools.repeat(1000)),
+        ):
+            with pytest.raises(TimeoutError):
+                client.runs.wait(
+                    42, timeout=1.0, poll_interval=0.01, cancel_on_timeout=True
+                )
+        args, kwargs = mock_http.request.call_args
+        assert args == ("POST", "/api/v1/agents/executions/42/cancel/")
+
+    def test_wait_bounds_poll_requests_by_timeout(self):
+        mock_http = MagicMock()
+        mock_http.request.return_value = _make_response(
+            _run_payload(status="completed")
+        )
+        client = _sync_client(mock_http)
+        client.runs.wait(42, timeout=5.0)
+        _, kwargs = mock_http.request.call_args
+        assert kwargs["timeout"].read <= 5.0
+
     def test_stream_events_yields_new_logs(self):
         log1 = _log_payload(id=1)
         log2 = _log_payload(id=2, message="second")
@@ -599,7 +628,8 @@ class TestAsyncRuns:
         mock_http.request.return_value = _make_response(_run_payload(status="running"))
         client = _async_client(mock_http)
         with patch("asyncio.sleep", new_callable=AsyncMock), patch(
-            "time.monotonic", side_effect=[0, 0, 1000]
+            "time.monotonic",
+            side_effect=itertools.chain([0, 0], itertools.repeat(1000)),
         ):
             with pytest.raises(TimeoutError):
                 await client.runs.wait(42, timeout=1.0, poll_interval=0.01)
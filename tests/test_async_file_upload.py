@@ -0,0 +1,82 @@
+import asyncio
+import io
+import time
+
+import httpx
+import pytest
+
+from tests.SSEStandIn import SSEStandIn, sse
+
+
+class SlowFile(io.BufferedReader):
+    """
+    A file on a slow (e.g. network) filesystem: every read blocks
+    """
+
+    def read(self, size=-1):
+        time.sleep(0.1)
+        return super().read(size)
+
+
+class UploadStandIn(SSEStandIn):
+    def _handler(self, is_async: bool):
+        def handler(request: httpx.Request):
+            self.requests.append(request)
+            return httpx.Response(
+                200,
+                content=sse("data", {"status": 200, "output_data": {"output": [0]}}),
+            )
+
+        return handler
+
+
+async def _loop_lag(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - started - 0.001)
+
+
+@pytest.mark.asyncio
+async def test_file_upload_reads_disk_off_event_loop(tmp_path):
+    path = tmp_path / "upload.bin"
+    content = bytes(range(256)) * 4096 * 4  # 4 MiB, 4 reads of 100 ms
+    path.write_bytes(content)
+    stand_in = UploadStandIn()
+    client = stand_in.async_client()
+
+    stop, lags = asyncio.Event(), []
+    ticker = asyncio.ensure_future(_loop_lag(stop, lags))
+    response = await client.predict(
+        {"prompt": "fast", "image": SlowFile(open(path, "rb"))}
+    )
+    stop.set()
+    await ticker
+
+    assert response.output_data == {"output": [0]}
+    (request,) = stand_in.requests
+    assert content in request.content
+    assert int(request.headers["Content-Length"]) == len(request.content)
+    # a read on the loop would stall it for 100 ms
+    assert max(lags) < 0.05
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_path_upload_matches_sync_encoding(tmp_path):
+    path = tmp_path / "upload.png"
+    path.write_bytes(b"\x89PNG" + b"0" * 1000)
+    stand_in = UploadStandIn()
+    async_client = stand_in.async_client()
+    sync_client = stand_in.sync_client()
+
+    await async_client.predict({"prompt": "fast", "image": path})
+    sync_client.predict({"prompt": "fast", "image": path})
+
+    async_request, sync_request = stand_in.requests
+    boundary = lambda request: request.headers["Content-Type"].split("=")[1]
+    assert async_request.content.replace(
+        boundary(async_request).encode(), b""
+    ) == sync_request.content.replace(boundary(sync_request).encode(), b"")
+    await async_client.close()
+    sync_client.close()
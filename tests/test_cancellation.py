@@ -0,0 +1,105 @@
+import asyncio
+import gc
+import threading
+
+import pytest
+
+from tests.SSEStandIn import SSEStandIn
+
+
+@pytest.mark.asyncio
+async def test_predict_timeout_cancels_prediction():
+    stand_in = SSEStandIn({"slow": 5})
+    client = stand_in.async_client()
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(client.predict({"prompt": "slow"}), 0.2)
+    await client.close()
+    assert stand_in.cancelled == ["slow"]
+
+
+@pytest.mark.asyncio
+async def test_predict_returns_first_data_after_stream_id():
+    client = SSEStandIn().async_client()
+    response = await client.predict({"prompt": "fast"})
+    assert response.output_data == {"output": [0]}
+
+
+@pytest.mark.asyncio
+async def test_cancelled_stream_consumer_cancels_prediction():
+    stand_in = SSEStandIn({"slow": 5})
+    client = stand_in.async_client()
+
+    async def consume():
+        async for _ in client.stream({"prompt": "slow"}):
+            pass
+
+    consumer = asyncio.ensure_future(consume())
+    await asyncio.sleep(0.2)
+    consumer.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await consumer
+    await client.close()
+    assert stand_in.cancelled == ["slow"]
+
+
+def test_sync_stream_closed_early_cancels_prediction():
+    stand_in = SSEStandIn({"slow": 0.05}, tokens=10)
+    client = stand_in.sync_client()
+    with client.stream({"prompt": "slow"}) as stream:
+        next(stream)
+    assert stand_in.cancelled == ["slow"]
+
+
+def test_sync_stream_dropped_cancels_in_background():
+    stand_in = SSEStandIn({"slow": 0.05}, tokens=10)
+    client = stand_in.sync_client()
+    stream = client.stream({"prompt": "slow"})
+    next(stream)
+    with pytest.warns(ResourceWarning):
+        del stream
+        gc.collect()
+    for canceller in threading.enumerate():
+        if canceller.name == "flymyai-cancel":
+            canceller.join(5)
+    assert stand_in.cancelled == ["slow"]
+
+
+def test_sync_stream_close_without_cancel():
+    stand_in = SSEStandIn(tokens=10)
+    client = stand_in.sync_client()
+    stream = client.stream({"prompt": "fast"})
+    stream.cancel_on_close = False
+    next(stream)
+    stream.close()
+    assert stand_in.cancelled == []
+
+
+def test_sync_stream_consumed_is_not_cancelled():
+    stand_in = SSEStandIn()
+    client = stand_in.sync_client()
+    with client.stream({"prompt": "fast"}) as stream:
+        partials = list(stream)
+    assert partials[-1].output_data == {"output": []}
+    assert stand_in.cancelled == []
+
+
+@pytest.mark.asyncio
+async def test_async_stream_closed_early_cancels_prediction():
+    stand_in = SSEStandIn({"slow": 0.05}, tokens=10)
+    client = stand_in.async_client()
+    async with client.stream({"prompt": "slow"}) as stream:
+        async for _ in stream:
+            break
+    await client.close()
+    assert stand_in.cancelled == ["slow"]
+
+
+@pytest.mark.asyncio
+async def test_async_stream_aclose_without_cancel():
+    stand_in = SSEStandIn(tokens=10)
+    client = stand_in.async_client()
+    stream = client.stream({"prompt": "fast"})
+    await stream.__anext__()
+    await stream.aclose(cancel=False)
+    await client.close()
+    assert stand_in.cancelled == []
@@ -0,0 +1,116 @@
+import gzip
+import http.server
+import json
+import os
+import subprocess
+import sys
+import threading
+import zlib
+
+import httpx
+import pytest
+
+from flymyai import client as sync_client
+from flymyai.core import compression
+from tests.SSEStandIn import sse
+
+_DECOMPRESSORS = {"gzip": gzip.decompress}
+if compression.zstandard is not None:
+    _DECOMPRESSORS["zstd"] = compression.zstandard.ZstdDecompressor().decompress
+if compression.brotli is not None:
+    _DECOMPRESSORS["br"] = compression.brotli.decompress
+
+
+_COMPRESS = {"gzip": gzip.compress, "deflate": zlib.compress}
+if compression.zstandard is not None:
+    _COMPRESS["zstd"] = compression.zstandard.ZstdCompressor().compress
+if compression.brotli is not None:
+    _COMPRESS["br"] = compression.brotli.compress
+
+_PRINT_ENCODING = (
+    "import logging; logging.basicConfig();"
+    " import flymyai.core.client;"
+    " from flymyai.core import compression; print(compression._ENCODING)"
+)
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    wbufsize = -1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        encoding = self.headers.get("Content-Encoding")
+        self.server.requests.append((dict(self.headers), len(body)))
+        payload = json.loads(_DECOMPRESSORS[encoding](body) if encoding else body)
+        content = sse("data", {"status": 200, "output_data": {"echo": [payload]}})
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            content = gzip.compress(content)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def client(monkeypatch):
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("FLYMYAI_DSN", f"http://127.0.0.1:{server.server_address[1]}/")
+    monkeypatch.setattr(compression, "_COMPRESS_THRESHOLD", 1024)
+    client = sync_client("fly-123", "owner/model")
+    client.server = server
+    yield client
+    client.close()
+    server.shutdown()
+    server.server_close()
+
+
+def test_large_text_payload_is_compressed(client):
+    payload = {"prompt": "a cat wearing a tiny hat " * 1000}
+    response = client.predict(payload)
+    assert response.output_data == {"echo": [payload]}
+    ((headers, size),) = client.server.requests
+    assert headers["Content-Encoding"] == compression._ENCODING
+    assert size < len(json.dumps(payload)) / 10
+    assert "gzip" in headers["Accept-Encoding"]
+
+
+def test_small_and_binary_payloads_are_not_compressed(client):
+    client.predict({"prompt": "a cat"})
+    ((headers, _),) = client.server.requests
+    assert "Content-Encoding" not in headers
+
+    assert compression.compress_body(b"0" * 4096, "multipart/form-data") is None
+    # not worth it: incompressible
+    assert compression.compress_body(os.urandom(4096), "text/plain") is None
+
+
+def test_unavailable_encoding_falls_back(monkeypatch):
+    monkeypatch.setenv("FMA_COMPRESS_ENCODING", "lzma")
+    result = subprocess.run(
+        [sys.executable, "-c", _PRINT_ENCODING],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.split() == [compression._ENCODING]
+    assert "FMA_COMPRESS_ENCODING=lzma is not available" in result.stderr
+
+
+def test_accept_encoding_is_decoded_by_httpx():
+    encodings = compression.ACCEPT_ENCODING.split(", ")
+    assert encodings[-2:] == ["gzip", "deflate"]
+    for encoding in encodings:
+        response = httpx.Response(
+            200,
+            headers={"Content-Encoding": encoding},
+            content=_COMPRESS[encoding](b"{}"),
+        )
+        assert response.read() == b"{}"
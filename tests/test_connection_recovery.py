@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from flymyai import async_client
+from flymyai.core.clients.recovery import ConnectionRecovery
+
+
+class _Owner:
+    def __init__(self):
+        self.built = 0
+        self._client = self._construct_client()
+
+    def _construct_client(self):
+        self.built += 1
+        return httpx.Client(
+            transport=httpx.MockTransport(lambda r: httpx.Response(200))
+        )
+
+
+def test_rebuild_once_per_generation():
+    owner = _Owner()
+    recovery = ConnectionRecovery()
+    first = owner._client
+    assert recovery.rebuild(owner, 0) is first
+    assert recovery.rebuild(owner, 0) is None
+    assert recovery.generation == 1
+    assert recovery.recoveries == 1
+    assert owner.built == 2
+
+
+def test_retired_client_closed_after_in_flight_requests():
+    owner = _Owner()
+    recovery = ConnectionRecovery()
+    first = owner._client
+    with recovery.request() as generation:
+        assert recovery.rebuild(owner, generation) is None
+        assert not first.is_closed
+    assert first.is_closed
+    assert not owner._client.is_closed
+
+
+def _flaky_client(first_handler):
+    """
+    AsyncClient whose first HTTP client answers with first_handler,
+    the rebuilt ones always succeed
+    """
+    client = async_client("fly-123", "owner/model")
+    client._client = httpx.AsyncClient(
+        transport=httpx.MockTransport(first_handler),
+        base_url="https://api.flymy.ai/",
+    )
+
+    async def healthy(request: httpx.Request):
+        return httpx.Response(200, json={"status": 200})
+
+    client._construct_client = lambda: httpx.AsyncClient(
+        transport=httpx.MockTransport(healthy), base_url="https://api.flymy.ai/"
+    )
+    return client
+
+
+@pytest.mark.asyncio
+async def test_concurrent_failures_rebuild_once():
+    async def broken(request: httpx.Request):
+        await asyncio.sleep(0.05)
+        raise httpx.RemoteProtocolError("connection lost", request=request)
+
+    client = _flaky_client(broken)
+    first = client._client
+    await asyncio.gather(*(client.cancel_prediction(str(i)) for i in range(20)))
+    assert client.connection_recoveries == 1
+    assert first.is_closed
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_healthy_requests_finish_on_retired_client():
+    served = []
+
+    async def partly_broken(request: httpx.Request):
+        infer_id = json.loads(request.content)["infer_id"]
+        if infer_id == "broken":
+            raise httpx.RemoteProtocolError("stream reset", request=request)
+        await asyncio.sleep(0.2)
+        served.append(infer_id)
+        return httpx.Response(200, json={"status": 200})
+
+    client = _flaky_client(partly_broken)
+    first = client._client
+    slow = asyncio.ensure_future(client.cancel_prediction("slow"))
+    await asyncio.sleep(0.05)
+    await client.cancel_prediction("broken")
+    assert not first.is_closed
+    await slow
+    assert served == ["slow"]
+    assert first.is_closed
+    assert client.connection_recoveries == 1
+    await client.close()
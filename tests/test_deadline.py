@@ -0,0 +1,66 @@
+import pytest
+
+from flymyai.core.exceptions import RetryTimeoutExceededException
+from flymyai.utils.deadline import Deadline
+from tests.SSEStandIn import SSEStandIn
+
+
+def test_deadline_of():
+    deadline = Deadline(1)
+    assert Deadline.of(None) is None
+    assert Deadline.of(deadline) is deadline
+    assert Deadline.of(2).seconds == 2
+    assert 0 < deadline.remaining() <= 1
+    assert not deadline.expired
+
+
+def test_expired_deadline():
+    deadline = Deadline(0)
+    assert deadline.expired
+    assert deadline.remaining() == 0
+    with pytest.raises(RetryTimeoutExceededException):
+        deadline.timeout()
+
+
+@pytest.mark.asyncio
+async def test_async_predict_deadline_cancels_prediction():
+    stand_in = SSEStandIn({"slow": 5})
+    client = stand_in.async_client()
+    with pytest.raises(RetryTimeoutExceededException):
+        await client.predict({"prompt": "slow"}, deadline=0.2)
+    await client.close()
+    assert stand_in.cancelled == ["slow"]
+
+
+def test_sync_stream_deadline_cancels_prediction():
+    stand_in = SSEStandIn({"slow": 0.1}, tokens=20)
+    client = stand_in.sync_client()
+    partials = []
+    with pytest.raises(RetryTimeoutExceededException):
+        for partial in client.stream({"prompt": "slow"}, deadline=0.35):
+            partials.append(partial)
+    assert 0 < len(partials) < 20
+    assert stand_in.cancelled == ["slow"]
+
+
+@pytest.mark.asyncio
+async def test_async_stream_deadline_cancels_prediction():
+    stand_in = SSEStandIn({"slow": 5})
+    client = stand_in.async_client()
+    with pytest.raises(RetryTimeoutExceededException):
+        async for _ in client.stream({"prompt": "slow"}, deadline=0.2):
+            pass
+    await client.close()
+    assert stand_in.cancelled == ["slow"]
+
+
+@pytest.mark.asyncio
+async def test_shared_deadline_spans_calls():
+    stand_in = SSEStandIn({"slow": 0.15})
+    client = stand_in.async_client()
+    deadline = Deadline(0.4)
+    await client.predict({"prompt": "slow"}, deadline=deadline)
+    with pytest.raises(RetryTimeoutExceededException):
+        await client.predict({"prompt": "slow"}, deadline=deadline)
+        await client.predict({"prompt": "slow"}, deadline=deadline)
+    await client.close()
@@ -0,0 +1,77 @@
+import asyncio
+
+import httpx
+import pytest
+
+import flymyai
+from flymyai.core.clients import default_clients
+from tests.SSEStandIn import SSEStandIn
+
+
+@pytest.fixture
+def stand_in(monkeypatch):
+    stand_in = SSEStandIn()
+    stand_in.built = []
+
+    def sync_client(self):
+        client = httpx.Client(
+            transport=httpx.MockTransport(stand_in._handler(False)),
+            base_url="https://api.flymy.ai/",
+        )
+        stand_in.built.append(client)
+        return client
+
+    def async_client(self):
+        client = httpx.AsyncClient(
+            transport=httpx.MockTransport(stand_in._handler(True)),
+            base_url="https://api.flymy.ai/",
+        )
+        stand_in.built.append(client)
+        return client
+
+    monkeypatch.setattr(flymyai.FlyMyAI, "_construct_client", sync_client)
+    monkeypatch.setattr(flymyai.AsyncFlyMyAI, "_construct_client", async_client)
+    yield stand_in
+    default_clients.close_default_clients()
+
+
+def test_run_reuses_client_per_apikey(stand_in):
+    for _ in range(3):
+        response = flymyai.run("fly-123", "owner/model", {"prompt": "fast"})
+        assert response.output_data == {"output": [0]}
+    assert len(stand_in.built) == 1
+    flymyai.run("fly-456", "owner/other", {"prompt": "fast"})
+    assert len(stand_in.built) == 2
+    assert [r.url.path for r in stand_in.requests][-2:] == [
+        "/api/v1/owner/model/predict",
+        "/api/v1/owner/other/predict",
+    ]
+    default_clients.close_default_clients()
+    assert all(client.is_closed for client in stand_in.built)
+
+
+def test_async_run_reuses_client_per_event_loop(stand_in):
+    async def main():
+        for _ in range(3):
+            await flymyai.async_run("fly-123", "owner/model", {"prompt": "fast"})
+        await flymyai.aclose_default_clients()
+
+    asyncio.run(main())
+    assert len(stand_in.built) == 1
+    asyncio.run(main())
+    assert len(stand_in.built) == 2
+    assert all(client.is_closed for client in stand_in.built)
+
+
+def test_async_clients_of_an_open_loop_are_closed_at_exit(stand_in):
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(
+            flymyai.async_run("fly-123", "owner/model", {"prompt": "fast"})
+        )
+        (client,) = stand_in.built
+        assert not client.is_closed
+        default_clients.close_default_clients()
+        assert client.is_closed
+    finally:
+        loop.close()
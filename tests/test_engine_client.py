@@ -0,0 +1,58 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from flymyai import engine_client
+from flymyai.core.engine import get_engine
+from tests.SSEStandIn import SSEStandIn
+
+
+def _engine_client(stand_in: SSEStandIn):
+    client = engine_client("fly-123", "owner/model")
+    client._async_client._client = httpx.AsyncClient(
+        transport=httpx.MockTransport(stand_in._handler(True)),
+        base_url="https://api.flymy.ai/",
+    )
+    return client
+
+
+def test_many_threads_share_engine_loop():
+    stand_in = SSEStandIn({"slow": 0.05})
+    client = _engine_client(stand_in)
+    with ThreadPoolExecutor(64) as pool:
+        responses = list(
+            pool.map(lambda _: client.predict({"prompt": "slow"}), range(200))
+        )
+    assert all(response.output_data == {"output": [0]} for response in responses)
+    assert len(stand_in.requests) == 200
+    engines = [t for t in threading.enumerate() if t.name == "flymyai-engine"]
+    assert len(engines) == 1
+    client.close()
+
+
+def test_stream_consumed_and_closed_through_engine():
+    stand_in = SSEStandIn(tokens=5)
+    client = _engine_client(stand_in)
+    with client.stream({"prompt": "fast"}) as stream:
+        assert next(stream).output_data == {"output": [0]}
+    assert stand_in.cancelled == ["fast"]
+
+    with client.stream({"prompt": "fast"}) as stream:
+        tokens = [partial.output_data["output"] for partial in stream]
+    assert tokens[:5] == [[0], [1], [2], [3], [4]]
+    assert stream.stream_details.output_tokens == 5
+    assert stand_in.cancelled == ["fast"]
+    client.close()
+
+
+def test_blocking_call_on_engine_thread_is_refused():
+    client = _engine_client(SSEStandIn())
+
+    async def nested():
+        return client.predict({"prompt": "fast"})
+
+    with pytest.raises(RuntimeError):
+        get_engine().run(nested())
+    client.close()
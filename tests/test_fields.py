@@ -1,8 +1,11 @@
+import json
 import pathlib
 
+import httpx
 import pytest
 
-from flymyai.multipart import BinaryField, SimpleField
+from flymyai.multipart import BinaryField, MultipartPayload, SimpleField
+from flymyai.multipart import payload as payload_module
 from .FixtureFactory import FixtureFactory
 
 factory = FixtureFactory(__file__)
@@ -43,3 +46,27 @@ def test_simple_field(simple_field_inputs):
         field = SimpleField(inp)
         field.validate()
         assert field.serialize()
+
+
+def test_text_payload_is_sent_as_json():
+    payload = {"prompt": "a cat", "options": {"steps": [1, 2]}, "seed": None}
+    request = httpx.Request(
+        "POST", "https://api.flymy.ai/", **MultipartPayload(payload).serialize()
+    )
+    assert request.headers["Content-Type"] == "application/json"
+    assert json.loads(request.read()) == payload
+
+
+def test_binary_payload_is_sent_as_multipart(binary_field_bytes, monkeypatch):
+    payload = MultipartPayload({"prompt": "a cat", "image": binary_field_bytes})
+    request = httpx.Request(
+        "POST", "https://api.flymy.ai/", **payload.serialize({"X-Api-Key": "fly"})
+    )
+    assert request.headers["Content-Type"].startswith("multipart/form-data")
+    assert request.headers["X-Api-Key"] == "fly"
+
+    monkeypatch.setattr(payload_module, "_JSON_BODY", False)
+    request = httpx.Request(
+        "POST", "https://api.flymy.ai/", **MultipartPayload({"a": "b"}).serialize()
+    )
+    assert request.read() == b"a=b"
@@ -0,0 +1,109 @@
+import http.server
+import json
+import os
+import threading
+
+import httpx
+import pytest
+
+from flymyai import AgentClient, client as sync_client
+from flymyai.core.clients.fork_safety import LazyClient
+from flymyai.core.stream_iterators.dispatchers import CallbackDispatcher
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, "fork"), reason="fork is not available on this platform"
+)
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    wbufsize = -1
+
+    def do_PATCH(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.connections.add(self.client_address)
+        body = json.dumps({"status": 200, "pid": os.getpid()}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.connections = set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _run_in_child(fn) -> int:
+    """
+    :return: exit code of fn() run in a forked child, 1 if it raised
+    """
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            code = fn()
+        finally:
+            os._exit(code)
+    return os.WEXITSTATUS(os.waitpid(pid, 0)[1])
+
+
+def test_forked_child_rebuilds_warm_client(server):
+    client = sync_client("fly-123", "owner/model")
+    client._construct_client = lambda: httpx.Client(base_url=server.url)
+    client._client = client._construct_client()
+    client.cancel_prediction("warm")
+    inherited = client._client
+
+    def child():
+        if not isinstance(client._client, LazyClient):
+            return 2
+        client.cancel_prediction("child")
+        if client._client is inherited or client.connection_recoveries:
+            return 3
+        return 0
+
+    assert _run_in_child(child) == 0
+    assert len(server.connections) == 2
+    # the connection of the parent survived the child
+    client.cancel_prediction("parent")
+    assert client._client is inherited
+    assert client.connection_recoveries == 0
+    assert len(server.connections) == 2
+    client.close()
+
+
+def test_forked_child_rebuilds_agent_client(server):
+    agents = AgentClient(api_key="fly-123", base_url=server.url)
+    inherited = agents._http
+
+    def child():
+        return 0 if agents._http.patch("/").json()["status"] == 200 else 2
+
+    assert _run_in_child(child) == 0
+    assert agents._http is inherited
+    agents.close()
+
+
+def test_forked_child_runs_stream_callbacks():
+    called = []
+    dispatcher = CallbackDispatcher()
+    dispatcher.submit(called.append, "parent")
+    assert dispatcher.flush(2) and called == ["parent"]
+
+    def child():
+        dispatcher = CallbackDispatcher()
+        dispatcher.submit(called.append, "child")
+        return 0 if dispatcher.flush(2) and called[-1] == "child" else 2
+
+    assert _run_in_child(child) == 0
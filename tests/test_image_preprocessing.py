@@ -0,0 +1,111 @@
+import io
+
+import pytest
+
+from flymyai.multipart import images, ImageOptions, MultipartPayload
+
+
+@pytest.mark.skipif(images.Image is not None, reason="Pillow is installed")
+def test_options_require_pillow():
+    with pytest.raises(ImportError, match="flymyai\\[images\\]"):
+        ImageOptions(max_width=1024)
+
+
+def _png(width: int, height: int) -> bytes:
+    from PIL import Image
+
+    image = Image.effect_noise((width, height), 64).convert("RGB")
+    output = io.BytesIO()
+    image.save(output, "PNG")
+    return output.getvalue()
+
+
+def _size_of(field) -> tuple:
+    from PIL import Image
+
+    _, file, _ = field
+    return Image.open(file).size
+
+
+def test_large_image_downscaled_and_reencoded():
+    pytest.importorskip("PIL")
+    original = _png(2000, 1000)
+    payload = MultipartPayload(
+        {"prompt": "x", "image": original},
+        ImageOptions(max_width=1024, max_height=1024, format="webp"),
+    )
+    body = payload.serialize()
+    filename, _, mime = body["files"]["image"]
+    assert filename.endswith(".webp") and mime == "image/webp"
+    assert _size_of(body["files"]["image"]) == (1024, 512)
+    assert payload.bytes_saved > len(original) // 2
+
+
+def test_small_image_in_same_format_is_untouched(tmp_path):
+    pytest.importorskip("PIL")
+    path = tmp_path / "small.png"
+    path.write_bytes(_png(64, 64))
+    payload = MultipartPayload({"image": path}, ImageOptions(max_width=1024))
+    body = payload.serialize()
+    assert body["files"]["image"][0] == str(path)
+    assert payload.bytes_saved == 0
+
+
+def test_not_an_image_is_untouched():
+    pytest.importorskip("PIL")
+    payload = MultipartPayload({"audio": b"RIFF" + b"\0" * 1000}, ImageOptions(100))
+    payload.serialize()
+    assert payload.data["audio"] == b"RIFF" + b"\0" * 1000
+    assert payload.bytes_saved == 0
+
+
+def test_non_image_file_is_not_read(tmp_path, monkeypatch):
+    pytest.importorskip("PIL")
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"\0\0\0\x18ftypmp42" + b"\0" * 100_000)
+
+    def read_bytes(self):
+        raise AssertionError("read whole")
+
+    monkeypatch.setattr(type(path), "read_bytes", read_bytes)
+    payload = MultipartPayload({"video": path}, ImageOptions(max_width=256))
+    payload.preprocess()
+    assert payload.data["video"] == path and payload.bytes_saved == 0
+    with open(path, "rb") as file:
+        payload = MultipartPayload({"video": file}, ImageOptions(max_width=256))
+        payload.preprocess()
+        assert file.tell() == 0
+
+
+def test_limits_from_openapi_schema():
+    pytest.importorskip("PIL")
+    schema = {
+        "components": {
+            "schemas": {
+                "Input": {
+                    "properties": {
+                        "image": {"type": "string", "x-max-width": 1024},
+                        "mask": {"type": "string", "x-max-width": 512},
+                        "prompt": {"type": "string"},
+                    }
+                }
+            }
+        }
+    }
+    options = ImageOptions.from_openapi_schema(schema, format="JPEG")
+    assert options == ImageOptions(max_width=512, format="JPEG")
+    assert ImageOptions.from_openapi_schema({"paths": {}}) is None
+
+
+@pytest.mark.asyncio
+async def test_async_client_reports_bytes_saved():
+    pytest.importorskip("PIL")
+    from tests.test_async_file_upload import UploadStandIn
+
+    stand_in = UploadStandIn()
+    client = stand_in.async_client()
+    client.image_options = {"owner/model": ImageOptions(max_width=256)}
+    response = await client.predict({"prompt": "fast", "image": _png(1024, 1024)})
+    assert response.upload_bytes_saved > 0
+    (request,) = stand_in.requests
+    assert b'filename="' in request.content and b".png" in request.content
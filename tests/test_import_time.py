@@ -0,0 +1,43 @@
+import subprocess
+import sys
+
+import flymyai
+
+# generous: an eager import of the clients takes ~200ms
+_IMPORT_BUDGET_US = 50_000
+
+
+def _import_times(statement: str):
+    """
+    Cumulative import time (us) of every module imported by `statement`,
+    from python -X importtime
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:") :].split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+def test_import_flymyai_is_lazy():
+    times = _import_times("import flymyai")
+    assert times["flymyai"] < _IMPORT_BUDGET_US
+    assert "httpx" not in times
+    assert "pydantic" not in times
+    assert "flymyai.core.client" not in times
+
+
+def test_public_api_resolves():
+    for name in flymyai.__all__:
+        assert getattr(flymyai, name) is not None
+    assert flymyai.client is flymyai.FlyMyAI
+    assert flymyai.run == flymyai.FlyMyAI.run_predict
+    assert "AsyncFlyMyAI" in dir(flymyai)
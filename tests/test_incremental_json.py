@@ -0,0 +1,177 @@
+import asyncio
+import gc
+import json
+import os
+
+import httpx
+import pytest
+
+from flymyai import client as sync_client, async_client
+from flymyai.core._streaming import SSEDecoder, SpillingSSEDecoder
+from flymyai.core.incremental_json import PushJSONParser, SpilledString
+from tests.SSEStandIn import sse
+
+DOCUMENT = {
+    "status": 200,
+    "output_data": {
+        "image": ["QUJD" * 1000, "short"],
+        "text": 'quote " backslash \\ newline \n unicode é 😀' * 50,
+        "numbers": [0, -1.5e-7, 12345678901234567890, True, False, None],
+        "nested": [{"a": []}, {}],
+    },
+}
+
+
+def _resolve(value):
+    if isinstance(value, SpilledString):
+        return value.read()
+    if isinstance(value, dict):
+        return {key: _resolve(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_resolve(item) for item in value]
+    return value
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+def test_push_parser_matches_json_loads(chunk_size, ensure_ascii):
+    text = json.dumps(DOCUMENT, ensure_ascii=ensure_ascii, indent=1)
+    parser = PushJSONParser(spill_threshold=100)
+    for start in range(0, len(text), chunk_size):
+        parser.feed(text[start : start + chunk_size])
+    document = parser.close()
+
+    assert isinstance(document["output_data"]["image"][0], SpilledString)
+    assert document["output_data"]["image"][1] == "short"
+    assert isinstance(document["output_data"]["text"], SpilledString)
+    assert _resolve(document) == DOCUMENT
+
+
+@pytest.mark.parametrize("text", ['{"a":}', "[1,]", '{"a" 1}', "[1 2]", '"abc', "[1]]"])
+def test_push_parser_rejects_invalid_json(text):
+    parser = PushJSONParser()
+    with pytest.raises(json.JSONDecodeError):
+        parser.feed(text)
+        parser.close()
+
+
+def test_spilled_file_removed_with_handle(tmp_path):
+    parser = PushJSONParser(spill_threshold=10, spill_dir=str(tmp_path))
+    parser.feed(json.dumps(["x" * 100]))
+    (handle,) = parser.close()
+    assert handle.read() == "x" * 100 and handle.size == 100
+    assert os.listdir(tmp_path) == [os.path.basename(handle.path)]
+    del handle, parser
+    gc.collect()
+    assert os.listdir(tmp_path) == []
+
+
+def test_unfinished_string_file_removed(tmp_path):
+    parser = PushJSONParser(spill_threshold=10, spill_dir=str(tmp_path))
+    parser.feed('{"output_data": {"image": "' + "A" * 1000)
+    assert len(os.listdir(tmp_path)) == 1
+    del parser
+    gc.collect()
+    assert os.listdir(tmp_path) == []
+
+
+def _cut_stream():
+    # an event, then one cut short inside a spilled string
+    yield sse("data", {"status": 200, "output_data": {"output": [0]}}) + (
+        b'data: {"status": 200, "output_data": {"image": "' + b"A" * 1000
+    )
+
+
+@pytest.mark.parametrize("error", [False, True])
+def test_spilling_stream_closed_midway_leaves_no_files(tmp_path, error):
+    decoder = SpillingSSEDecoder(10, str(tmp_path))
+    chunks = _cut_stream()
+    if error:
+        chunks = iter([*chunks, b"}\n\n"])
+    events = decoder.iter_response(httpx.Response(200, content=chunks))
+    assert next(events).json()["output_data"] == {"output": [0]}
+    if error:
+        with pytest.raises(json.JSONDecodeError):
+            next(events)
+    else:
+        assert len(os.listdir(tmp_path)) == 1
+        events.close()
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_async_spilling_stream_cancelled_leaves_no_files(tmp_path):
+    async def chunks():
+        for chunk in _cut_stream():
+            yield chunk
+        await asyncio.sleep(10)
+
+    decoder = SpillingSSEDecoder(10, str(tmp_path))
+    events = decoder.aiter_response(httpx.Response(200, content=chunks()))
+
+    async def consume():
+        async for _ in events:
+            pass
+
+    task = asyncio.ensure_future(consume())
+    await asyncio.sleep(0.05)
+    assert len(os.listdir(tmp_path)) == 1
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert os.listdir(tmp_path) == []
+
+
+def test_spilling_decoder_matches_line_decoder():
+    body = (
+        sse("event", {"status": 200, "event_type": "id", "prediction_id": "p"})
+        + b": comment\r\n"
+        + b"".join(
+            b"data: " + line.encode() + b"\r\n"
+            for line in json.dumps(DOCUMENT, indent=1).split("\n")
+        )
+        + b"\r\n"
+    )
+    events = []
+    for decoder in (SSEDecoder(), SpillingSSEDecoder(100)):
+        response = httpx.Response(200, content=iter([body[:5], body[5:]]))
+        events.append([
+            (sse.event, _resolve(sse.json())) for sse in decoder.iter_response(response)
+        ])
+    assert events[0] == events[1]
+    assert events[0][-1][1] == DOCUMENT
+
+
+def _handler(request: httpx.Request):
+    content = sse("event", {"status": 200, "event_type": "id", "prediction_id": "p"})
+    content += sse("data", DOCUMENT)
+    return httpx.Response(200, content=[content[:100], content[100:]])
+
+
+def test_sync_predict_spills_large_values(tmp_path):
+    client = sync_client("fly-123", "owner/model", spill_threshold=1000)
+    client._client = httpx.Client(
+        transport=httpx.MockTransport(_handler), base_url="https://api.flymy.ai/"
+    )
+    response = client.predict({"prompt": "image"})
+    image = response.output_data["image"][0]
+    assert isinstance(image, SpilledString)
+    assert _resolve(response.output_data) == DOCUMENT["output_data"]
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_async_predict_spills_large_values():
+    async def body():
+        for chunk in _handler(None).stream:
+            yield chunk
+
+    client = async_client("fly-123", "owner/model", spill_threshold=1000)
+    client._client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda _: httpx.Response(200, content=body())),
+        base_url="https://api.flymy.ai/",
+    )
+    response = await client.predict({"prompt": "image"})
+    assert isinstance(response.output_data["image"][0], SpilledString)
+    assert _resolve(response.output_data) == DOCUMENT["output_data"]
+    await client.close()
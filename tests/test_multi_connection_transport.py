@@ -0,0 +1,157 @@
+import asyncio
+import concurrent.futures
+import itertools
+import threading
+import time
+
+import httpx
+import pytest
+
+from flymyai.core.transports import (
+    AsyncMultiConnectionTransport,
+    MultiConnectionTransport,
+)
+
+
+async def _abody():
+    yield b"{}"
+
+
+class _Connections:
+    """
+    MockTransports standing for separate connections; records concurrency
+    """
+
+    def __init__(self, delay: float = 0.1):
+        self.delay = delay
+        self.served = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+
+    def _enter(self, connection: int):
+        with self._lock:
+            self.served.append(connection)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+
+    def _exit(self):
+        with self._lock:
+            self.active -= 1
+
+    def sync_factory(self):
+        connection = next(self._ids)
+
+        def handler(request):
+            self._enter(connection)
+            time.sleep(self.delay)
+            self._exit()
+            # a streamed body, released by the client like a real connection
+            return httpx.Response(200, content=iter([b"{}"]))
+
+        return httpx.MockTransport(handler)
+
+    def async_factory(self):
+        connection = next(self._ids)
+
+        async def handler(request):
+            self._enter(connection)
+            await asyncio.sleep(self.delay)
+            self._exit()
+            return httpx.Response(200, content=_abody())
+
+        return httpx.MockTransport(handler)
+
+
+def test_streams_spread_over_connections():
+    connections = _Connections()
+    transport = MultiConnectionTransport(
+        connections=3, transport_factory=connections.sync_factory
+    )
+    with httpx.Client(transport=transport, base_url="http://stand-in") as client:
+        with concurrent.futures.ThreadPoolExecutor(6) as executor:
+            list(executor.map(lambda _: client.get("/"), range(6)))
+    assert sorted(connections.served) == [0, 0, 1, 1, 2, 2]
+    assert transport.load == [0, 0, 0]
+
+
+def test_streams_per_connection_are_limited():
+    connections = _Connections(delay=0.05)
+    transport = MultiConnectionTransport(
+        connections=1,
+        max_streams_per_connection=2,
+        transport_factory=connections.sync_factory,
+    )
+    with httpx.Client(transport=transport, base_url="http://stand-in") as client:
+        with concurrent.futures.ThreadPoolExecutor(8) as executor:
+            list(executor.map(lambda _: client.get("/"), range(8)))
+    assert connections.max_active == 2
+
+
+@pytest.mark.asyncio
+async def test_async_least_loaded_connection():
+    connections = _Connections()
+    transport = AsyncMultiConnectionTransport(
+        connections=2,
+        max_streams_per_connection=2,
+        transport_factory=connections.async_factory,
+    )
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://stand-in"
+    ) as client:
+        await asyncio.gather(*(client.get("/") for _ in range(8)))
+    assert sorted(connections.served) == [0] * 4 + [1] * 4
+    assert connections.max_active == 4
+    assert transport.load == [0, 0]
+
+
+@pytest.mark.asyncio
+async def test_streamed_response_holds_its_connection():
+    connections = _Connections(delay=0)
+    transport = AsyncMultiConnectionTransport(
+        connections=2, transport_factory=connections.async_factory
+    )
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://stand-in"
+    ) as client:
+        async with client.stream("GET", "/"):
+            assert transport.load == [1, 0]
+            await client.get("/")
+            assert connections.served == [0, 1]
+        assert transport.load == [0, 0]
+
+
+def test_saturated_transport_honours_pool_timeout():
+    connections = _Connections(delay=0)
+    transport = MultiConnectionTransport(
+        connections=1,
+        max_streams_per_connection=1,
+        transport_factory=connections.sync_factory,
+    )
+    timeout = httpx.Timeout(5, pool=0.1)
+    with httpx.Client(
+        transport=transport, base_url="http://stand-in", timeout=timeout
+    ) as client:
+        with client.stream("GET", "/"):
+            with pytest.raises(httpx.PoolTimeout):
+                client.get("/")
+        assert client.get("/").status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_async_saturated_transport_honours_pool_timeout():
+    connections = _Connections(delay=0)
+    transport = AsyncMultiConnectionTransport(
+        connections=1,
+        max_streams_per_connection=1,
+        transport_factory=connections.async_factory,
+    )
+    timeout = httpx.Timeout(5, pool=0.1)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://stand-in", timeout=timeout
+    ) as client:
+        async with client.stream("GET", "/"):
+            with pytest.raises(httpx.PoolTimeout):
+                await client.get("/")
+        assert (await client.get("/")).status_code == 200
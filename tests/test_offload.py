@@ -0,0 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from flymyai.core import offload
+from flymyai.core._streaming import ServerSentEvent, SSEDecoder
+from tests.SSEStandIn import SSEStandIn
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(1)
+        self.calls = 0
+
+    def submit(self, fn, *args, **kwargs):
+        self.calls += 1
+        return super().submit(fn, *args, **kwargs)
+
+
+@pytest.fixture
+def executor():
+    executor = CountingExecutor()
+    offload.set_offload_executor(executor)
+    yield executor
+    offload.set_offload_executor(None)
+    executor.shutdown()
+
+
+def test_event_json_is_parsed_once(monkeypatch):
+    parsed = []
+    json_text = ServerSentEvent.json_text
+
+    def counting_json_text(self):
+        parsed.append(json_text.fget(self))
+        return parsed[-1]
+
+    # json() reads json_text only to parse it
+    monkeypatch.setattr(ServerSentEvent, "json_text", property(counting_json_text))
+    (sse,) = SSEDecoder().iter(iter(['data: {"status": 200}', ""]))
+    assert sse.json() is sse.json()
+    assert parsed == ['{"status": 200}']
+
+
+@pytest.mark.asyncio
+async def test_large_events_are_parsed_in_executor(monkeypatch, executor):
+    client = SSEStandIn().async_client()
+    response = await client.predict({"prompt": "fast"})
+    assert response.output_data == {"output": [0]}
+    assert executor.calls == 0
+
+    monkeypatch.setattr(offload, "_OFFLOAD_THRESHOLD", 1)
+    response = await client.predict({"prompt": "fast"})
+    assert response.output_data == {"output": [0]}
+    assert executor.calls > 0
+    await client.close()
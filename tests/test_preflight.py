@@ -0,0 +1,114 @@
+import os
+import threading
+
+import httpx
+import pytest
+
+from flymyai.core.clients import preflight
+from flymyai.core.exceptions import FlyMyAIExceptionGroup, FlyMyAIPredictException
+from tests.SSEStandIn import SSEStandIn, sse
+
+_LARGE = b"\0" * 4096
+
+
+class PreflightStandIn(SSEStandIn):
+    def __init__(self, schema_status: int = 200):
+        super().__init__()
+        self.schema_status = schema_status
+
+    def _handler(self, is_async: bool):
+        def handler(request: httpx.Request):
+            self.requests.append(request)
+            if request.url.path.endswith("openapi.json"):
+                return httpx.Response(
+                    self.schema_status, json={"detail": "Invalid API key"}
+                )
+            return httpx.Response(
+                200,
+                content=sse("data", {"status": 200, "output_data": {"output": [0]}}),
+            )
+
+        return handler
+
+    def paths(self):
+        return [request.url.path.rsplit("/", 1)[-1] for request in self.requests]
+
+
+@pytest.fixture(autouse=True)
+def small_threshold(monkeypatch):
+    monkeypatch.setattr(preflight, "_PREFLIGHT_THRESHOLD", 1024)
+    monkeypatch.setattr(preflight, "_valid_until", {})
+
+
+def test_rejected_key_uploads_nothing():
+    stand_in = PreflightStandIn(401)
+    client = stand_in.sync_client()
+    with pytest.raises(FlyMyAIExceptionGroup) as excinfo:
+        client.predict({"prompt": "fast", "image": _LARGE}, max_retries=1)
+    (error,) = excinfo.value.errors
+    assert isinstance(error, FlyMyAIPredictException)
+    assert error.response.status_code == 401
+    assert stand_in.paths() == ["openapi.json"]
+
+
+def test_valid_key_is_checked_once():
+    stand_in = PreflightStandIn()
+    client = stand_in.sync_client()
+    for _ in range(2):
+        client.predict({"prompt": "fast", "image": _LARGE})
+    assert stand_in.paths() == ["openapi.json", "predict", "predict"]
+
+
+def test_small_payload_is_not_checked():
+    stand_in = PreflightStandIn(401)
+    client = stand_in.sync_client()
+    response = client.predict({"prompt": "fast", "image": b"\0"})
+    assert response.output_data == {"output": [0]}
+    assert "openapi.json" not in stand_in.paths()
+
+
+def test_inconclusive_check_uploads():
+    stand_in = PreflightStandIn(503)
+    client = stand_in.sync_client()
+    client.predict({"prompt": "fast", "image": _LARGE})
+    assert stand_in.paths() == ["openapi.json", "predict"]
+
+
+@pytest.mark.asyncio
+async def test_async_rejected_key_uploads_nothing(tmp_path):
+    path = tmp_path / "upload.bin"
+    path.write_bytes(_LARGE)
+    stand_in = PreflightStandIn(403)
+    client = stand_in.async_client()
+    with pytest.raises(FlyMyAIPredictException):
+        async for _ in client.stream({"prompt": "fast", "image": path}):
+            pass
+    assert stand_in.paths() == ["openapi.json"]
+
+
+@pytest.mark.asyncio
+async def test_async_valid_key_is_checked_once():
+    stand_in = PreflightStandIn()
+    client = stand_in.async_client()
+    for _ in range(2):
+        await client.predict({"prompt": "fast", "image": _LARGE})
+    assert stand_in.paths() == ["openapi.json", "predict", "predict"]
+
+
+@pytest.mark.asyncio
+async def test_async_file_size_is_not_stat_on_the_event_loop(tmp_path, monkeypatch):
+    path = tmp_path / "upload.bin"
+    path.write_bytes(_LARGE)
+    loop_thread = threading.get_ident()
+    stat_threads = []
+    stat = os.stat
+
+    def tracking_stat(*args, **kwargs):
+        stat_threads.append(threading.get_ident())
+        return stat(*args, **kwargs)
+
+    monkeypatch.setattr(os, "stat", tracking_stat)
+    stand_in = PreflightStandIn()
+    await stand_in.async_client().predict({"prompt": "fast", "image": path})
+    assert stand_in.paths() == ["openapi.json", "predict"]
+    assert stat_threads and loop_thread not in stat_threads
@@ -0,0 +1,85 @@
+import base64
+import json
+
+import httpx
+import pytest
+
+from flymyai.core import offload
+from flymyai.core.models.successful_responses import AsyncPredictionTask
+from flymyai.core.process_codec import ProcessCodec
+from tests.SSEStandIn import SSEStandIn, sse
+
+
+@pytest.fixture(scope="module")
+def codec():
+    codec = ProcessCodec(max_workers=1, min_size=16)
+    yield codec
+    codec.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_codec_loads(codec):
+    image = base64.b64encode(bytes(range(256)) * 64).decode()
+    body = {"output_data": {"image": [image], "text": "ünïcode"}}
+    assert await codec.loads(json.dumps(body, ensure_ascii=False)) == body
+    assert await codec.loads("[1]") == [1]
+
+
+class ResultStandIn(SSEStandIn):
+    """
+    Serves one large SSE result and large async task results
+    """
+
+    image = base64.b64encode(bytes(range(256)) * 64).decode()
+
+    def _handler(self, is_async: bool):
+        def handler(request: httpx.Request):
+            self.requests.append(request)
+            if request.url.path.endswith("predict/async/result/"):
+                return httpx.Response(
+                    200,
+                    json={
+                        "inference_responses": [{
+                            "infer_details": {"status": 200},
+                            "response": {"image": self.image},
+                        }]
+                    },
+                )
+            return httpx.Response(
+                200,
+                content=sse(
+                    "data", {"status": 200, "output_data": {"image": [self.image]}}
+                ),
+            )
+
+        return handler
+
+
+@pytest.mark.asyncio
+async def test_async_client_parses_large_results_in_codec(monkeypatch, codec):
+    parsed = []
+    codec_loads = codec.loads
+
+    async def loads(text):
+        parsed.append(len(text))
+        return await codec_loads(text)
+
+    monkeypatch.setattr(codec, "loads", loads)
+    monkeypatch.setattr(offload, "_OFFLOAD_THRESHOLD", 1024)
+    offload.set_offload_executor(codec)
+    stand_in = ResultStandIn()
+    client = stand_in.async_client()
+    try:
+        response = await client.predict({"prompt": "fast"})
+        assert response.output_data == {"image": [stand_in.image]}
+        assert len(parsed) == 1 and parsed[0] > len(stand_in.image)
+
+        task = AsyncPredictionTask(prediction_id="task")
+        task.client_info = client.client_info
+        task.set_client(client)
+        (result,) = await client.wait_all([task])
+        assert result.inference_responses[0].output_data == {"image": stand_in.image}
+        assert len(parsed) == 2
+    finally:
+        offload.set_offload_executor(None)
+        await client.close()
@@ -0,0 +1,23 @@
+import pytest
+
+from flymyai import client as sync_client
+from flymyai.core.authorizations import APIKeyClientInfo
+from flymyai.core.exceptions import ImproperlyConfiguredClientException
+
+
+def test_route_interned_per_apikey_and_model():
+    client = sync_client("fly-123", "owner/model")
+    route = client.amend_client_info("owner/other")
+    assert client.amend_client_info("owner/other") is route
+    assert client.amend_client_info() is client.client_info
+    assert APIKeyClientInfo("fly-456").copy_for_model("owner/other") is not route
+    assert route.prediction_path is route.prediction_path
+    assert str(route.prediction_stream_path) == "/api/v1/owner/other/predict/stream/"
+    assert route.authorization_headers == {"X-API-KEY": "fly-123"}
+    client.close()
+
+
+@pytest.mark.parametrize("model", ["", "model", "owner/model/extra"])
+def test_invalid_model_rejected(model):
+    with pytest.raises(ImproperlyConfiguredClientException):
+        APIKeyClientInfo("fly-123").copy_for_model(model)
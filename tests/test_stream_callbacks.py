@@ -0,0 +1,130 @@
+import asyncio
+import gc
+import threading
+import time
+
+import pytest
+
+from flymyai.core.stream_iterators.dispatchers import (
+    AsyncCallbackDispatcher,
+    CallbackDispatcher,
+)
+from flymyai.core.types.event_types import EventType
+from tests.SSEStandIn import SSEStandIn
+
+
+def test_dispatcher_keeps_order_and_reports_errors():
+    reported = []
+    dispatcher = CallbackDispatcher(on_error=lambda e, arg: reported.append(arg))
+    received = []
+
+    def callback(arg):
+        if arg == 3:
+            raise ValueError(arg)
+        time.sleep(0.001)
+        received.append(arg)
+
+    for i in range(10):
+        dispatcher.submit(callback, i)
+    assert dispatcher.flush(timeout=5)
+    assert received == [0, 1, 2, 4, 5, 6, 7, 8, 9]
+    assert reported == [3]
+    assert isinstance(dispatcher.errors[0], ValueError)
+
+
+def test_slow_callback_does_not_stall_stream():
+    stream = SSEStandIn(tokens=5).sync_client().stream({"prompt": "prompt"})
+    callback_threads = []
+
+    def slow_callback(metrics):
+        callback_threads.append(threading.current_thread())
+        time.sleep(0.05)
+
+    stream.set_on_metrics(slow_callback)
+    started = time.monotonic()
+    next(stream)
+    assert time.monotonic() - started < 0.05
+    for _ in stream:
+        pass
+    # the stream end waits for the pending callbacks
+    assert len(callback_threads) == 5
+    assert threading.current_thread() not in callback_threads
+
+
+@pytest.mark.asyncio
+async def test_async_dispatcher_runs_callbacks_in_order():
+    dispatcher = AsyncCallbackDispatcher(maxsize=2)
+    received = []
+
+    async def coro_callback(arg):
+        await asyncio.sleep(0.001)
+        received.append(arg)
+
+    for i in range(6):
+        await dispatcher.submit(coro_callback if i % 2 else received.append, i)
+    await dispatcher.aclose()
+    assert received == list(range(6))
+
+
+@pytest.mark.asyncio
+async def test_async_stream_event_callbacks_are_awaited():
+    stream = SSEStandIn().async_client().stream({"prompt": "prompt"})
+    events = []
+
+    async def on_event(event):
+        await asyncio.sleep(0.01)
+        events.append(event.event_type)
+
+    stream.set_on_event(on_event)
+    async for _ in stream:
+        pass
+    assert events == [EventType.STREAM_ID]
+    assert stream.dispatcher.errors == []
+
+
+@pytest.mark.asyncio
+async def test_async_stream_callbacks_stopped_when_consumer_cancelled():
+    stream = SSEStandIn({"slow": 5}).async_client().stream({"prompt": "slow"})
+    stream.set_on_event(lambda event: None)
+
+    async def consume():
+        async for _ in stream:
+            pass
+
+    consumer = asyncio.ensure_future(consume())
+    await asyncio.sleep(0.1)
+    callbacks = stream.dispatcher._consumer
+    consumer.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await consumer
+    await asyncio.sleep(0)
+    assert callbacks.done()
+
+
+@pytest.mark.asyncio
+async def test_dropped_async_stream_stops_callbacks():
+    stream = (
+        SSEStandIn({"slow": 0.01}, tokens=10).async_client().stream({"prompt": "slow"})
+    )
+    stream.set_on_event(lambda event: None)
+    stream.cancel_on_close = False
+    await stream.__anext__()
+    callbacks = stream.dispatcher._consumer
+    del stream
+    gc.collect()
+    await asyncio.sleep(0)
+    assert callbacks.done()
+
+
+@pytest.mark.asyncio
+async def test_async_dispatcher_stopped_from_another_thread():
+    asyncio.get_running_loop().set_debug(True)
+    dispatcher = AsyncCallbackDispatcher()
+    await dispatcher.submit(lambda arg: None, 0)
+    await asyncio.sleep(0)
+    callbacks = dispatcher._consumer
+    stopper = threading.Thread(target=dispatcher.stop)
+    stopper.start()
+    stopper.join()
+    await asyncio.wait([callbacks], timeout=1)
+    assert callbacks.cancelled()
@@ -0,0 +1,67 @@
+import httpx
+import pytest
+
+from flymyai.core.exceptions import FlyMyAIPredictException
+from tests.SSEStandIn import SSEStandIn, sse
+
+
+class BrokenStandIn(SSEStandIn):
+    """
+    Fails the "broken" prompt
+    """
+
+    def _handler(self, is_async: bool):
+        handler = super()._handler(is_async)
+
+        def broken(request: httpx.Request):
+            if b"broken" in request.content:
+                self.requests.append(request)
+                return httpx.Response(
+                    200, content=sse("data", {"status": 400, "detail": "Bad input"})
+                )
+            return handler(request)
+
+        return broken
+
+
+@pytest.mark.asyncio
+async def test_stream_many_yields_as_completed():
+    client = SSEStandIn({"slow": 0.05, "fast": 0}).async_client()
+    received = {0: [], 1: []}
+    async with client.stream_many(
+        [{"prompt": "slow"}, {"prompt": "fast"}], concurrency=2
+    ) as multi_stream:
+        async for index, partial in multi_stream:
+            assert partial.status == 200
+            received[index].append(partial.output_data["output"])
+    assert received == {0: [[0], [1], [2], []], 1: [[0], [1], [2], []]}
+    assert all(details.output_tokens == 3 for details in multi_stream.stream_details)
+
+
+@pytest.mark.asyncio
+async def test_stream_many_cancel_single_stream():
+    stand_in = SSEStandIn({"slow": 0.5, "fast": 0.01})
+    multi_stream = stand_in.async_client().stream_many(
+        [{"prompt": "slow"}, {"prompt": "fast"}]
+    )
+    received = []
+    async for index, partial in multi_stream:
+        received.append(index)
+        if index == 1 and received.count(1) == 1:
+            await multi_stream.cancel(0)
+    assert received.count(1) == 4
+    assert stand_in.cancelled == ["slow"]
+    assert multi_stream.stream_details[0] is None
+
+
+@pytest.mark.asyncio
+async def test_stream_many_error_stops_other_streams():
+    stand_in = BrokenStandIn({"slow": 0.2, "broken": 0.05})
+    multi_stream = stand_in.async_client().stream_many(
+        [{"prompt": "slow"}, {"prompt": "broken"}]
+    )
+    with pytest.raises(FlyMyAIPredictException):
+        async for _ in multi_stream:
+            pass
+    assert all(task.done() for task in multi_stream._tasks.values())
+    assert stand_in.cancelled == ["slow"]
@@ -0,0 +1,50 @@
+import pytest
+
+from flymyai.core.stream_iterators.metrics import count_tokens
+from tests.SSEStandIn import SSEStandIn
+
+
+def test_count_tokens():
+    assert count_tokens(None) == 0
+    assert count_tokens({"output": []}) == 0
+    assert count_tokens({"output": ["a", "b"], "reasoning": ["c"]}) == 2
+    assert count_tokens({"output": "text"}) == 1
+
+
+def test_stream_metrics():
+    stream = (
+        SSEStandIn({"prompt": 0.02}, tokens=4)
+        .sync_client()
+        .stream({"prompt": "prompt"})
+    )
+    snapshots = []
+    stream.set_on_metrics(lambda metrics: snapshots.append(metrics.token_count))
+    for _ in stream:
+        pass
+    metrics = stream.metrics
+    assert snapshots == [1, 2, 3, 4]
+    assert metrics.partial_count == 5
+    assert metrics.time_to_first_token >= 0.02
+    assert 0.02 <= metrics.mean_inter_token_latency <= metrics.max_inter_token_gap
+    assert metrics.output_tokens == 4
+    assert 0 < metrics.tokens_per_second <= 3 / 0.06
+
+
+@pytest.mark.asyncio
+async def test_async_stream_metrics():
+    stream = (
+        SSEStandIn({"prompt": 0.02}, tokens=4)
+        .async_client()
+        .stream({"prompt": "prompt"})
+    )
+    snapshots = []
+
+    async def on_metrics(metrics):
+        snapshots.append(metrics.last_inter_token_gap)
+
+    stream.set_on_metrics(on_metrics)
+    async for _ in stream:
+        pass
+    assert len(snapshots) == 4
+    assert stream.metrics.time_to_first_token >= 0.02
+    assert stream.metrics.tokens_per_second > 0
@@ -0,0 +1,97 @@
+import pathlib
+
+import httpx
+import pytest
+
+from flymyai import TaskJournal, client as sync_client, async_client
+from flymyai.core.journal import payload_hash
+
+
+class AsyncTaskStandIn:
+    def __init__(self):
+        self.submitted = 0
+        self.finished = set()
+
+    def handler(self, request: httpx.Request):
+        if request.url.path.endswith("predict/async/"):
+            self.submitted += 1
+            return httpx.Response(
+                200, json={"prediction_id": f"prediction-{self.submitted}"}
+            )
+        prediction_id = request.url.params["request_id"]
+        if prediction_id not in self.finished:
+            return httpx.Response(425, json={"detail": "Still processing"})
+        return httpx.Response(
+            200,
+            json={
+                "inference_responses": [{
+                    "infer_details": {"status": 200},
+                    "response": {"prediction_id": prediction_id},
+                }]
+            },
+        )
+
+
+def _client(factory, stand_in, journal, client_cls=httpx.Client):
+    client = factory("fly-123", "owner/model", journal=journal)
+    client._client = client_cls(
+        transport=httpx.MockTransport(stand_in.handler),
+        base_url="https://api.flymy.ai/",
+    )
+    return client
+
+
+def test_payload_hash(tmp_path):
+    image = tmp_path / "image.png"
+    image.write_bytes(b"\x89PNG")
+    assert payload_hash({"a": 1, "b": [1, 2]}) == payload_hash({"b": [1, 2], "a": 1})
+    assert payload_hash({"image": image}) == payload_hash({"image": b"\x89PNG"})
+    assert payload_hash({"image": image}) != payload_hash({"image": b"other"})
+
+
+def test_journal_survives_restart(tmp_path):
+    stand_in = AsyncTaskStandIn()
+    journal_path = tmp_path / "tasks.sqlite"
+    crashed_client = _client(sync_client, stand_in, TaskJournal(journal_path))
+    task = crashed_client.predict_async_task({"prompt": "cat"})
+    assert task.prediction_id == "prediction-1"
+
+    client = _client(sync_client, stand_in, TaskJournal(journal_path))
+    resumed = client.resume_tasks()
+    assert [t.prediction_id for t in resumed] == ["prediction-1"]
+    assert resumed[0].client_info.project_name == "model"
+    # with dedupe, the same payload is not submitted twice while unfinished
+    task = client.predict_async_task({"prompt": "cat"}, dedupe=True)
+    assert task.prediction_id == "prediction-1"
+    assert stand_in.submitted == 1
+
+    stand_in.finished.add("prediction-1")
+    result = resumed[0].result()
+    assert result.inference_responses[0].output_data["prediction_id"] == "prediction-1"
+    assert client.resume_tasks() == []
+    task = client.predict_async_task({"prompt": "cat"}, dedupe=True)
+    assert task.prediction_id == "prediction-2"
+
+
+def test_repeated_payload_is_submitted_again_by_default(tmp_path):
+    stand_in = AsyncTaskStandIn()
+    client = _client(sync_client, stand_in, TaskJournal(tmp_path / "tasks.sqlite"))
+    first = client.predict_async_task({"prompt": "cat"})
+    second = client.predict_async_task({"prompt": "cat"})
+    assert (first.prediction_id, second.prediction_id) == (
+        "prediction-1",
+        "prediction-2",
+    )
+    assert len(client.resume_tasks()) == 2
+
+
+@pytest.mark.asyncio
+async def test_async_journal_resume(tmp_path):
+    stand_in = AsyncTaskStandIn()
+    journal = TaskJournal(tmp_path / "tasks.sqlite")
+    client = _client(async_client, stand_in, journal, httpx.AsyncClient)
+    await client.predict_async_task({"prompt": "cat", "file": pathlib.Path(__file__)})
+    stand_in.finished.add("prediction-1")
+    results = await client.wait_all(client.resume_tasks())
+    assert len(results) == 1
+    assert journal.pending() == []
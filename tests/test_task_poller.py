@@ -0,0 +1,108 @@
+import collections
+import threading
+
+import httpx
+import pytest
+
+from flymyai import client as sync_client, async_client
+from flymyai.core.exceptions import (
+    FlyMyAIExceptionGroup,
+    RetryTimeoutExceededException,
+)
+from flymyai.core.models.successful_responses import AsyncPredictionTask
+from flymyai.core.task_pollers.AsyncTaskPoller import AsyncTaskPoller
+from flymyai.core.task_pollers.TaskPoller import TaskPoller
+
+
+class ResultStandIn:
+    """
+    Result endpoint that answers 425 until a task has been checked `ready_after` times
+    """
+
+    def __init__(self, ready_after: dict, failing=()):
+        self.ready_after = ready_after
+        self.failing = set(failing)
+        self.checks = collections.Counter()
+        self.threads = set()
+
+    def handler(self, request: httpx.Request):
+        prediction_id = request.url.params["request_id"]
+        self.checks[prediction_id] += 1
+        self.threads.add(threading.get_ident())
+        if self.checks[prediction_id] < self.ready_after[prediction_id]:
+            return httpx.Response(425, json={"detail": "Still processing"})
+        status = 500 if prediction_id in self.failing else 200
+        return httpx.Response(
+            200,
+            json={
+                "inference_responses": [{
+                    "infer_details": {"status": status},
+                    "response": {"prediction_id": prediction_id},
+                }]
+            },
+        )
+
+    def tasks(self, client):
+        tasks = []
+        for prediction_id in self.ready_after:
+            task = AsyncPredictionTask(prediction_id=prediction_id)
+            task.client_info = client.client_info
+            task.set_client(client)
+            tasks.append(task)
+        return tasks
+
+
+@pytest.fixture
+def stand_in():
+    return ResultStandIn({f"task-{i}": i % 4 + 1 for i in range(40)}, ["task-5"])
+
+
+def _sync_client(stand_in):
+    client = sync_client("fly-123", "owner/model")
+    client._client = httpx.Client(
+        transport=httpx.MockTransport(stand_in.handler),
+        base_url="https://api.flymy.ai/",
+    )
+    return client
+
+
+def test_poller_as_completed(stand_in):
+    tasks = stand_in.tasks(_sync_client(stand_in))
+    poller = TaskPoller(min_interval=0.01, backoff=2, max_in_flight=4)
+    completed = {}
+    for task, result in poller.as_completed(tasks, return_exceptions=True):
+        completed[task.prediction_id] = result
+    assert completed.keys() == stand_in.ready_after.keys()
+    assert isinstance(completed.pop("task-5"), FlyMyAIExceptionGroup)
+    for prediction_id, result in completed.items():
+        output = result.inference_responses[0].output_data
+        assert output["prediction_id"] == prediction_id
+    # every task is checked exactly until it is ready, from at most 4 threads
+    assert stand_in.checks == collections.Counter(stand_in.ready_after)
+    assert len(stand_in.threads) <= 4
+    assert len(poller) == 0
+
+
+def test_poller_wait_all_timeout(stand_in):
+    stand_in.ready_after["task-0"] = 10**6
+    tasks = stand_in.tasks(_sync_client(stand_in))
+    with pytest.raises(RetryTimeoutExceededException):
+        TaskPoller(min_interval=0.01, max_interval=0.02).wait_all(
+            tasks, timeout=0.2, return_exceptions=True
+        )
+
+
+@pytest.mark.asyncio
+async def test_async_poller_wait_all(stand_in):
+    del stand_in.ready_after["task-5"]
+    client = async_client("fly-123", "owner/model")
+    client._client = httpx.AsyncClient(
+        transport=httpx.MockTransport(stand_in.handler),
+        base_url="https://api.flymy.ai/",
+    )
+    tasks = stand_in.tasks(client)
+    results = await AsyncTaskPoller(min_interval=0.01, backoff=2).wait_all(tasks)
+    assert [r.inference_responses[0].output_data["prediction_id"] for r in results] == [
+        task.prediction_id for task in tasks
+    ]
+    assert stand_in.checks == collections.Counter(stand_in.ready_after)
@@ -0,0 +1,122 @@
+import http.server
+import shutil
+import ssl
+import subprocess
+import threading
+
+import httpx
+import pytest
+
+from flymyai import client as sync_client
+from flymyai.core.tls import _ResumingSSLContext, ssl_context
+
+
+def _ssl_context_of(client: httpx.Client) -> ssl.SSLContext:
+    return client._transport._pool._ssl_context
+
+
+def test_clients_and_reconnects_share_ssl_context():
+    first = sync_client("fly-123", "owner/model")
+    second = sync_client("fly-456", "owner/model")
+    shared = _ssl_context_of(first._client)
+    assert shared is _ssl_context_of(second._client)
+    first._reconnect_client()
+    assert _ssl_context_of(first._client) is shared
+    assert ssl_context(http2=False) is not ssl_context(http2=True)
+    first.close()
+    second.close()
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"0" * 1024 * 1024 if self.path == "/large" else b"{}"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(params=[False])
+def tls_server(request, tmp_path):
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl is required to issue a test certificate")
+    cert, key = tmp_path / "cert.pem", tmp_path / "key.pem"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1"]
+        + ["-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost"]
+        + ["-keyout", str(key), "-out", str(cert)],
+        check=True,
+        capture_output=True,
+    )
+    server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    server_context.load_cert_chain(cert, key)
+    if request.param:
+        # session ids only: no tickets
+        server_context.maximum_version = ssl.TLSVersion.TLSv1_2
+        server_context.options |= ssl.OP_NO_TICKET
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.socket = server_context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield cert, server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def test_new_clients_resume_tls_session(tls_server):
+    cert, port = tls_server
+    context = _ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.load_verify_locations(cafile=cert)
+    reused = []
+    for _ in range(3):
+        with httpx.Client(verify=context) as client:
+            with client.stream("GET", f"https://localhost:{port}/") as response:
+                response.read()
+                stream = response.extensions["network_stream"]
+                reused.append(stream.get_extra_info("ssl_object").session_reused)
+    assert reused == [False, True, True]
+
+
+@pytest.mark.asyncio
+async def test_new_async_clients_resume_tls_session(tls_server):
+    cert, port = tls_server
+    context = _ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.load_verify_locations(cafile=cert)
+    reused = []
+    for _ in range(3):
+        async with httpx.AsyncClient(verify=context) as client:
+            async with client.stream("GET", f"https://localhost:{port}/") as response:
+                await response.aread()
+                stream = response.extensions["network_stream"]
+                reused.append(stream.get_extra_info("ssl_object").session_reused)
+    assert reused == [False, True, True]
+
+
+class _CountingSSLContext(_ResumingSSLContext):
+    recorded = 0
+
+    def _record_session(self, connection) -> bool:
+        self.recorded += 1
+        return super()._record_session(connection)
+
+
+@pytest.mark.parametrize("tls_server", [True], indirect=True)
+def test_session_recording_stops_without_tickets(tls_server):
+    cert, port = tls_server
+    context = _CountingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.load_verify_locations(cafile=cert)
+    with httpx.Client(verify=context) as client:
+        with client.stream("GET", f"https://localhost:{port}/large") as response:
+            chunks = sum(1 for _ in response.iter_raw(1024))
+    assert chunks > 100
+    assert context.recorded <= 2
+
+
+def test_default_context_trusts_httpx_bundle():
+    context = ssl_context()
+    assert isinstance(context, _ResumingSSLContext)
+    assert len(context.get_ca_certs()) == len(httpx.create_ssl_context().get_ca_certs())
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from flymyai import async_client, client as sync_client
+
+
+def _counting_transport(requests, broken=0):
+    """
+    MockTransport recording every request; the first `broken` requests
+    it gets fail as if they had landed on a dead connection
+    """
+    lock = threading.Lock()
+    served = []
+
+    def handler(request: httpx.Request):
+        with lock:
+            requests.append(request)
+            served.append(request)
+            if len(served) <= broken:
+                raise httpx.RemoteProtocolError("connection lost", request=request)
+        return httpx.Response(404)
+
+    return httpx.MockTransport(handler)
+
+
+def _sync_client(requests, broken_first=0):
+    client = sync_client("fly-123", "owner/model")
+    client._client = httpx.Client(
+        transport=_counting_transport(requests, broken_first),
+        base_url="https://api.flymy.ai/",
+    )
+    client._construct_client = lambda: httpx.Client(
+        transport=_counting_transport(requests), base_url="https://api.flymy.ai/"
+    )
+    return client
+
+
+def _async_client(requests, broken_first=0):
+    client = async_client("fly-123", "owner/model")
+    client._client = httpx.AsyncClient(
+        transport=_counting_transport(requests, broken_first),
+        base_url="https://api.flymy.ai/",
+    )
+    client._construct_client = lambda: httpx.AsyncClient(
+        transport=_counting_transport(requests), base_url="https://api.flymy.ai/"
+    )
+    return client
+
+
+def test_warmup_makes_concurrent_requests():
+    requests = []
+    client = _sync_client(requests)
+    assert client.warmup(connections=4) == 4
+    assert len(requests) == 4
+    assert {request.method for request in requests} == {"HEAD"}
+    client.close()
+
+
+def test_warmup_rebuilds_dead_connection_and_warms_new_client():
+    requests = []
+    client = _sync_client(requests, broken_first=1)
+    first = client._client
+    assert client.warmup() == 1
+    assert client.connection_recoveries == 1
+    assert first.is_closed
+    client.close()
+
+
+def test_keepalive_pings_until_closed():
+    requests = []
+    client = _sync_client(requests)
+    client.warmup(connections=2)
+    client.start_keepalive(interval=0.01)
+    deadline = threading.Event()
+    while len(requests) < 6 and not deadline.wait(0.01):
+        pass
+    client.close()
+    pinged = len(requests)
+    deadline.wait(0.05)
+    assert pinged >= 6
+    assert len(requests) <= pinged + 2
+
+
+@pytest.mark.asyncio
+async def test_async_warmup_and_keepalive():
+    requests = []
+    client = _async_client(requests, broken_first=2)
+    assert await client.warmup(connections=3, keepalive=False) == 3
+    assert client.connection_recoveries == 1
+    client.start_keepalive(interval=0.01)
+    await asyncio.sleep(0.1)
+    await client.close()
+    pinged = len(requests)
+    assert pinged > 5 + 3
+    await asyncio.sleep(0.05)
+    assert len(requests) == pinged